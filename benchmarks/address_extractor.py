@@ -0,0 +1,139 @@
+"""
+Бенчмарк извлечения адреса: локальный экстрактор против LLM.
+
+Запуск:
+    python -m benchmarks.address_extractor --iterations 1000
+    python -m benchmarks.address_extractor --llm --model mistral-large-latest
+
+Проверяет точность на размеченном корпусе (точное совпадение
+нормализованного адреса и полнота по компонентам) и задержку извлечения.
+С флагом --llm те же запросы отправляются в Core API через промпт
+классификации, для этого нужны рабочие CORE_URL и API_KEY.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# bot.config требует переменные окружения при импорте
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("CORE_URL", "http://127.0.0.1")
+
+from bot.utils.address_extractor import AddressExtractor  # noqa: E402
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def _load_corpus(path: Path) -> List[Dict[str, Optional[str]]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _components(address: Optional[str]) -> Set[str]:
+    if not address:
+        return set()
+    return {part.strip().lower() for part in address.split(",") if part.strip()}
+
+
+def _score(name: str, corpus, predictions: List[Optional[str]], latencies) -> None:
+    exact = 0
+    expected_total = 0
+    recalled = 0
+    for case, predicted in zip(corpus, predictions):
+        expected = case["address"]
+        if (predicted or None) == expected:
+            exact += 1
+        expected_parts = _components(expected)
+        expected_total += len(expected_parts)
+        recalled += len(expected_parts & _components(predicted))
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p99 = latencies_ms[max(int(len(latencies_ms) * 0.99) - 1, 0)]
+    recall = recalled / expected_total if expected_total else 0.0
+    print(
+        f"{name:<8} cases={len(corpus):<4} exact={exact / len(corpus):.0%} "
+        f"component_recall={recall:.0%} "
+        f"p50={statistics.median(latencies_ms):.3f}ms p99={p99:.3f}ms"
+    )
+
+
+def _print_misses(corpus, predictions: List[Optional[str]]) -> None:
+    for case, predicted in zip(corpus, predictions):
+        if (predicted or None) != case["address"]:
+            print(f"  - {case['query']!r}: {predicted!r} != {case['address']!r}")
+
+
+def _run_local(corpus, gazetteer: Path, iterations: int) -> List[Optional[str]]:
+    extractor = AddressExtractor()
+    extractor.load_gazetteer(str(gazetteer))
+
+    predictions: List[Optional[str]] = []
+    latencies: List[float] = []
+    for case in corpus:
+        match = extractor.extract(case["query"])
+        predictions.append(match.normalized if match else None)
+
+    for _ in range(iterations):
+        for case in corpus:
+            started = time.perf_counter()
+            extractor.extract(case["query"])
+            latencies.append(time.perf_counter() - started)
+
+    _score("local", corpus, predictions, latencies)
+    return predictions
+
+
+async def _run_llm(corpus, model: str) -> List[Optional[str]]:
+    from bot.api.ai import call_ai
+    from bot.utils.helpers import (
+        build_classification_prompt,
+        parse_classification_result,
+    )
+
+    predictions: List[Optional[str]] = []
+    latencies: List[float] = []
+    for case in corpus:
+        started = time.perf_counter()
+        result = await call_ai(
+            text=build_classification_prompt(case["query"]),
+            combined_context="",
+            chat_history="",
+            model=model,
+        )
+        latencies.append(time.perf_counter() - started)
+        address = parse_classification_result(result)[1] if result else None
+        predictions.append(address)
+
+    _score("llm", corpus, predictions, latencies)
+    return predictions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=str(DATA_DIR / "address_corpus.jsonl"))
+    parser.add_argument("--gazetteer", default=str(DATA_DIR / "gazetteer.json"))
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--llm", action="store_true", help="сравнить с LLM")
+    parser.add_argument("--model", default="mistral-large-latest")
+    parser.add_argument("--verbose", action="store_true", help="показать ошибки")
+    args = parser.parse_args()
+
+    corpus = _load_corpus(Path(args.corpus))
+    predictions = _run_local(corpus, Path(args.gazetteer), args.iterations)
+    if args.verbose:
+        _print_misses(corpus, predictions)
+
+    if args.llm:
+        predictions = asyncio.run(_run_llm(corpus, args.model))
+        if args.verbose:
+            _print_misses(corpus, predictions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Бенчмарк локального индекса адресов на синтетической выгрузке.
+
+Запуск:
+    python -m benchmarks.address_index --addresses 200000 --queries 2000
+
+Строит выгрузку из населенных пунктов и улиц справочника, затем измеряет
+время построения индекса, занимаемую память и задержку поиска для полных
+запросов, недописанных запросов и запросов с опечаткой. Недописанный
+запрос обычно подходит многим адресам, поэтому для него доля искомого
+адреса в первой десятке показывает только порядок выдачи.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+# bot.config требует переменные окружения при импорте
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("CORE_URL", "http://127.0.0.1")
+
+from bot.utils.address_index import AddressIndex  # noqa: E402
+
+DATA_DIR = Path(__file__).parent / "data"
+_STREET_TYPES = ["ул.", "пр-т", "пер.", "б-р"]
+_CONN_TYPES = [["FTTB"], ["FTTB", "GPON"], ["GPON"], ["xDSL"]]
+
+
+_SYLLABLES = ["ка", "ли", "но", "ва", "ро", "зе", "мо", "ту", "се", "да", "ре", "ин"]
+
+
+def _name(rng: random.Random) -> str:
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+
+
+def _records(count: int, rng: random.Random) -> List[Dict]:
+    """Выгрузка: населенные пункты со своими улицами и домами"""
+    with open(DATA_DIR / "gazetteer.json", encoding="utf-8") as f:
+        gazetteer = json.load(f)
+    settlements = gazetteer["settlements"] + [_name(rng) for _ in range(200)]
+    common_streets = gazetteer["streets"]
+
+    records: List[Dict] = []
+    while len(records) < count:
+        settlement = rng.choice(settlements)
+        territory_id = f"59{settlements.index(settlement):06d}"
+        # Типичные улицы есть почти в каждом населенном пункте
+        streets = rng.sample(common_streets, 5) + [_name(rng) for _ in range(10)]
+        for street in streets:
+            street_type = rng.choice(_STREET_TYPES)
+            for house in range(1, rng.randint(5, 120)):
+                records.append(
+                    {
+                        "id": len(records),
+                        "address": f"г. {settlement}, {street_type} {street}, "
+                        f"д. {house}",
+                        "territory_id": territory_id,
+                        "territory_name": settlement,
+                        "conn_type": rng.choice(_CONN_TYPES),
+                    }
+                )
+    return records[:count]
+
+
+def _typo(text: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2 :]
+
+
+def _query(record: Dict, kind: str, rng: random.Random) -> str:
+    address = record["address"].replace("г. ", "").replace(",", "")
+    if kind == "partial":
+        return address[: max(6, int(len(address) * rng.uniform(0.5, 0.9)))]
+    if kind == "typo":
+        return _typo(address, rng)
+    return address
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--addresses", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    records = _records(args.addresses, rng)
+
+    started = time.perf_counter()
+    index = AddressIndex(records)
+    build_time = time.perf_counter() - started
+
+    # Память измеряется отдельным построением: tracemalloc замедляет его
+    tracemalloc.start()
+    AddressIndex(records[: args.addresses // 10])
+    memory = tracemalloc.get_traced_memory()[1] * 10
+    tracemalloc.stop()
+    print(
+        f"Адресов: {len(index)}, слов: {index.word_count}, "
+        f"построение {build_time:.1f} с, память ~{memory / 1024 / 1024:.0f} MiB"
+    )
+
+    for kind in ("full", "partial", "typo"):
+        timings: List[float] = []
+        found = 0
+        for _ in range(args.queries):
+            record = rng.choice(records)
+            query = _query(record, kind, rng)
+            started = time.perf_counter()
+            hits = index.search(query, limit=10)
+            timings.append(time.perf_counter() - started)
+            if any(hit.id == str(record["id"]) for hit in hits):
+                found += 1
+
+        timings.sort()
+        print(
+            f"{kind:<8} найдено в топ-10={found / args.queries:6.1%} "
+            f"p50={statistics.median(timings) * 1000:6.3f}ms "
+            f"p99={timings[int(len(timings) * 0.99)] * 1000:6.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Бенчмарк сжатия тел запросов на нагрузках v1/ai и v1/add_topic.
+
+Запуск:
+    python -m benchmarks.compression --repeat 5
+
+Для каждой доступной кодировки выводит размер тела, коэффициент сжатия
+и время сжатия (в потоке цикла событий и через asyncio.to_thread).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+# bot.config требует переменные окружения при импорте
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("CORE_URL", "http://127.0.0.1")
+
+from benchmarks.json_codec import _payloads  # noqa: E402
+from bot.api.compression import RequestCompressor  # noqa: E402
+from bot.api.serialization import json_codec  # noqa: E402
+from bot.config import HttpClientConfig  # noqa: E402
+
+
+async def _measure(compressor: RequestCompressor, body: bytes, repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await compressor.compress("benchmark", body)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = _payloads()
+    bodies = {
+        "ai_csv_request": json_codec.dumps_bytes(payloads["ai_csv_request"]),
+        "add_topic": json_codec.dumps_bytes(
+            {"topic": "Тарифы", "text": payloads["milvus_context"]["combined_context"]}
+        ),
+    }
+
+    for name, body in bodies.items():
+        print(f"\n{name} ({len(body) / 1024:.0f} KiB)")
+        for encoding in ("gzip", "zstd"):
+            compressor = RequestCompressor(
+                HttpClientConfig(request_compression=encoding, compression_min_size=0)
+            )
+            if compressor.default_encoding != encoding:
+                print(f"  {encoding:<5} недоступно")
+                continue
+            compressed, _ = await compressor.compress("benchmark", body)
+            elapsed = await _measure(compressor, body, args.repeat)
+            print(
+                f"  {encoding:<5} size={len(compressed) / 1024:8.1f} KiB "
+                f"ratio={len(compressed) / len(body):5.3f} "
+                f"time={elapsed * 1000:7.2f}ms "
+                f"offloaded={compressor.stats.offloaded}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Бенчмарк пула соединений: новая ClientSession на каждый запрос против общего пула.
+
+Запуск:
+    python -m benchmarks.http_pool --requests 2000 --concurrency 50 --latency 0.01
+
+Поднимает локальный stub Core API и считает новые TCP соединения и
+пропускную способность для обоих режимов.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import aiohttp
+
+# bot.config требует переменные окружения при импорте
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("CORE_URL", "http://127.0.0.1")
+
+from benchmarks.stub_core import start_stub  # noqa: E402
+from bot.api.http import HttpClientRegistry  # noqa: E402
+from bot.config import http_client_config  # noqa: E402
+
+_PAYLOAD = {
+    "user_id": 1,
+    "query": "Вопрос",
+    "ai_response": "Ответ",
+    "status": 1,
+    "hashes": [],
+    "category": "Общий",
+}
+
+
+async def _run(name: str, url: str, requests: int, concurrency: int, request) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await request(url)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:<10} requests={requests:<6} total={elapsed:.2f}s "
+        f"throughput={requests / elapsed:.0f} req/s",
+        end=" ",
+    )
+
+
+async def _benchmark(requests: int, concurrency: int, latency: float) -> None:
+    runner, base_url, _ = await start_stub(latency=latency)
+    url = f"{base_url}/v1/log"
+    try:
+        connections = 0
+
+        async def adhoc(url: str) -> None:
+            nonlocal connections
+            async with aiohttp.ClientSession() as session:
+                async with session.post(url, json=_PAYLOAD) as response:
+                    await response.read()
+            connections += 1
+
+        await _run("adhoc", url, requests, concurrency, adhoc)
+        print(f"new_connections={connections}")
+
+        registry = HttpClientRegistry(http_client_config)
+
+        async def pooled(url: str) -> None:
+            session = await registry.get_session()
+            async with session.post(url, json=_PAYLOAD) as response:
+                await response.read()
+
+        await _run("pooled", url, requests, concurrency, pooled)
+        stats = registry.stats
+        print(
+            f"new_connections={stats.connections_created} "
+            f"reused={stats.connections_reused} reuse_rate={stats.reuse_rate:.0%}"
+        )
+        await registry.close()
+    finally:
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.requests, args.concurrency, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Бенчмарк объединения inline запросов: набор адреса несколькими пользователями.
+
+Запуск:
+    python -m benchmarks.inline_coalescer --users 20 --keystroke 0.15 --latency 0.2
+
+Каждый пользователь набирает адрес посимвольно, на каждое нажатие приходит
+InlineQuery. Сравнивает число обращений к API и отправленных ответов без
+объединения и с паузой перед поиском.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+from typing import List
+
+# bot.config требует переменные окружения при импорте
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("CORE_URL", "http://127.0.0.1")
+
+from bot.utils.coalescer import InlineQueryCoalescer  # noqa: E402
+
+_QUERIES = [
+    "Москва ул Ленина 5",
+    "Пермь Комсомольский проспект 10",
+    "Екатеринбург ул Мира 1",
+]
+
+
+async def _simulate(
+    users: int, keystroke: float, latency: float, debounce: float
+) -> List[int]:
+    coalescer = InlineQueryCoalescer(debounce) if debounce >= 0 else None
+    calls = 0
+    answers = 0
+
+    async def search() -> None:
+        nonlocal calls, answers
+        calls += 1
+        await asyncio.sleep(latency)
+        answers += 1
+
+    async def handle(user_id: int) -> None:
+        if coalescer is None:
+            await search()
+        else:
+            await coalescer.run(user_id, search)
+
+    async def user(user_id: int) -> None:
+        rng = random.Random(user_id)
+        text = _QUERIES[user_id % len(_QUERIES)]
+        tasks = []
+        for _ in text:
+            tasks.append(asyncio.create_task(handle(user_id)))
+            await asyncio.sleep(keystroke * rng.uniform(0.5, 1.5))
+        await asyncio.gather(*tasks)
+
+    await asyncio.gather(*(user(i) for i in range(users)))
+    keystrokes = sum(len(_QUERIES[i % len(_QUERIES)]) for i in range(users))
+    return [keystrokes, calls, answers]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--keystroke", type=float, default=0.15)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    for name, debounce in (("без объединения", -1.0), ("пауза 0", 0.0)) + tuple(
+        (f"пауза {d}", d) for d in (0.2, 0.3, 0.5)
+    ):
+        keystrokes, calls, answers = await _simulate(
+            args.users, args.keystroke, args.latency, debounce
+        )
+        print(
+            f"{name:<16} запросов={keystrokes} обращений к API={calls} "
+            f"ответов={answers} сэкономлено={1 - calls / keystrokes:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
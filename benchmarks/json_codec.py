@@ -0,0 +1,119 @@
+"""
+Микробенчмарк JSON бэкендов на типичных нагрузках бота.
+
+Запуск:
+    python -m benchmarks.json_codec --repeat 20
+
+Сравнивает сериализацию тела запроса (dumps_bytes) и разбор ответа (loads)
+для всех установленных бэкендов: запись лога, ответ с тарифами, контекст
+Milvus и запрос к v1/ai с контекстом из большого CSV.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+# bot.config требует переменные окружения при импорте
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("CORE_URL", "http://127.0.0.1")
+
+from bot.api.serialization import JsonCodec, get_codec  # noqa: E402
+
+_SENTENCE = "Абонент может подключить услугу через личный кабинет или офис продаж. "
+
+
+def _payloads() -> Dict[str, Any]:
+    log_record = {
+        "user_id": 123456789,
+        "query": "Как подключить интернет в частный дом?",
+        "ai_response": _SENTENCE * 10,
+        "status": 1,
+        "hashes": ["a" * 32, "b" * 32, "c" * 32],
+        "category": "Общий",
+    }
+    tariffs = {
+        "territory_id": "59000001",
+        "tariffs": [
+            {
+                "id": i,
+                "name": f"Домашний интернет {i}",
+                "speed": 100 + i,
+                "price": 450.0 + i,
+                "options": [{"name": f"Опция {j}", "price": j * 10} for j in range(5)],
+                "description": _SENTENCE * 2,
+            }
+            for i in range(150)
+        ],
+    }
+    milvus = {
+        "combined_context": _SENTENCE * 3000,
+        "chat_history": "\n".join(
+            f"user: вопрос {i}\nbot: ответ {i}" for i in range(20)
+        ),
+        "hashs": [f"{i:032x}" for i in range(10)],
+    }
+    csv_rows = "\n".join(
+        f"{i};Пермь;ул. Ленина;{i % 200};{i * 3.5:.2f};{_SENTENCE[:40]}"
+        for i in range(60000)
+    )
+    ai_request = {
+        "text": "Проанализируй таблицу",
+        "combined_context": csv_rows,
+        "chat_history": "",
+        "input_type": "csv",
+        "model": "mistral-large-latest",
+    }
+    return {
+        "log_record": log_record,
+        "tariffs": tariffs,
+        "milvus_context": milvus,
+        "ai_csv_request": ai_request,
+    }
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def _available_codecs() -> List[JsonCodec]:
+    codecs: Dict[str, JsonCodec] = {}
+    for name in ("json", "ujson", "orjson"):
+        codec = get_codec(name)
+        codecs[codec.name] = codec
+    return list(codecs.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    codecs = _available_codecs()
+    print(f"Бэкенды: {', '.join(codec.name for codec in codecs)}")
+
+    for name, payload in _payloads().items():
+        encoded = codecs[0].dumps_bytes(payload)
+        print(f"\n{name} ({len(encoded) / 1024:.0f} KiB)")
+        baseline = None
+        for codec in codecs:
+            data = codec.dumps_bytes(payload)
+            dumps = _measure(lambda: codec.dumps_bytes(payload), args.repeat)
+            loads = _measure(lambda: codec.loads(data), args.repeat)
+            total = dumps + loads
+            baseline = baseline or total
+            print(
+                f"  {codec.name:<7} dumps={dumps * 1000:8.3f}ms "
+                f"loads={loads * 1000:8.3f}ms speedup={baseline / total:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
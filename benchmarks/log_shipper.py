@@ -0,0 +1,95 @@
+"""
+Бенчмарк логирования: отправка по одной записи против пакетной очереди.
+
+Запуск:
+    python -m benchmarks.log_shipper --records 2000 --concurrency 100 --latency 0.05
+
+Поднимает локальный stub Core API и измеряет задержку вызова log() в
+обработчике и общую пропускную способность для обоих режимов.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+# bot.config требует переменные окружения при импорте
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("CORE_URL", "http://127.0.0.1")
+# Сравниваем только сетевые пути, без дисковой очереди
+os.environ.setdefault("LOG_SPOOL_DIR", "")
+
+from benchmarks.stub_core import start_stub  # noqa: E402
+
+
+async def _run_handlers(records: int, concurrency: int) -> List[float]:
+    """Эмуляция обработчиков, каждый из которых вызывает log()"""
+    from bot.api.log import log
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def handler(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await log(
+                user_id=i,
+                query=f"Вопрос пользователя {i}",
+                ai_response="Ответ " * 50,
+                status=1,
+                hashes=["a" * 32, "b" * 32],
+            )
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(handler(i) for i in range(records)))
+    return latencies
+
+
+def _report(name: str, latencies: List[float], elapsed: float, stats) -> None:
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p99 = latencies_ms[int(len(latencies_ms) * 0.99) - 1]
+    print(
+        f"{name:<12} records={stats.records:<6} http_requests={stats.requests:<6} "
+        f"total={elapsed:.2f}s throughput={stats.records / elapsed:.0f} rec/s "
+        f"handler_p50={statistics.median(latencies_ms):.2f}ms handler_p99={p99:.2f}ms"
+    )
+
+
+async def main(records: int, concurrency: int, latency: float) -> None:
+    runner, base_url, stats = await start_stub(latency=latency)
+
+    from bot.api.base import core_client
+    from bot.api.http import http_client
+    from bot.api.log import log_shipper
+
+    core_client.base_url = base_url
+
+    try:
+        # Отправка по одной записи
+        started = time.perf_counter()
+        latencies = await _run_handlers(records, concurrency)
+        _report("per-message", latencies, time.perf_counter() - started, stats)
+
+        stats.requests = stats.records = 0
+
+        # Пакетная отправка через очередь
+        log_shipper.start()
+        started = time.perf_counter()
+        latencies = await _run_handlers(records, concurrency)
+        await log_shipper.stop()
+        _report("batched", latencies, time.perf_counter() - started, stats)
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.records, args.concurrency, args.latency))
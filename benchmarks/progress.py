@@ -0,0 +1,125 @@
+"""
+Бенчмарк индикатора обработки: вызовы Telegram API и задержка начала работы.
+
+Запуск:
+    python -m benchmarks.progress --questions 200 --api-latency 0.15
+
+Сравнивает стикер загрузки, который отправляется и удаляется с ожиданием
+ответа Telegram, и индикаторы ProgressTracker (статус "печатает" и стикер в
+фоне). Длительность обработки вопроса - от 1 до 20 с (генерация ответа LLM),
+первый фрагмент потокового ответа появляется через 0.5-3 с;
+время сжимается в --scale раз.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import List, Tuple
+
+# bot.config требует переменные окружения при импорте
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "benchmark")
+os.environ.setdefault("CORE_URL", "http://127.0.0.1")
+
+from bot.utils.progress import (  # noqa: E402
+    STYLE_STICKER,
+    STYLE_TYPING,
+    ProgressTracker,
+)
+
+
+class _FakeApi:
+    """Telegram API с фиксированной задержкой и счетчиком вызовов"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def call(self) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+
+class _FakeMessage:
+    def __init__(self, api: _FakeApi, chat_id: int):
+        self.api = api
+        self.chat = type("Chat", (), {"id": chat_id})()
+        self.bot = self
+
+    async def send_chat_action(self, chat_id: int, action: str) -> bool:
+        await self.api.call()
+        return True
+
+    async def answer_sticker(self, sticker: str) -> "_FakeMessage":
+        await self.api.call()
+        return self
+
+    async def delete(self) -> bool:
+        await self.api.call()
+        return True
+
+
+async def _simulate(
+    style: str, durations: List[Tuple[float, float]], latency: float, refresh: float
+) -> Tuple[int, float]:
+    api = _FakeApi(latency)
+    tracker = ProgressTracker(style, refresh)
+    delays: List[float] = []
+
+    async def question(chat_id: int, ttft: float, duration: float) -> None:
+        message = _FakeMessage(api, chat_id)
+        started = time.perf_counter()
+        if style == "blocking":
+            sticker = await message.answer_sticker("sticker")
+            delays.append(time.perf_counter() - started)
+            await asyncio.sleep(duration)
+            await sticker.delete()
+        else:
+            progress = tracker.start(message)  # type: ignore[arg-type]
+            delays.append(time.perf_counter() - started)
+            await asyncio.sleep(ttft)
+            # Первый фрагмент ответа отправлен
+            tracker.answer_shown(chat_id)
+            await asyncio.sleep(duration - ttft)
+            await progress.stop()
+
+    await asyncio.gather(
+        *(question(i, ttft, d) for i, (ttft, d) in enumerate(durations))
+    )
+    return api.calls, sum(delays) / len(delays)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--api-latency", type=float, default=0.15)
+    parser.add_argument("--refresh", type=float, default=4.5)
+    parser.add_argument("--scale", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    durations = []
+    for _ in range(args.questions):
+        ttft = rng.uniform(0.5, 3.0)
+        durations.append(
+            (ttft * args.scale, max(ttft, rng.uniform(1.0, 20.0)) * args.scale)
+        )
+    latency = args.api_latency * args.scale
+    refresh = args.refresh * args.scale
+
+    for name, style in (
+        ("стикер (ожидание)", "blocking"),
+        ("стикер в фоне", STYLE_STICKER),
+        ("печатает", STYLE_TYPING),
+    ):
+        calls, delay = await _simulate(style, durations, latency, refresh)
+        print(
+            f"{name:<18} вызовов={calls} на вопрос={calls / args.questions:.2f} "
+            f"задержка начала работы={delay / args.scale * 1000:.1f} мс"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
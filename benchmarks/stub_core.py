@@ -0,0 +1,73 @@
+"""
+Локальный stub Core API для бенчмарков.
+Эмулирует эндпоинты логирования с настраиваемой задержкой ответа.
+
+Запуск отдельно:
+    python -m benchmarks.stub_core --port 8081 --latency 0.05
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+
+from aiohttp import web
+
+
+@dataclass
+class StubStats:
+    """Счетчики запросов к stub серверу"""
+
+    requests: int = 0
+    records: int = 0
+
+
+def create_app(latency: float = 0.05) -> web.Application:
+    """Создание приложения stub сервера"""
+    stats = StubStats()
+
+    async def log_one(request: web.Request) -> web.Response:
+        await request.json()
+        await asyncio.sleep(latency)
+        stats.requests += 1
+        stats.records += 1
+        return web.json_response({"status": "ok"})
+
+    async def log_bulk(request: web.Request) -> web.Response:
+        payload = await request.json()
+        await asyncio.sleep(latency)
+        stats.requests += 1
+        stats.records += len(payload.get("logs", []))
+        return web.json_response({"status": "ok"})
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_post("/v1/log", log_one)
+    app.router.add_post("/v1/log/bulk", log_bulk)
+    return app
+
+
+async def start_stub(
+    host: str = "127.0.0.1", port: int = 0, latency: float = 0.05
+) -> tuple[web.AppRunner, str, StubStats]:
+    """Запуск stub сервера, возвращает runner, базовый URL и счетчики"""
+    app = create_app(latency)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    sockets = site._server.sockets  # type: ignore[union-attr]
+    actual_port = sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{actual_port}", app["stats"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stub Core API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
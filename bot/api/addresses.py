@@ -0,0 +1,146 @@
+"""
+Поиск адресов для inline режима и тарифных запросов.
+Сначала используется локальный индекс адресов, если он загружен. Ответы
+redis_addresses хранятся по нормализованному запросу. Если запрос продолжает
+более короткий, для которого получен полный список адресов, результаты
+фильтруются локально без обращения к Core API.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from bot.config import cache_config
+from bot.utils.address_index import local_address_index, normalize_address
+from bot.utils.cache import TTLCache
+from .base import APIResponse, CoreClient, core_client
+
+logger = logging.getLogger(__name__)
+
+
+def _searchable_text(item: Dict[str, Any]) -> str:
+    return normalize_address(
+        f"{item.get('territory_name') or ''} {item.get('address') or ''}"
+    )
+
+
+def _matches(tokens: List[str], item: Dict[str, Any]) -> bool:
+    """Каждое слово запроса - начало одного из слов адреса ("5" не найдет "15")"""
+    words = _searchable_text(item).split()
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+@dataclass(frozen=True)
+class AddressSearchEntry:
+    """Результат поиска по одному запросу"""
+
+    addresses: List[Dict[str, Any]]
+    # Core API вернул все совпадения, а не первую страницу
+    complete: bool
+
+
+@dataclass
+class AddressCacheStats:
+    """Счетчики кэша поиска адресов"""
+
+    hits: int = 0
+    # Запросы, отфильтрованные по результатам более короткого запроса
+    prefix_hits: int = 0
+    misses: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля запросов, обслуженных без обращения к Core API"""
+        total = self.hits + self.prefix_hits + self.misses
+        return (self.hits + self.prefix_hits) / total if total else 0.0
+
+
+class AddressSearchCache:
+    """Кэш ответов redis_addresses с повторным использованием префиксов"""
+
+    def __init__(self, client: CoreClient, ttl: float, maxsize: int, page_size: int):
+        self._client = client
+        self._cache: TTLCache[str, AddressSearchEntry] = TTLCache(maxsize, ttl)
+        self.page_size = page_size
+        self._stats = AddressCacheStats()
+
+    def _lookup_prefix(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Фильтрация полного списка самого длинного закэшированного префикса"""
+        tokens = key.split()
+        for end in range(len(key) - 1, 0, -1):
+            prefix = key[:end]
+            if prefix not in self._cache:
+                continue
+            entry = self._cache.get(prefix)
+            if entry is None or not entry.complete:
+                # Неполный список не содержит всех совпадений более длинного запроса
+                return None
+            return [item for item in entry.addresses if _matches(tokens, item)]
+        return None
+
+    async def search(self, query: str) -> APIResponse:
+        """Поиск адресов из кэша или через Core API"""
+        key = normalize_address(query)
+        if key in self._cache:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._stats.hits += 1
+                return APIResponse(success=True, data={"addresses": entry.addresses})
+
+        # Пустой результат фильтрации перепроверяем в Core API: его поиск
+        # может находить адреса, не совпадающие с запросом дословно
+        addresses = self._lookup_prefix(key) if key else None
+        if addresses:
+            self._stats.prefix_hits += 1
+            # Подмножество полного списка тоже полное
+            self._cache.set(key, AddressSearchEntry(addresses, complete=True))
+            return APIResponse(success=True, data={"addresses": addresses})
+
+        self._stats.misses += 1
+        response = await self._client.get_addresses_from_redis(query)
+        if response.success and isinstance(response.data, dict):
+            found = response.data.get("addresses")
+            if isinstance(found, list):
+                self._cache.set(
+                    key,
+                    AddressSearchEntry(found, complete=len(found) < self.page_size),
+                )
+        return response
+
+    def invalidate(self) -> None:
+        """Полная очистка кэша"""
+        self._cache.clear()
+
+    @property
+    def stats(self) -> AddressCacheStats:
+        """Снимок счетчиков кэша"""
+        return AddressCacheStats(
+            hits=self._stats.hits,
+            prefix_hits=self._stats.prefix_hits,
+            misses=self._stats.misses,
+            size=len(self._cache),
+        )
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._stats = AddressCacheStats()
+
+
+# Глобальный кэш поиска адресов
+address_search_cache = AddressSearchCache(
+    core_client,
+    ttl=cache_config.address_cache_ttl,
+    maxsize=cache_config.address_cache_maxsize,
+    page_size=cache_config.address_search_page_size,
+)
+
+
+async def search_addresses(query: str, limit: int = 50) -> APIResponse:
+    """Поиск адресов в локальном индексе, иначе через кэш redis_addresses"""
+    hits = local_address_index.search(query, limit=limit)
+    if hits:
+        return APIResponse(
+            success=True, data={"addresses": [hit.as_dict() for hit in hits]}
+        )
+    return await address_search_cache.search(query)
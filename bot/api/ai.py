@@ -4,9 +4,11 @@
 """
 
 import logging
-from typing import Optional, Literal
+from typing import AsyncGenerator, Optional, Literal
 
+from bot.config import query_pipeline_config
 from .base import core_client
+from .streaming import StreamError
 
 logger = logging.getLogger(__name__)
 
@@ -50,3 +52,45 @@ async def call_ai(
     except Exception as e:
         logger.exception(f"Unexpected error in call_ai: {e}")
         return None
+
+
+async def call_ai_stream(
+    text: str,
+    combined_context: str,
+    chat_history: Optional[str] = "",
+    input_type: Literal["voice", "csv", "text"] = "text",
+    model: str = "mistral",
+) -> AsyncGenerator[str, None]:
+    """
+    Потоковый вызов AI API: фрагменты ответа по мере генерации
+
+    Если бэкенд не поддерживает потоковую передачу, ответ запрашивается
+    целиком через call_ai и выдается одним фрагментом. Остальные ошибки, в
+    том числе обрыв уже начатого потока, передаются вызывающему коду: повтор
+    недоступного бэкенда только удвоил бы ожидание, а неполный ответ не
+    должен считаться успешным.
+    """
+    if query_pipeline_config.stream_responses:
+        received = False
+        try:
+            async for chunk in core_client.call_ai_stream(
+                text=text,
+                combined_context=combined_context,
+                chat_history=chat_history or "",
+                input_type=input_type,
+                model=model,
+            ):
+                received = True
+                yield chunk
+            if received:
+                return
+
+        except StreamError as e:
+            if received or not e.unsupported:
+                logger.error(f"Потоковый ответ AI прерван: {e}")
+                raise
+            logger.warning(f"Потоковый ответ AI недоступен, запрос целиком: {e}")
+
+    ai_response = await call_ai(text, combined_context, chat_history, input_type, model)
+    if ai_response:
+        yield ai_response
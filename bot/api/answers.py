@@ -0,0 +1,120 @@
+"""
+Кэш ответов на общие вопросы по базе знаний.
+Ключ - нормализованный вопрос, хэши найденного в Milvus контекста и модель,
+поэтому вопрос в другой формулировке с тем же контекстом получает готовый
+ответ без генерации. Кэш очищается при изменении базы знаний.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Hashable, Iterable, Optional, Tuple
+
+from bot.config import cache_config
+from bot.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[\wЁё]+")
+
+AnswerKey = Tuple[Hashable, ...]
+
+
+def normalize_question(question: str) -> str:
+    """Нижний регистр, ё -> е, без знаков препинания и лишних пробелов"""
+    return " ".join(_WORD_RE.findall(question.lower().replace("ё", "е")))
+
+
+@dataclass
+class AnswerCacheStats:
+    """Счетчики кэша ответов"""
+
+    hits: int = 0
+    misses: int = 0
+    # Вопросы, не подходящие для кэша (слишком короткие)
+    skipped: int = 0
+    # Суммарное время генерации ответов, выданных из кэша, в секундах
+    saved_time: float = 0.0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля вопросов, на которые ответ выдан из кэша"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class AnswerCache:
+    """Ответы модели с ограничением времени жизни и размера"""
+
+    def __init__(self, enabled: bool, ttl: float, maxsize: int, min_words: int):
+        self.enabled = enabled
+        self.min_words = min_words
+        # Ответ и время его генерации
+        self._cache: TTLCache[AnswerKey, Tuple[str, float]] = TTLCache(maxsize, ttl)
+        self._stats = AnswerCacheStats()
+
+    def key(
+        self, question: str, hashes: Iterable[str], model: str
+    ) -> Optional[AnswerKey]:
+        """Ключ ответа или None, если вопрос не кэшируется"""
+        if not self.enabled:
+            return None
+
+        normalized = normalize_question(question)
+        if len(normalized.split()) < self.min_words:
+            self._stats.skipped += 1
+            return None
+        return (normalized, tuple(sorted(map(str, hashes))), model)
+
+    def get(self, key: Optional[AnswerKey]) -> Optional[str]:
+        """Ответ из кэша или None"""
+        if key is None:
+            return None
+
+        entry = self._cache.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+
+        answer, generation_time = entry
+        self._stats.hits += 1
+        self._stats.saved_time += generation_time
+        return answer
+
+    def put(
+        self, key: Optional[AnswerKey], answer: str, generation_time: float
+    ) -> None:
+        """Сохранение ответа вместе со временем его генерации"""
+        if key is not None and answer:
+            self._cache.set(key, (answer, generation_time))
+
+    def invalidate(self) -> None:
+        """Очистка кэша после изменения базы знаний"""
+        size = len(self._cache)
+        self._cache.clear()
+        logger.info(f"Кэш ответов очищен после изменения базы знаний: {size} записей")
+
+    @property
+    def stats(self) -> AnswerCacheStats:
+        """Снимок счетчиков кэша"""
+        return AnswerCacheStats(
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            skipped=self._stats.skipped,
+            saved_time=self._stats.saved_time,
+            size=len(self._cache),
+        )
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._stats = AnswerCacheStats()
+
+
+# Глобальный кэш ответов
+answer_cache = AnswerCache(
+    enabled=cache_config.answer_cache_enabled,
+    ttl=cache_config.answer_cache_ttl,
+    maxsize=cache_config.answer_cache_maxsize,
+    min_words=cache_config.answer_cache_min_words,
+)
@@ -3,14 +3,118 @@
 Обеспечивает регистрацию пользователей и получение информации об администраторах.
 """
 
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 import logging
 from aiogram.types import Message
 
+from bot.config import cache_config
+from bot.utils.cache import TTLCache
 from .base import core_client
 
 logger = logging.getLogger(__name__)
 
+# Профиль пользователя: (имя, фамилия, username)
+UserProfile = Tuple[str, str, str]
+
+
+@dataclass
+class UserCacheStats:
+    """Счетчики кэша проверенных пользователей"""
+
+    positive_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    positive_size: int = 0
+    negative_size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля проверок, обслуженных без обращения к Core API"""
+        total = self.positive_hits + self.negative_hits + self.misses
+        return (self.positive_hits + self.negative_hits) / total if total else 0.0
+
+
+class UserRegistrationCache:
+    """
+    Кэш результатов регистрации пользователей в Core API
+
+    Успешные проверки и отказы (403) хранятся раздельно со своим временем
+    жизни. Ошибки сервера не кэшируются. Положительная запись считается
+    промахом, если профиль пользователя в Telegram изменился, чтобы Core API
+    получил актуальные имя и username.
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float, maxsize: int):
+        self._positive: TTLCache[int, UserProfile] = TTLCache(maxsize, ttl)
+        self._negative: TTLCache[int, bool] = TTLCache(maxsize, negative_ttl)
+        self._stats = UserCacheStats()
+
+    def lookup(self, user_id: int, profile: UserProfile) -> Optional[bool]:
+        """
+        Поиск результата проверки пользователя
+
+        Returns:
+            True/False для закэшированного результата, None при промахе
+        """
+        cached_profile = self._positive.get(user_id)
+        if cached_profile is not None and cached_profile == profile:
+            self._stats.positive_hits += 1
+            return True
+
+        if self._negative.get(user_id) is not None:
+            self._stats.negative_hits += 1
+            return False
+
+        self._stats.misses += 1
+        return None
+
+    def remember(self, user_id: int, profile: UserProfile, allowed: bool) -> None:
+        """Сохранение результата проверки пользователя"""
+        if allowed:
+            self._negative.pop(user_id)
+            self._positive.set(user_id, profile)
+        else:
+            self._positive.pop(user_id)
+            self._negative.set(user_id, True)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Сброс записи пользователя или всего кэша, если user_id не указан"""
+        if user_id is None:
+            self._positive.clear()
+            self._negative.clear()
+        else:
+            self._positive.pop(user_id)
+            self._negative.pop(user_id)
+
+    @property
+    def stats(self) -> UserCacheStats:
+        """Снимок счетчиков кэша"""
+        return UserCacheStats(
+            positive_hits=self._stats.positive_hits,
+            negative_hits=self._stats.negative_hits,
+            misses=self._stats.misses,
+            positive_size=len(self._positive),
+            negative_size=len(self._negative),
+        )
+
+
+# Глобальный кэш проверенных пользователей
+user_cache = UserRegistrationCache(
+    ttl=cache_config.user_cache_ttl,
+    negative_ttl=cache_config.user_cache_negative_ttl,
+    maxsize=cache_config.user_cache_maxsize,
+)
+
+
+async def _answer_access_denied(message: Optional[Message]) -> None:
+    """Сообщение о необходимости регистрации в чате «Поговорить»"""
+    if message:
+        await message.answer(
+            "⚠️ Для использования бота сотрудникам компании нужно зарегистрироваться в чате «Поговорить».",
+            parse_mode="HTML",
+        )
+
 
 async def check_and_register_user(
     user_id: int,
@@ -32,6 +136,14 @@ async def check_and_register_user(
     Returns:
         True в случае успешной регистрации/проверки, False иначе
     """
+    profile: UserProfile = (first_name or "", last_name or "", username or "")
+    cached = user_cache.lookup(user_id, profile)
+    if cached is True:
+        return True
+    if cached is False:
+        await _answer_access_denied(message)
+        return False
+
     try:
         response = await core_client.register_user(
             user_id=user_id,
@@ -42,13 +154,11 @@ async def check_and_register_user(
 
         if response.success:
             logger.info(f"User {user_id} checked/added successfully.")
+            user_cache.remember(user_id, profile, allowed=True)
             return True
         elif response.status_code == 403:
-            if message:
-                await message.answer(
-                    "⚠️ Для использования бота сотрудникам компании нужно зарегистрироваться в чате «Поговорить».",
-                    parse_mode="HTML",
-                )
+            user_cache.remember(user_id, profile, allowed=False)
+            await _answer_access_denied(message)
             return False
         else:
             logger.error(f"Auth error: {response.error}")
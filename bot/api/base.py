@@ -4,14 +4,32 @@
 """
 
 import asyncio
+import copy
+import time
 from unittest.mock import Base
 import aiohttp
 import logging
 from abc import ABC
-from typing import List, Literal, Optional, Dict, Any
-from dataclasses import dataclass
-
-from bot.config import bot_config
+from typing import AsyncIterator, List, Literal, Optional, Dict, Any, Tuple
+from dataclasses import dataclass, replace
+
+from bot.config import (
+    bot_config,
+    hedging_config,
+    http_client_config,
+    retry_config,
+    timeout_config,
+)
+from . import deadline
+from .circuit_breaker import circuit_breakers
+from .coalescing import RequestCoalescer, request_key
+from .compression import request_compressor
+from .hedging import HedgePolicy
+from .http import http_client
+from .latency import latency_tracker
+from .retry import RETRYABLE_STATUSES, RetryPolicy
+from .serialization import json_codec
+from .streaming import StreamError, iter_text
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +42,26 @@ class APIResponse:
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     status_code: Optional[int] = None
+    # Запрос прерван по таймауту
+    timed_out: bool = False
+    # Временная ошибка, повтор может быть успешным
+    transient: bool = False
+
+
+def is_backend_failure(response: APIResponse) -> bool:
+    """
+    Ошибка на стороне бэкенда: таймаут, ошибка соединения или 5xx
+
+    Ответы 4xx означают, что сервис работает, и выключатель не размыкают.
+    """
+    if response.success:
+        return False
+    return response.status_code is None or response.status_code >= 500
+
+
+def copy_response(response: APIResponse) -> APIResponse:
+    """Ответ с собственной копией данных (для общего ответа нескольким)"""
+    return replace(response, data=copy.deepcopy(response.data))
 
 
 class BaseAPIClient(ABC):
@@ -31,19 +69,34 @@ class BaseAPIClient(ABC):
 
     def __init__(self, base_url: str, timeout: int = 100):
         self.base_url = base_url.rstrip("/")
+        # Таймаут для эндпоинтов без собственного бюджета
         self.timeout = aiohttp.ClientTimeout(total=timeout)
-        self._session: Optional[aiohttp.ClientSession] = None
+        self.endpoint_timeouts: Dict[str, aiohttp.ClientTimeout] = {}
+        for endpoint, budget in timeout_config.endpoint_timeouts.items():
+            connect, sock_read, total = budget
+            self.endpoint_timeouts[endpoint] = aiohttp.ClientTimeout(
+                connect=connect, sock_read=sock_read, total=total
+            )
+        self.retry_policy = RetryPolicy(retry_config)
+        self.hedge_policy = HedgePolicy(hedging_config, latency_tracker)
+        self.coalescer: RequestCoalescer[APIResponse] = RequestCoalescer(
+            copy_result=copy_response
+        )
 
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Получение или создание сессии"""
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(timeout=self.timeout)
-        return self._session
+        """Получение общей сессии из пула соединений"""
+        return await http_client.get_session()
+
+    def _timeout_for(self, endpoint: str) -> aiohttp.ClientTimeout:
+        """Бюджет эндпоинта, урезанный до оставшегося времени запроса"""
+        timeout = self.endpoint_timeouts.get(endpoint.strip("/"), self.timeout)
+        return deadline.bounded_timeout(timeout)
 
     async def close(self) -> None:
-        """Закрытие сессии"""
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """
+        Сессия общая для всех клиентов и закрывается в http_client.close(),
+        поэтому клиент ничего не закрывает
+        """
 
     async def __aenter__(self):
         return self
@@ -58,6 +111,8 @@ class BaseAPIClient(ABC):
         params: Optional[Dict[str, Any]] = None,
         json_data: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+        hedge: bool = False,
     ) -> APIResponse:
         """
         Выполнение HTTP запроса с обработкой ошибок
@@ -68,12 +123,247 @@ class BaseAPIClient(ABC):
             params: URL параметры
             json_data: JSON данные для тела запроса
             headers: HTTP заголовки
+            idempotent: POST запрос можно безопасно повторить
+            hedge: Отправить дубль, если ответ задерживается (только GET)
 
         Returns:
             APIResponse с результатом запроса
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        args = (method, endpoint, url, params, json_data, headers, idempotent, hedge)
+
+        # Одинаковые одновременные GET запросы получают общий ответ
+        if method == "GET" and http_client_config.coalesce_requests:
+            key = request_key(method, url, params, headers)
+            try:
+                return await self.coalescer.run(
+                    key, lambda: self._send_with_retries(*args)
+                )
+            except asyncio.TimeoutError:
+                error_msg = f"Deadline exceeded while waiting for {url}"
+                logger.warning(error_msg)
+                return APIResponse(success=False, error=error_msg, timed_out=True)
+        return await self._send_with_retries(*args)
+
+    async def _send_with_retries(
+        self,
+        method: str,
+        endpoint: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        json_data: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        idempotent: bool,
+        hedge: bool,
+    ) -> APIResponse:
+        """Запрос с повторами временных ошибок и дублем при задержке"""
+        max_attempts = self.retry_policy.max_attempts(method, idempotent)
+        stats = self.retry_policy.stats
+        stats.requests += 1
+        self.retry_policy.budget.deposit()
+
+        hedge = hedge and self.hedge_policy.config.enabled and method == "GET"
+        if hedge:
+            self.hedge_policy.stats.requests += 1
+            self.hedge_policy.budget.deposit()
+
+        json_body = None if json_data is None else json_codec.dumps_bytes(json_data)
+        body, request_headers = await self._encode_body(json_body, headers)
+        renegotiated = False
+
+        attempt = 0
+        while True:
+            if hedge:
+                response = await self._hedged_attempt(
+                    method, endpoint, url, params, body, request_headers
+                )
+            else:
+                response = await self._attempt(
+                    method, endpoint, url, params, body, request_headers
+                )
+
+            # Сервер не принял сжатое тело: повторяем с согласованной кодировкой
+            if (
+                response.status_code == 415
+                and "Content-Encoding" in request_headers
+                and not renegotiated
+            ):
+                renegotiated = True
+                body, request_headers = await self._encode_body(json_body, headers)
+                continue
+
+            if response.success and attempt:
+                stats.recovered += 1
+            if not response.transient or attempt + 1 >= max_attempts:
+                return response
+
+            # Повтор не должен выйти за дедлайн запроса пользователя
+            delay = self.retry_policy.backoff(attempt)
+            left = deadline.remaining()
+            if left is not None and delay >= left:
+                return response
+
+            if not self.retry_policy.budget.try_withdraw():
+                stats.budget_exhausted += 1
+                logger.warning(f"Бюджет повторов исчерпан, запрос не повторен: {url}")
+                return response
+
+            attempt += 1
+            stats.retries += 1
+            logger.info(
+                f"Повтор {attempt}/{max_attempts - 1} запроса {method} {url} "
+                f"через {delay * 1000:.0f} мс: {response.error}"
+            )
+            await asyncio.sleep(delay)
+
+    async def _encode_body(
+        self, body: Optional[bytes], headers: Optional[Dict[str, str]]
+    ) -> Tuple[Optional[bytes], Dict[str, str]]:
+        """Заголовки и тело запроса, сжатое при большом размере"""
+        request_headers = dict(headers or {})
+        if body is None:
+            return None, request_headers
+
+        request_headers.setdefault("Content-Type", "application/json")
+        body, encoding = await request_compressor.compress(self.base_url, body)
+        if encoding:
+            request_headers["Content-Encoding"] = encoding
+        return body, request_headers
+
+    async def _hedged_attempt(
+        self,
+        method: str,
+        endpoint: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        body: Optional[bytes],
+        headers: Dict[str, str],
+    ) -> APIResponse:
+        """
+        Попытка с дублем: если ответа нет дольше задержки по p95 эндпоинта,
+        отправляется второй запрос и берется первый успешный ответ
+        """
+        policy = self.hedge_policy
+        name = latency_tracker.key(self.base_url, endpoint)
+        delay = policy.delay(name)
+        args = (method, endpoint, url, params, body, headers)
+
+        primary = asyncio.create_task(self._attempt(*args))
+        pending = {primary}
+        started = {primary: time.perf_counter()}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            if not policy.budget.try_withdraw():
+                policy.stats.budget_exhausted += 1
+                return await primary
+
+            policy.stats.hedged += 1
+            logger.debug(
+                f"Ответ задерживается дольше {delay * 1000:.0f} мс, дубль: {url}"
+            )
+            hedge = asyncio.create_task(self._attempt(*args))
+            started[hedge] = time.perf_counter()
+            pending = {primary, hedge}
+
+            response: Optional[APIResponse] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    response = task.result()
+                    if response.success:
+                        if task is hedge:
+                            policy.stats.hedge_wins += 1
+                        return response
+
+            # Обе попытки неуспешны: возвращаем последний ответ
+            assert response is not None
+            return response
+
+        finally:
+            now = time.perf_counter()
+            for task in pending:
+                if task.done():
+                    continue
+                task.cancel()
+                if len(started) > 1:
+                    # Проигравшая попытка ответила бы не раньше: без этого
+                    # замера медленные ответы выпадают из окна и p95 занижен
+                    latency_tracker.record(name, now - started[task])
+
+    async def _attempt(
+        self,
+        method: str,
+        endpoint: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        body: Optional[bytes],
+        headers: Dict[str, str],
+    ) -> APIResponse:
+        """Одна попытка с учетом дедлайна и выключателя"""
+        # Время на ответ пользователю истекло: запрос уже не нужен
+        if deadline.expired():
+            error_msg = f"Deadline exceeded before requesting {url}"
+            logger.warning(error_msg)
+            return APIResponse(success=False, error=error_msg, timed_out=True)
+
+        timeout = self._timeout_for(endpoint)
+
+        # Бэкенд недоступен: отвечаем сразу, не дожидаясь таймаута
+        breaker = circuit_breakers.get(self.base_url, endpoint)
+        permit = breaker.allow_request() if breaker else None
+        if breaker and permit is None:
+            error_msg = f"Service temporarily unavailable: {url}"
+            logger.debug(f"Circuit open, запрос отклонен: {url}")
+            return APIResponse(success=False, error=error_msg)
 
+        started = time.perf_counter()
+        try:
+            response = await self._request_once(
+                method,
+                url,
+                params=params,
+                body=body,
+                headers=headers,
+                timeout=timeout,
+            )
+        except BaseException:
+            # Запрос отменен: результат неизвестен
+            if permit:
+                permit.release()
+            raise
+
+        # Задержка учитывается только для полученных ответов
+        if response.status_code is not None:
+            latency_tracker.record(
+                latency_tracker.key(self.base_url, endpoint),
+                time.perf_counter() - started,
+            )
+
+        if permit:
+            if response.timed_out and deadline.expired():
+                # Таймаут из-за исчерпанного дедлайна, а не медленного бэкенда
+                permit.release()
+            elif is_backend_failure(response):
+                permit.record_failure()
+            else:
+                permit.record_success()
+        return response
+
+    async def _request_once(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+    ) -> APIResponse:
+        """Одна попытка HTTP запроса без учета выключателя"""
         try:
             session = await self._get_session()
 
@@ -81,15 +371,22 @@ class BaseAPIClient(ABC):
                 method=method,
                 url=url,
                 params=params,
-                json=json_data,
+                data=body,
                 headers=headers or {},
+                timeout=timeout or self.timeout,
             ) as response:
                 status_code = response.status
 
+                # Сервер не поддерживает кодировку тела запроса
+                if status_code == 415 and headers and "Content-Encoding" in headers:
+                    request_compressor.reject(
+                        self.base_url, response.headers.get("Accept-Encoding")
+                    )
+
                 # Успешный ответ
                 if 200 <= status_code < 300:
                     try:
-                        data = await response.json()
+                        data = await response.json(loads=json_codec.loads)
                         return APIResponse(
                             success=True, data=data, status_code=status_code
                         )
@@ -105,7 +402,7 @@ class BaseAPIClient(ABC):
                 # Ошибка клиента или сервера
                 else:
                     try:
-                        error_data = await response.json()
+                        error_data = await response.json(loads=json_codec.loads)
                         error_msg = error_data.get("error", f"HTTP {response.text}")
                     except aiohttp.ContentTypeError:
                         error_msg = await response.text()
@@ -120,18 +417,23 @@ class BaseAPIClient(ABC):
                         logger.error(f"API error {status_code}: {error_msg}")
 
                     return APIResponse(
-                        success=False, error=error_msg, status_code=status_code
+                        success=False,
+                        error=error_msg,
+                        status_code=status_code,
+                        transient=status_code in RETRYABLE_STATUSES,
                     )
 
         except asyncio.TimeoutError:
             error_msg = f"Timeout while requesting {url}"
             logger.error(error_msg)
-            return APIResponse(success=False, error=error_msg)
+            return APIResponse(
+                success=False, error=error_msg, timed_out=True, transient=True
+            )
 
         except aiohttp.ClientError as e:
             error_msg = f"Connection error: {str(e)}"
             logger.error(error_msg)
-            return APIResponse(success=False, error=error_msg)
+            return APIResponse(success=False, error=error_msg, transient=True)
 
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
@@ -143,9 +445,12 @@ class BaseAPIClient(ABC):
         endpoint: str,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
+        hedge: bool = False,
     ) -> APIResponse:
-        """GET запрос"""
-        return await self._make_request("GET", endpoint, params=params, headers=headers)
+        """GET запрос (с дублем при задержке ответа, если hedge=True)"""
+        return await self._make_request(
+            "GET", endpoint, params=params, headers=headers, hedge=hedge
+        )
 
     async def post(
         self,
@@ -153,12 +458,86 @@ class BaseAPIClient(ABC):
         json_data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
     ) -> APIResponse:
-        """POST запрос"""
+        """POST запрос (повторяется только при idempotent=True)"""
         return await self._make_request(
-            "POST", endpoint, params=params, json_data=json_data, headers=headers
+            "POST",
+            endpoint,
+            params=params,
+            json_data=json_data,
+            headers=headers,
+            idempotent=idempotent,
         )
 
+    async def stream(
+        self,
+        endpoint: str,
+        json_data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        POST запрос с потоковым ответом: фрагменты текста по мере генерации
+
+        Запрос не повторяется, так как часть ответа уже могла быть показана
+        пользователю. Ошибки до и во время передачи - StreamError.
+        """
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        if deadline.expired():
+            raise StreamError(f"Deadline exceeded before requesting {url}")
+
+        breaker = circuit_breakers.get(self.base_url, endpoint)
+        permit = breaker.allow_request() if breaker else None
+        if breaker and permit is None:
+            raise StreamError(f"Service temporarily unavailable: {url}")
+
+        json_body = None if json_data is None else json_codec.dumps_bytes(json_data)
+        body, request_headers = await self._encode_body(json_body, headers)
+        request_headers.setdefault("Accept", "text/event-stream")
+
+        # True - бэкенд ответил, False - сбой бэкенда, None - поток прерван
+        healthy: Optional[bool] = None
+        try:
+            session = await self._get_session()
+            async with session.post(
+                url,
+                data=body,
+                headers=request_headers,
+                timeout=self._timeout_for(endpoint),
+            ) as response:
+                status_code = response.status
+                if status_code >= 300:
+                    healthy = status_code < 500
+                    if status_code == 415 and "Content-Encoding" in request_headers:
+                        request_compressor.reject(
+                            self.base_url, response.headers.get("Accept-Encoding")
+                        )
+                    error_msg = await response.text()
+                    raise StreamError(
+                        f"API error {status_code}: {error_msg}", status_code
+                    )
+
+                async for chunk in iter_text(response):
+                    yield chunk
+                healthy = True
+
+        except asyncio.TimeoutError as e:
+            healthy = False
+            raise StreamError(f"Timeout while streaming {url}") from e
+
+        except aiohttp.ClientError as e:
+            healthy = False
+            raise StreamError(f"Connection error: {str(e)}") from e
+
+        finally:
+            if permit:
+                if healthy is None:
+                    permit.release()
+                elif healthy:
+                    permit.record_success()
+                else:
+                    permit.record_failure()
+
 
 class UtilsAPIClient(BaseAPIClient):
     """Клиент для работы с Utils API"""
@@ -203,6 +582,27 @@ class CoreClient(BaseAPIClient):
             },
         )
 
+    def call_ai_stream(
+        self,
+        text: str,
+        combined_context: str,
+        chat_history: str = "",
+        input_type: str = "text",
+        model: str = "mistral-large-latest",
+    ) -> AsyncIterator[str]:
+        """Вызов AI API с потоковой передачей ответа"""
+        return self.stream(
+            "v1/ai",
+            json_data={
+                "text": text,
+                "combined_context": combined_context,
+                "chat_history": chat_history,
+                "input_type": input_type,
+                "model": model,
+                "stream": True,
+            },
+        )
+
     async def log_message(
         self,
         user_id: int,
@@ -225,10 +625,15 @@ class CoreClient(BaseAPIClient):
             },
         )
 
+    async def log_messages_bulk(self, records: List[Dict[str, Any]]) -> APIResponse:
+        """Пакетное логирование сообщений"""
+        return await self.post("v1/log/bulk", json_data={"logs": records})
+
     async def register_user(
         self, user_id: int, firstname: str, lastname: str, username: str
     ) -> APIResponse:
         """Регистрация пользователя"""
+        # Повторная регистрация того же пользователя безопасна
         return await self.post(
             "v1/auth",
             json_data={
@@ -237,6 +642,7 @@ class CoreClient(BaseAPIClient):
                 "lastname": lastname or "",
                 "username": username or "",
             },
+            idempotent=True,
         )
 
     async def get_admins(self) -> APIResponse:
@@ -246,7 +652,7 @@ class CoreClient(BaseAPIClient):
     async def get_addresses_from_redis(self, query_address: str) -> APIResponse:
         """Получение списка адресов"""
         return await self.get(
-            "redis_addresses", params={"query_address": query_address}
+            "redis_addresses", params={"query_address": query_address}, hedge=True
         )
 
     async def get_address_by_id(self, address_id: str) -> APIResponse:
@@ -255,7 +661,9 @@ class CoreClient(BaseAPIClient):
 
     async def get_tariffs_from_redis(self, territory_id: str) -> APIResponse:
         """Получение тарифов для определенного territory_id"""
-        return await self.get("redis_tariffs", params={"territory_id": territory_id})
+        return await self.get(
+            "redis_tariffs", params={"territory_id": territory_id}, hedge=True
+        )
 
 
 # Глобальный экземпляр клиента
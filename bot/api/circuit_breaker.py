@@ -0,0 +1,249 @@
+"""
+Автоматические выключатели (circuit breaker) для внешних сервисов.
+Если бэкенд перестал отвечать, запросы к нему сразу завершаются ошибкой,
+а не ждут таймаута, пока сервис не восстановится.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bot.config import CircuitBreakerConfig, circuit_breaker_config
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Состояние выключателя"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class CircuitBreakerSnapshot:
+    """Состояние выключателя для мониторинга"""
+
+    name: str
+    state: CircuitState
+    consecutive_failures: int
+    total_failures: int
+    rejected: int
+    times_opened: int
+    # Секунд до пробного запроса (для открытого выключателя)
+    retry_in: float
+
+
+class CircuitPermit:
+    """
+    Разрешение на один запрос, выданное выключателем
+
+    Результат запроса сообщается через разрешение: выключатель учитывает,
+    был ли запрос пробным и не начат ли он до последнего открытия.
+    Повторное сообщение результата ничего не делает.
+    """
+
+    def __init__(self, breaker: "CircuitBreaker", probe: bool, epoch: int):
+        self.breaker = breaker
+        # Пробный запрос в состоянии half_open
+        self.probe = probe
+        # Число открытий выключателя на момент выдачи разрешения
+        self.epoch = epoch
+        self._settled = False
+
+    def record_success(self) -> None:
+        """Запрос выполнен, бэкенд отвечает"""
+        if not self._settled:
+            self._settled = True
+            self.breaker._on_success(self)
+
+    def record_failure(self) -> None:
+        """Бэкенд не ответил или вернул ошибку сервера"""
+        if not self._settled:
+            self._settled = True
+            self.breaker._on_failure(self)
+
+    def release(self) -> None:
+        """Запрос отменен до получения результата"""
+        if not self._settled:
+            self._settled = True
+            self.breaker._release_probe(self)
+
+
+class CircuitBreaker:
+    """
+    Выключатель для одного эндпоинта
+
+    closed: запросы проходят, последовательные ошибки считаются.
+    open: после failure_threshold ошибок подряд запросы отклоняются сразу.
+    half_open: через recovery_timeout пропускается half_open_max_calls
+    пробных запросов; успех пробного запроса закрывает выключатель, ошибка
+    снова открывает. Результаты запросов, начатых до открытия, состояние
+    не меняют.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+        self._total_failures = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Текущее состояние с учетом истекшего recovery_timeout"""
+        if (
+            self._state == CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.recovery_timeout
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def allow_request(self) -> Optional[CircuitPermit]:
+        """
+        Разрешение на запрос
+
+        Returns:
+            Разрешение, через которое сообщается результат запроса,
+            или None, если запрос нужно отклонить
+        """
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return CircuitPermit(self, probe=False, epoch=self._times_opened)
+        if (
+            state == CircuitState.HALF_OPEN
+            and self._probes_in_flight < self.half_open_max_calls
+        ):
+            self._probes_in_flight += 1
+            return CircuitPermit(self, probe=True, epoch=self._times_opened)
+
+        self._rejected += 1
+        return None
+
+    def snapshot(self) -> CircuitBreakerSnapshot:
+        """Снимок состояния для мониторинга"""
+        state = self.state
+        retry_in = 0.0
+        if state == CircuitState.OPEN:
+            retry_in = max(
+                0.0, self.recovery_timeout - (self._clock() - self._opened_at)
+            )
+        return CircuitBreakerSnapshot(
+            name=self.name,
+            state=state,
+            consecutive_failures=self._consecutive_failures,
+            total_failures=self._total_failures,
+            rejected=self._rejected,
+            times_opened=self._times_opened,
+            retry_in=retry_in,
+        )
+
+    def _on_success(self, permit: CircuitPermit) -> None:
+        self._release_probe(permit)
+        if permit.epoch != self._times_opened:
+            # Запрос начат до открытия выключателя
+            return
+        self._consecutive_failures = 0
+        if permit.probe and self._state != CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+
+    def _on_failure(self, permit: CircuitPermit) -> None:
+        self._release_probe(permit)
+        self._total_failures += 1
+        if permit.epoch != self._times_opened:
+            return
+        self._consecutive_failures += 1
+        if (permit.probe and self._state == CircuitState.HALF_OPEN) or (
+            self._state == CircuitState.CLOSED
+            and self._consecutive_failures >= self.failure_threshold
+        ):
+            self._opened_at = self._clock()
+            self._times_opened += 1
+            self._transition(CircuitState.OPEN)
+
+    def _release_probe(self, permit: CircuitPermit) -> None:
+        # Счетчик обнуляется при каждом переходе в half_open, поэтому
+        # освобождаются только пробы текущего периода
+        if (
+            permit.probe
+            and permit.epoch == self._times_opened
+            and self._state == CircuitState.HALF_OPEN
+            and self._probes_in_flight
+        ):
+            self._probes_in_flight -= 1
+
+    def _transition(self, state: CircuitState) -> None:
+        previous, self._state = self._state, state
+        if state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = 0
+
+        if state == CircuitState.OPEN:
+            logger.warning(
+                f"Circuit breaker {self.name}: {previous.value} -> open "
+                f"после {self._consecutive_failures} ошибок подряд, "
+                f"пробный запрос через {self.recovery_timeout:.0f} с"
+            )
+        else:
+            logger.info(
+                f"Circuit breaker {self.name}: {previous.value} -> {state.value}"
+            )
+
+
+class CircuitBreakerRegistry:
+    """Выключатели по паре (базовый URL, эндпоинт)"""
+
+    def __init__(self, config: CircuitBreakerConfig):
+        self.config = config
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, base_url: str, endpoint: str) -> Optional[CircuitBreaker]:
+        """Выключатель для эндпоинта или None, если выключатели отключены"""
+        if not self.config.enabled:
+            return None
+
+        key = (base_url.rstrip("/"), endpoint.strip("/"))
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name=f"{key[0]}/{key[1]}",
+                failure_threshold=self.config.failure_threshold,
+                recovery_timeout=self.config.recovery_timeout,
+                half_open_max_calls=self.config.half_open_max_calls,
+            )
+            self._breakers[key] = breaker
+        return breaker
+
+    def snapshot(self) -> List[CircuitBreakerSnapshot]:
+        """Состояние всех выключателей"""
+        return [breaker.snapshot() for breaker in self._breakers.values()]
+
+    def open_circuits(self) -> List[str]:
+        """Имена эндпоинтов, запросы к которым сейчас отклоняются"""
+        return [
+            snapshot.name
+            for snapshot in self.snapshot()
+            if snapshot.state == CircuitState.OPEN
+        ]
+
+
+# Глобальный реестр выключателей
+circuit_breakers = CircuitBreakerRegistry(circuit_breaker_config)
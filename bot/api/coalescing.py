@@ -0,0 +1,126 @@
+"""
+Объединение одинаковых одновременных запросов к API (single-flight).
+Пока запрос выполняется, такие же запросы других обработчиков не
+отправляются, а ждут его и получают тот же ответ.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Generic,
+    Hashable,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from . import deadline
+
+T = TypeVar("T")
+
+
+@dataclass
+class CoalescingStats:
+    """Счетчики объединения запросов клиента"""
+
+    requests: int = 0
+    # Запросы, получившие ответ уже выполняющегося запроса
+    coalesced: int = 0
+    # Общие запросы, отмененные после ухода всех ожидающих
+    cancelled: int = 0
+
+    @property
+    def saved_rate(self) -> float:
+        """Доля запросов, не отправленных в API"""
+        return self.coalesced / self.requests if self.requests else 0.0
+
+
+def request_key(
+    method: str,
+    url: str,
+    params: Optional[Mapping[str, Any]],
+    headers: Optional[Mapping[str, str]],
+) -> Tuple[Hashable, ...]:
+    """Ключ запроса: метод, URL и параметры без учета порядка"""
+    return (
+        method,
+        url,
+        tuple(sorted((name, str(value)) for name, value in (params or {}).items())),
+        tuple(sorted((headers or {}).items())),
+    )
+
+
+class _InFlight(Generic[T]):
+    """Выполняющийся общий запрос и число ожидающих его"""
+
+    def __init__(self, task: "asyncio.Task[T]"):
+        self.task = task
+        self.waiters = 0
+        # Ответ получат несколько вызывающих: каждому нужна своя копия
+        self.shared = False
+
+
+class RequestCoalescer(Generic[T]):
+    """
+    Выполнение не более одного запроса с одинаковым ключом
+
+    Запрос выполняется в отдельной задаче без дедлайна вызывающего: каждый
+    ожидающий ограничивает ожидание своим дедлайном, поэтому запрос живет до
+    дедлайна самого терпеливого из них. Когда уходит последний ожидающий
+    (отмена или дедлайн), запрос отменяется.
+    """
+
+    def __init__(self, copy_result: Optional[Callable[[T], T]] = None) -> None:
+        """
+        Args:
+            copy_result: Копирование ответа для каждого вызывающего, если
+                ответ общий для нескольких запросов
+        """
+        self._in_flight: Dict[Hashable, _InFlight[T]] = {}
+        self._copy_result = copy_result
+        self.stats = CoalescingStats()
+
+    async def run(
+        self, key: Hashable, request: Callable[[], Coroutine[Any, Any, T]]
+    ) -> T:
+        """
+        Выполнение запроса или ожидание такого же выполняющегося
+
+        Raises:
+            asyncio.TimeoutError: дедлайн вызывающего истек раньше ответа
+        """
+        self.stats.requests += 1
+        entry = self._in_flight.get(key)
+        if entry is not None and not entry.task.done():
+            self.stats.coalesced += 1
+            entry.shared = True
+        else:
+            task = asyncio.create_task(request(), context=deadline.detached_context())
+            entry = self._in_flight[key] = _InFlight(task)
+            task.add_done_callback(lambda _: self._forget(key, entry))
+
+        entry.waiters += 1
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(entry.task), deadline.remaining()
+            )
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                # Ответ больше никому не нужен
+                self.stats.cancelled += 1
+                self._forget(key, entry)
+                entry.task.cancel()
+
+        if entry.shared and self._copy_result is not None:
+            return self._copy_result(result)
+        return result
+
+    def _forget(self, key: Hashable, entry: _InFlight[T]) -> None:
+        if self._in_flight.get(key) is entry:
+            del self._in_flight[key]
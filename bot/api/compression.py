@@ -0,0 +1,140 @@
+"""
+Сжатие тел запросов к внешним API (Content-Encoding: gzip или zstd).
+Большие тела сжимаются в отдельном потоке, чтобы не блокировать цикл
+событий. Если сервер отвечает 415, кодировка для него меняется на
+поддерживаемую из Accept-Encoding или сжатие отключается.
+"""
+
+import asyncio
+import gzip
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from bot.config import HttpClientConfig, http_client_config
+
+logger = logging.getLogger(__name__)
+
+_GZIP_LEVEL = 6
+_ZSTD_LEVEL = 3
+
+
+def _gzip_compress(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=_GZIP_LEVEL, mtime=0)
+
+
+def _zstd_compressor() -> Optional[Callable[[bytes], bytes]]:
+    try:
+        import zstandard
+    except ImportError:
+        return None
+
+    def compress(data: bytes) -> bytes:
+        # ZstdCompressor не потокобезопасен, создаем на каждый вызов
+        compressed: bytes = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+        return compressed
+
+    return compress
+
+
+@dataclass
+class CompressionStats:
+    """Счетчики сжатия тел запросов"""
+
+    compressed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    offloaded: int = 0
+    # Отказы сервера (415), после которых сжатие изменено или отключено
+    rejected: int = 0
+
+    @property
+    def ratio(self) -> float:
+        """Отношение сжатого размера к исходному"""
+        return self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+
+
+class RequestCompressor:
+    """Выбор кодировки для базового URL и сжатие тела запроса"""
+
+    def __init__(self, config: HttpClientConfig):
+        self.min_size = config.compression_min_size
+        self.offload_size = config.compression_offload_size
+        self._codecs: Dict[str, Callable[[bytes], bytes]] = {"gzip": _gzip_compress}
+        zstd = _zstd_compressor()
+        if zstd:
+            self._codecs["zstd"] = zstd
+
+        self.default_encoding = self._resolve(config.request_compression)
+        # Кодировка по базовому URL после отказа сервера (None - без сжатия)
+        self._negotiated: Dict[str, Optional[str]] = {}
+        self.stats = CompressionStats()
+
+    def _resolve(self, encoding: str) -> Optional[str]:
+        encoding = encoding.strip().lower()
+        if encoding in ("", "none"):
+            return None
+        if encoding not in self._codecs:
+            logger.warning(
+                f"Сжатие {encoding} недоступно, используем gzip для тел запросов"
+            )
+            return "gzip"
+        return encoding
+
+    def encoding_for(self, base_url: str) -> Optional[str]:
+        """Кодировка для сервера или None, если сжатие не используется"""
+        return self._negotiated.get(base_url, self.default_encoding)
+
+    async def compress(
+        self, base_url: str, body: Optional[bytes]
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Сжатие тела, если оно достаточно большое
+
+        Returns:
+            Тело запроса и значение Content-Encoding (None, если не сжато)
+        """
+        encoding = self.encoding_for(base_url)
+        if body is None or encoding is None or len(body) < self.min_size:
+            return body, None
+
+        codec = self._codecs[encoding]
+        if len(body) >= self.offload_size:
+            compressed = await asyncio.to_thread(codec, body)
+            self.stats.offloaded += 1
+        else:
+            compressed = codec(body)
+
+        self.stats.compressed += 1
+        self.stats.bytes_in += len(body)
+        self.stats.bytes_out += len(compressed)
+        return compressed, encoding
+
+    def reject(self, base_url: str, accept_encoding: Optional[str]) -> None:
+        """
+        Сервер не принял кодировку (415): выбираем поддерживаемую им
+        из Accept-Encoding или отключаем сжатие для этого сервера
+        """
+        current = self.encoding_for(base_url)
+        offered = [
+            item.split(";")[0].strip().lower()
+            for item in (accept_encoding or "").split(",")
+        ]
+        encoding = next(
+            (
+                name
+                for name in ("zstd", "gzip")
+                if name in offered and name in self._codecs and name != current
+            ),
+            None,
+        )
+        self._negotiated[base_url] = encoding
+        self.stats.rejected += 1
+        logger.warning(
+            f"{base_url} не принимает Content-Encoding {current}, "
+            f"используем: {encoding or 'без сжатия'}"
+        )
+
+
+# Глобальный компрессор тел запросов
+request_compressor = RequestCompressor(http_client_config)
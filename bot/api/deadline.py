@@ -0,0 +1,92 @@
+"""
+Дедлайн обработки запроса пользователя.
+Дедлайн задается при получении апдейта и хранится в contextvars, поэтому
+виден во всех вызовах API внутри обработчика, включая задачи, созданные
+через asyncio.create_task. Каждый вызов получает таймаут не больше
+оставшегося времени.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Iterator, Optional
+
+import aiohttp
+
+# Момент (time.monotonic), после которого ответ пользователю уже бесполезен
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Оставшееся время в секундах или None, если дедлайн не задан"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """Дедлайн задан и уже прошел"""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def detached_context() -> Context:
+    """
+    Копия текущего контекста без дедлайна
+
+    Для задач, общих для нескольких запросов пользователей: каждый из них
+    ограничивает время ожидания своим дедлайном сам.
+    """
+    context = copy_context()
+    context.run(_deadline.set, None)
+    return context
+
+
+@contextmanager
+def deadline_scope(budget: Optional[float]) -> Iterator[None]:
+    """
+    Установка дедлайна на время блока
+
+    Вложенный блок не может продлить внешний дедлайн, только сократить.
+    Пустой или нулевой бюджет оставляет текущий дедлайн без изменений.
+    """
+    if not budget:
+        yield
+        return
+
+    deadline = time.monotonic() + budget
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def bounded_timeout(timeout: aiohttp.ClientTimeout) -> aiohttp.ClientTimeout:
+    """Таймаут эндпоинта, урезанный до оставшегося времени"""
+    left = remaining()
+    if left is None:
+        return timeout
+
+    left = max(left, 0.0)
+
+    def clip(value: Optional[float]) -> float:
+        return left if value is None else min(value, left)
+
+    return aiohttp.ClientTimeout(
+        total=clip(timeout.total),
+        connect=timeout.connect if timeout.connect is None else clip(timeout.connect),
+        sock_read=(
+            timeout.sock_read if timeout.sock_read is None else clip(timeout.sock_read)
+        ),
+        sock_connect=(
+            timeout.sock_connect
+            if timeout.sock_connect is None
+            else clip(timeout.sock_connect)
+        ),
+    )
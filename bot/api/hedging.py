@@ -0,0 +1,43 @@
+"""
+Дублирующие (hedged) запросы для эндпоинтов на интерактивном пути.
+Если первый запрос не ответил за время, близкое к p95 эндпоинта,
+отправляется дубль, и используется ответ, пришедший первым.
+"""
+
+from dataclasses import dataclass
+
+from bot.config import HedgingConfig
+from .latency import LatencyTracker
+from .retry import RetryBudget
+
+
+@dataclass
+class HedgeStats:
+    """Счетчики дублирующих запросов клиента"""
+
+    requests: int = 0
+    hedged: int = 0
+    # Дубль ответил раньше первого запроса
+    hedge_wins: int = 0
+    # Дубли, не отправленные из-за исчерпанного бюджета
+    budget_exhausted: int = 0
+
+
+class HedgePolicy:
+    """Задержка дубля по статистике задержек и ограничение их доли"""
+
+    def __init__(self, config: HedgingConfig, tracker: LatencyTracker):
+        self.config = config
+        self.tracker = tracker
+        # Тот же механизм, что и для повторов: доля от обычных запросов
+        self.budget = RetryBudget(config.max_ratio, config.min_hedges)
+        self.stats = HedgeStats()
+
+    def delay(self, name: str) -> float:
+        """Время ожидания первого ответа перед отправкой дубля"""
+        window = self.tracker.window(name)
+        if len(window) < self.config.min_samples:
+            return self.config.default_delay
+
+        delay = window.percentile(self.config.percentile) or self.config.default_delay
+        return min(max(delay, self.config.min_delay), self.config.max_delay)
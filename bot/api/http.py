@@ -0,0 +1,126 @@
+"""
+Общий пул HTTP соединений для всех исходящих запросов бота.
+Одна сессия aiohttp с общим TCPConnector: keep-alive соединения и кэш DNS
+переиспользуются между API клиентами и обработчиками.
+"""
+
+import logging
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+
+from bot.config import HttpClientConfig, http_client_config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConnectionStats:
+    """Счетчики использования пула соединений"""
+
+    requests: int = 0
+    # Новые TCP (и TLS) соединения
+    connections_created: int = 0
+    # Запросы, отправленные по уже открытому keep-alive соединению
+    connections_reused: int = 0
+    # Ожидания свободного соединения из-за лимитов пула
+    connections_queued: int = 0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        """Доля запросов без нового подключения"""
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else 0.0
+
+
+class HttpClientRegistry:
+    """
+    Владелец общей HTTP сессии и пула соединений
+
+    Сессия создается лениво (или в BotApplication.startup) и закрывается в
+    BotApplication.shutdown. Вызывающий код не должен закрывать сессию сам.
+    """
+
+    def __init__(self, config: HttpClientConfig):
+        self.config = config
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats = ConnectionStats()
+        self._trace_config = self._create_trace_config()
+
+    @property
+    def stats(self) -> ConnectionStats:
+        """Снимок счетчиков пула"""
+        return ConnectionStats(**vars(self._stats))
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._stats = ConnectionStats()
+
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        """Подписка на события aiohttp для подсчета переиспользования"""
+        trace_config = aiohttp.TraceConfig()
+
+        def counter(field: str) -> Callable[..., Awaitable[None]]:
+            async def handler(
+                session: aiohttp.ClientSession, context: SimpleNamespace, params: Any
+            ) -> None:
+                setattr(self._stats, field, getattr(self._stats, field) + 1)
+
+            return handler
+
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_connection_create_end.append(counter("connections_created"))
+        trace_config.on_connection_reuseconn.append(counter("connections_reused"))
+        trace_config.on_connection_queued_start.append(counter("connections_queued"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(counter("dns_cache_misses"))
+        return trace_config
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.config.pool_limit,
+            limit_per_host=self.config.pool_limit_per_host,
+            keepalive_timeout=self.config.keepalive_timeout,
+            use_dns_cache=self.config.dns_cache_ttl > 0,
+            ttl_dns_cache=self.config.dns_cache_ttl or None,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.config.default_timeout),
+            trace_configs=[self._trace_config],
+        )
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Получение общей сессии, создается при первом обращении"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            logger.debug(
+                f"Создан пул HTTP соединений: limit={self.config.pool_limit}, "
+                f"limit_per_host={self.config.pool_limit_per_host}"
+            )
+        return self._session
+
+    async def start(self) -> None:
+        """Создание пула при запуске приложения"""
+        await self.get_session()
+
+    async def close(self) -> None:
+        """Закрытие сессии и всех соединений пула"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            stats = self._stats
+            logger.info(
+                f"Пул HTTP соединений закрыт: запросов {stats.requests}, "
+                f"новых соединений {stats.connections_created}, "
+                f"переиспользовано {stats.connections_reused} "
+                f"({stats.reuse_rate:.0%})"
+            )
+        self._session = None
+
+
+# Глобальный пул HTTP соединений
+http_client = HttpClientRegistry(http_client_config)
@@ -0,0 +1,87 @@
+"""
+Учет задержек ответов внешних API по эндпоинтам.
+Хранит скользящее окно последних замеров и считает перцентили.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class LatencySnapshot:
+    """Перцентили задержки эндпоинта в секундах"""
+
+    name: str
+    count: int
+    p50: float
+    p95: float
+    p99: float
+
+
+class LatencyWindow:
+    """Скользящее окно замеров одного эндпоинта"""
+
+    def __init__(self, size: int = 500):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._sorted: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        """Добавление замера"""
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Перцентиль q (0..1) или None, если замеров нет"""
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        index = min(int(q * len(self._sorted)), len(self._sorted) - 1)
+        return self._sorted[index]
+
+
+class LatencyTracker:
+    """Окна задержек по паре (базовый URL, эндпоинт)"""
+
+    def __init__(self, window_size: int = 500):
+        self.window_size = window_size
+        self._windows: Dict[str, LatencyWindow] = {}
+
+    @staticmethod
+    def key(base_url: str, endpoint: str) -> str:
+        """Имя эндпоинта в статистике"""
+        return f"{base_url.rstrip('/')}/{endpoint.strip('/')}"
+
+    def window(self, name: str) -> LatencyWindow:
+        """Окно эндпоинта, создается при первом обращении"""
+        window = self._windows.get(name)
+        if window is None:
+            window = LatencyWindow(self.window_size)
+            self._windows[name] = window
+        return window
+
+    def record(self, name: str, seconds: float) -> None:
+        """Добавление замера для эндпоинта"""
+        self.window(name).record(seconds)
+
+    def snapshot(self) -> List[LatencySnapshot]:
+        """Перцентили по всем эндпоинтам"""
+        return [
+            LatencySnapshot(
+                name=name,
+                count=len(window),
+                p50=window.percentile(0.50) or 0.0,
+                p95=window.percentile(0.95) or 0.0,
+                p99=window.percentile(0.99) or 0.0,
+            )
+            for name, window in self._windows.items()
+            if len(window)
+        ]
+
+
+# Глобальная статистика задержек API
+latency_tracker = LatencyTracker()
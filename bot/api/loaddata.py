@@ -6,11 +6,19 @@
 import logging
 from typing import Dict, Any
 
+from .answers import answer_cache
 from .base import utils_client
+from .milvus import milvus_cache
 
 logger = logging.getLogger(__name__)
 
 
+def _knowledge_base_changed() -> None:
+    """Сброс кэшей, зависящих от содержимого базы знаний"""
+    answer_cache.invalidate()
+    milvus_cache.invalidate()
+
+
 class LoadDataClient:
     """Клиент для загрузки различных типов данных в базу знаний"""
 
@@ -33,6 +41,7 @@ class LoadDataClient:
 
             if response.success:
                 logger.info(f"Текстовые данные успешно загружены: {title}")
+                _knowledge_base_changed()
                 return True
             else:
                 logger.error(f"Ошибка загрузки текстовых данных: {response.error}")
@@ -76,6 +85,7 @@ async def upload_wiki_data(user_id: int) -> Dict[str, Any]:
         response = await utils_client.upload_wiki_data(user_id)
 
         if response.success:
+            _knowledge_base_changed()
             return {
                 "status": "success",
                 "message": "Данные успешно загружены",
@@ -3,13 +3,116 @@
 Отправляет логи в центральную систему для анализа.
 """
 
+import asyncio
 import logging
-from typing import List, Literal
+from typing import List, Literal, cast
 
-from .base import core_client
+from bot.config import log_shipper_config
+from .base import APIResponse, core_client
+from .log_shipper import BatchResult, LogRecord, LogShipper, OverflowPolicy
+from .log_spool import LogSpool
 
 logger = logging.getLogger(__name__)
 
+# Статусы, при которых Core API не поддерживает пакетное логирование
+_BULK_UNSUPPORTED_STATUSES = (404, 405)
+# Ответы 4xx, после которых запись стоит отправить повторно
+_RETRYABLE_CLIENT_STATUSES = _BULK_UNSUPPORTED_STATUSES + (408, 429)
+_bulk_supported = True
+
+
+def _is_rejected(response: APIResponse) -> bool:
+    """Сервер отклонил запрос, повтор не поможет"""
+    code = response.status_code
+    return (
+        code is not None
+        and 400 <= code < 500
+        and code not in _RETRYABLE_CLIENT_STATUSES
+    )
+
+
+async def _send_one(record: LogRecord) -> APIResponse:
+    """Отправка одной записи через v1/log"""
+    response = await core_client.log_message(**record.to_payload())
+    if not response.success:
+        logger.error(f"Log error: {response.error}")
+    return response
+
+
+async def send_log_batch(records: List[LogRecord]) -> BatchResult:
+    """
+    Отправка пакета логов через v1/log/bulk
+
+    Если Core API не поддерживает пакетный эндпоинт или отклонил пакет,
+    записи отправляются по одной параллельно. Записи, отклоненные с ответом
+    4xx, не повторяются.
+
+    Returns:
+        Записи для повторной отправки и число отклоненных записей
+    """
+    global _bulk_supported
+
+    if _bulk_supported:
+        response = await core_client.log_messages_bulk(
+            [record.to_payload() for record in records]
+        )
+        if response.success:
+            return BatchResult()
+        if response.status_code in _BULK_UNSUPPORTED_STATUSES:
+            logger.warning("Core API не поддерживает v1/log/bulk, отправляем по одной")
+            _bulk_supported = False
+        elif _is_rejected(response):
+            # Отклоненный пакет проверяем по одной записи, чтобы не терять весь
+            logger.warning(
+                f"Core API отклонил пакет логов ({response.status_code}), "
+                "отправляем по одной"
+            )
+        else:
+            logger.error(f"Bulk log error: {response.error}")
+            return BatchResult(retry=list(records))
+
+    responses = await asyncio.gather(
+        *(_send_one(record) for record in records), return_exceptions=True
+    )
+    result = BatchResult()
+    for record, outcome in zip(records, responses):
+        if not isinstance(outcome, APIResponse):
+            result.retry.append(record)
+        elif _is_rejected(outcome):
+            result.rejected += 1
+        elif not outcome.success:
+            result.retry.append(record)
+    if result.rejected:
+        logger.error(f"Core API отклонил {result.rejected} записей лога, они отброшены")
+    return result
+
+
+# Дисковая очередь для логов, которые не удалось отправить
+log_spool = (
+    LogSpool(
+        directory=log_shipper_config.spool_dir,
+        segment_size=log_shipper_config.spool_segment_size,
+        max_bytes=log_shipper_config.spool_max_bytes,
+        fsync=log_shipper_config.spool_fsync,
+    )
+    if log_shipper_config.spool_dir
+    else None
+)
+
+# Глобальная очередь логов, запускается в BotApplication.startup
+log_shipper = LogShipper(
+    send_batch=send_log_batch,
+    batch_size=log_shipper_config.batch_size,
+    flush_interval=log_shipper_config.flush_interval,
+    max_queue=log_shipper_config.max_queue,
+    overflow_policy=cast(OverflowPolicy, log_shipper_config.overflow_policy),
+    block_timeout=log_shipper_config.block_timeout,
+    max_in_flight=log_shipper_config.max_in_flight,
+    spool=log_spool,
+    replay_interval=log_shipper_config.replay_interval,
+    max_replay_backoff=log_shipper_config.max_replay_backoff,
+)
+
 
 async def log(
     user_id: int,
@@ -22,6 +125,9 @@ async def log(
     """
     Логирование сообщения пользователя
 
+    Если фоновая отправка запущена, запись ставится в очередь и функция
+    возвращается сразу, иначе лог отправляется синхронно.
+
     Args:
         user_id: ID пользователя
         query: Запрос пользователя
@@ -31,23 +137,22 @@ async def log(
         category: Категория запроса (Тарифы, Общий, и т.д.)
 
     Returns:
-        True в случае успешного логирования, False иначе
+        True в случае успешного логирования (постановки в очередь), False иначе
     """
+    record = LogRecord(
+        user_id=user_id,
+        query=query,
+        ai_response=ai_response,
+        status=status,
+        hashes=list(hashes),
+        category=category,
+    )
+
     try:
-        response = await core_client.log_message(
-            user_id=user_id,
-            query=query,
-            ai_response=ai_response,
-            status=status,
-            hashes=hashes,
-            category=category,
-        )
+        if log_shipper.running:
+            return await log_shipper.submit(record)
 
-        if response.success:
-            return True
-        else:
-            logger.error(f"Log error: {response.error}")
-            return False
+        return (await _send_one(record)).success
 
     except Exception as e:
         logger.exception(f"Unexpected error in log: {e}")
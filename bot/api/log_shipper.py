@@ -0,0 +1,411 @@
+"""
+Фоновая отправка логов сообщений пакетами.
+Обработчики ставят записи в ограниченную очередь, фоновая задача отправляет
+их пакетами по размеру или по времени. При отставании или недоступности
+Core API пакеты сохраняются в дисковую очередь и отправляются позже.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Literal, Optional, Set
+
+from .log_spool import LogSpool
+
+logger = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["drop_oldest", "drop_newest", "block"]
+
+
+@dataclass
+class LogRecord:
+    """Запись лога сообщения пользователя"""
+
+    user_id: int
+    query: str
+    ai_response: str
+    status: Literal[1, 0]
+    hashes: List[str] = field(default_factory=list)
+    category: str = "Общий"
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Тело запроса в формате v1/log"""
+        return asdict(self)
+
+
+@dataclass
+class LogShipperStats:
+    """Счетчики очереди логов"""
+
+    enqueued: int = 0
+    sent: int = 0
+    dropped: int = 0
+    failed: int = 0
+    spooled: int = 0
+    # Записи, отклоненные сервером без возможности повтора
+    rejected: int = 0
+    replayed: int = 0
+    batches: int = 0
+    queue_size: int = 0
+
+
+@dataclass
+class BatchResult:
+    """Результат отправки пакета"""
+
+    # Записи, которые стоит отправить повторно
+    retry: List[LogRecord] = field(default_factory=list)
+    # Число записей, отклоненных сервером окончательно
+    rejected: int = 0
+
+
+# Отправка пакета: остальные записи приняты сервером
+BatchSender = Callable[[List[LogRecord]], Awaitable[BatchResult]]
+
+
+class LogShipper:
+    """
+    Очередь логов с фоновой пакетной отправкой
+
+    Пакет отправляется, когда набралось batch_size записей или прошло
+    flush_interval секунд с момента появления первой записи в очереди.
+
+    Если задан spool, на диск записываются пакеты, которые не удалось
+    отправить, а также пакеты, для которых нет свободного слота отправки при
+    заполненной наполовину очереди. Пока в дисковой очереди есть записи, новые
+    пакеты тоже пишутся туда, а отдельная задача отправляет их по порядку,
+    увеличивая паузу при ошибках. Повторно отправляются только записи, не
+    принятые сервером; окончательно отклоненные записи отбрасываются.
+    """
+
+    def __init__(
+        self,
+        send_batch: BatchSender,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_queue: int = 10000,
+        overflow_policy: OverflowPolicy = "drop_oldest",
+        block_timeout: float = 1.0,
+        max_in_flight: int = 4,
+        spool: Optional[LogSpool] = None,
+        replay_interval: float = 1.0,
+        max_replay_backoff: float = 60.0,
+    ):
+        if batch_size <= 0 or max_queue <= 0 or max_in_flight <= 0:
+            raise ValueError(
+                "batch_size, max_queue и max_in_flight должны быть положительными"
+            )
+        if overflow_policy not in ("drop_oldest", "drop_newest", "block"):
+            raise ValueError(f"Неизвестная политика переполнения: {overflow_policy}")
+
+        self._send_batch = send_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.max_in_flight = max_in_flight
+        self.spool = spool
+        self.replay_interval = replay_interval
+        self.max_replay_backoff = max_replay_backoff
+
+        self._queue: Deque[LogRecord] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._replayer: Optional["asyncio.Task[None]"] = None
+        self._spool_ready = asyncio.Event()
+        self._in_flight: Set["asyncio.Task[None]"] = set()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._stopping = False
+        self._stats = LogShipperStats()
+
+    @property
+    def running(self) -> bool:
+        """Запущена ли фоновая отправка"""
+        return self._worker is not None and not self._worker.done()
+
+    @property
+    def stats(self) -> LogShipperStats:
+        """Снимок счетчиков очереди"""
+        return LogShipperStats(
+            enqueued=self._stats.enqueued,
+            sent=self._stats.sent,
+            dropped=self._stats.dropped,
+            failed=self._stats.failed,
+            spooled=self._stats.spooled,
+            rejected=self._stats.rejected,
+            replayed=self._stats.replayed,
+            batches=self._stats.batches,
+            queue_size=len(self._queue),
+        )
+
+    def start(self) -> None:
+        """Запуск фоновой задачи отправки"""
+        if self.running:
+            return
+        self._stopping = False
+        self._worker = asyncio.create_task(self._run(), name="log-shipper")
+        if self.spool:
+            self._replayer = asyncio.create_task(
+                self._replay(), name="log-spool-replay"
+            )
+        logger.info("Фоновая отправка логов запущена")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Остановка с отправкой оставшихся записей"""
+        if not self._worker:
+            return
+
+        self._stopping = True
+        self._not_empty.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._worker), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._worker.cancel()
+            for task in self._in_flight:
+                task.cancel()
+            await asyncio.gather(self._worker, *self._in_flight, return_exceptions=True)
+
+            remaining = list(self._queue)
+            self._queue.clear()
+            if remaining and self.spool:
+                await self._spool_batch(remaining)
+            elif remaining:
+                logger.warning(
+                    f"Не удалось отправить логи за {timeout} с, "
+                    f"потеряно записей: {len(remaining)}"
+                )
+                self._stats.dropped += len(remaining)
+        finally:
+            self._worker = None
+
+        if self._replayer:
+            self._replayer.cancel()
+            await asyncio.gather(self._replayer, return_exceptions=True)
+            self._replayer = None
+        if self.spool:
+            await self.spool.close()
+        logger.info("Фоновая отправка логов остановлена")
+
+    async def submit(self, record: LogRecord) -> bool:
+        """
+        Постановка записи в очередь
+
+        Returns:
+            True если запись принята, False если отброшена из-за переполнения
+        """
+        if len(self._queue) >= self.max_queue:
+            if self.overflow_policy == "drop_newest":
+                self._stats.dropped += 1
+                return False
+
+            if self.overflow_policy == "block":
+                if not await self._wait_not_full():
+                    self._stats.dropped += 1
+                    return False
+
+            while len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self._stats.dropped += 1
+
+        self._queue.append(record)
+        self._stats.enqueued += 1
+        self._not_empty.set()
+        return True
+
+    async def _wait_not_full(self) -> bool:
+        """
+        Ожидание места в очереди не дольше block_timeout
+
+        Место, освободившееся за время ожидания, могут занять другие
+        ожидающие, поэтому после пробуждения наличие места проверяется снова.
+        """
+        give_up_at = time.monotonic() + self.block_timeout
+        while len(self._queue) >= self.max_queue:
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._not_full.clear()
+            try:
+                await asyncio.wait_for(self._not_full.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def _take_batch(self) -> List[LogRecord]:
+        """Извлечение очередного пакета из очереди"""
+        count = min(self.batch_size, len(self._queue))
+        batch = [self._queue.popleft() for _ in range(count)]
+        if not self._queue:
+            self._not_empty.clear()
+        if len(self._queue) < self.max_queue:
+            self._not_full.set()
+        return batch
+
+    async def _wait_for_batch(self) -> None:
+        """Ожидание полного пакета или истечения интервала отправки"""
+        if not self._queue:
+            await self._not_empty.wait()
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stopping and len(self._queue) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._not_empty.clear()
+            try:
+                await asyncio.wait_for(self._not_empty.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+
+    async def _flush(self, batch: List[LogRecord]) -> None:
+        """Отправка пакета с учетом результата"""
+        try:
+            result = await self._send_batch(batch)
+        except asyncio.CancelledError:
+            if self.spool:
+                await self._spool_batch(batch)
+            raise
+        except Exception as e:
+            logger.exception(f"Ошибка при отправке пакета логов: {e}")
+            result = BatchResult(retry=batch)
+        finally:
+            self._slots.release()
+
+        self._stats.batches += 1
+        self._stats.sent += self._accepted(batch, result)
+        failed = result.retry
+        if not failed:
+            return
+        if self.spool:
+            logger.warning(
+                f"Не удалось отправить {len(failed)} из {len(batch)} записей лога, "
+                "сохраняем на диск"
+            )
+            await self._spool_batch(failed)
+        else:
+            self._stats.failed += len(failed)
+            logger.error(
+                f"Не удалось отправить {len(failed)} из {len(batch)} записей лога"
+            )
+
+    def _accepted(self, batch: List[LogRecord], result: BatchResult) -> int:
+        """Число принятых сервером записей пакета с учетом отклоненных"""
+        self._stats.rejected += result.rejected
+        return len(batch) - len(result.retry) - result.rejected
+
+    async def _spool_batch(self, batch: List[LogRecord]) -> None:
+        """Сохранение пакета в дисковую очередь"""
+        if not self.spool:
+            return
+        try:
+            await self.spool.append([record.to_payload() for record in batch])
+            self._stats.spooled += len(batch)
+            self._spool_ready.set()
+        except Exception as e:
+            logger.exception(f"Не удалось сохранить логи на диск: {e}")
+            self._stats.failed += len(batch)
+
+    def _should_spool(self) -> bool:
+        """Нужно ли писать очередной пакет на диск вместо отправки"""
+        if not self.spool:
+            return False
+        # Сохраняем порядок: пока на диске есть записи, новые идут следом за ними
+        if self.spool.has_pending:
+            return True
+        # Все слоты отправки заняты и очередь растет: Core API не успевает
+        return self._slots.locked() and len(self._queue) >= self.max_queue // 2
+
+    async def _replay(self) -> None:
+        """Повторная отправка записей из дисковой очереди по порядку"""
+        if not self.spool:
+            return
+        await self.spool.open()
+        backoff = self.replay_interval
+
+        while True:
+            if not self.spool.has_pending:
+                self._spool_ready.clear()
+                await self._spool_ready.wait()
+
+            try:
+                payloads, position = await self.spool.read(self.batch_size)
+            except Exception as e:
+                # Ошибка диска не должна останавливать отправку очереди
+                logger.exception(f"Ошибка чтения дисковой очереди логов: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_replay_backoff)
+                continue
+            if not payloads:
+                await asyncio.sleep(self.replay_interval)
+                continue
+
+            batch = self._restore_batch(payloads)
+            try:
+                result = await self._send_batch(batch) if batch else BatchResult()
+                retry = result.retry
+                # Пока ни одна запись не принята, пакет остается в начале очереди
+                progress = not batch or len(retry) < len(batch)
+                if progress:
+                    if retry:
+                        # Принятые записи не отправляются повторно
+                        await self.spool.append([r.to_payload() for r in retry])
+                    await self.spool.commit(position, len(payloads))
+                    self._stats.replayed += self._accepted(batch, result)
+            except Exception as e:
+                logger.exception(f"Ошибка при повторной отправке логов: {e}")
+                retry, progress = batch, False
+
+            if not retry:
+                backoff = self.replay_interval
+            else:
+                if not progress:
+                    logger.warning(
+                        f"Не удалось повторно отправить {len(retry)} записей лога"
+                    )
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_replay_backoff)
+
+    def _restore_batch(self, payloads: List[Dict[str, Any]]) -> List[LogRecord]:
+        """Записи из дисковой очереди; поврежденные пропускаются"""
+        batch: List[LogRecord] = []
+        for payload in payloads:
+            try:
+                if not isinstance(payload, dict):
+                    raise TypeError(
+                        f"ожидался объект, получен {type(payload).__name__}"
+                    )
+                batch.append(LogRecord(**payload))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Пропущена поврежденная запись дисковой очереди: {e}")
+                self._stats.failed += 1
+        return batch
+
+    async def _run(self) -> None:
+        """Цикл фоновой отправки"""
+        if self.spool:
+            await self.spool.open()
+
+        while True:
+            if not self._queue and self._stopping:
+                break
+
+            await self._wait_for_batch()
+            if not self._queue:
+                continue
+
+            if self._should_spool():
+                await self._spool_batch(self._take_batch())
+                continue
+
+            # Не более max_in_flight пакетов отправляются одновременно
+            await self._slots.acquire()
+            task = asyncio.create_task(self._flush(self._take_batch()))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
@@ -0,0 +1,375 @@
+"""
+Локальная очередь логов на диске.
+Сохраняет записи, которые не удалось отправить в Core API, и отдает их
+для повторной отправки в исходном порядке.
+
+Формат: каталог с сегментами ``<номер>.seg``, каждая запись хранится как
+4 байта длины (big-endian) и JSON в UTF-8. Позиция чтения хранится в
+файле ``cursor``. Доставка "хотя бы один раз": после аварийного завершения
+часть записей может быть отправлена повторно. Оборванный хвост последнего
+сегмента отрезается при открытии, записи с поврежденным JSON пропускаются.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_LENGTH = struct.Struct(">I")
+_CURSOR = struct.Struct(">QQ")
+_SEGMENT_SUFFIX = ".seg"
+_CURSOR_FILE = "cursor"
+
+# Позиция чтения: (номер сегмента, смещение в байтах)
+SpoolPosition = Tuple[int, int]
+
+
+@dataclass
+class LogSpoolStats:
+    """Счетчики дисковой очереди"""
+
+    appended: int = 0
+    replayed: int = 0
+    dropped: int = 0
+    segments: int = 0
+    bytes_on_disk: int = 0
+
+
+class LogSpool:
+    """
+    Дисковая очередь логов из сегментов с записью только в конец
+
+    Все операции с файлами выполняются в отдельном потоке по очереди, поэтому
+    цикл событий не блокируется на записи и fsync, а порядок записей
+    сохраняется.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 4 * 1024 * 1024,
+        max_bytes: int = 256 * 1024 * 1024,
+        fsync: bool = True,
+        read_size: int = 1024 * 1024,
+    ):
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.read_size = read_size
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._segments: List[int] = []
+        self._next_segment_id = 1
+        self._read_pos: SpoolPosition = (0, 0)
+        self._bytes_on_disk = 0
+        self._pending = 0
+        self._opened = False
+        self._stats = LogSpoolStats()
+
+    @property
+    def has_pending(self) -> bool:
+        """Есть ли неотправленные записи"""
+        return self._pending > 0
+
+    @property
+    def stats(self) -> LogSpoolStats:
+        """Снимок счетчиков очереди"""
+        return LogSpoolStats(
+            appended=self._stats.appended,
+            replayed=self._stats.replayed,
+            dropped=self._stats.dropped,
+            segments=len(self._segments),
+            bytes_on_disk=self._bytes_on_disk,
+        )
+
+    async def _call(self, func: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="spool"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def open(self) -> None:
+        """Открытие каталога и восстановление позиции чтения"""
+        if not self._opened:
+            await self._call(self._open_sync)
+            self._opened = True
+
+    async def close(self) -> None:
+        """Завершение фонового потока; после close очередь можно открыть снова"""
+        executor, self._executor = self._executor, None
+        self._opened = False
+        if executor is not None:
+            # Ожидание начатых операций не должно блокировать цикл событий
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, partial(executor.shutdown, wait=True))
+
+    async def append(self, records: List[Dict[str, Any]]) -> None:
+        """Запись пакета в конец очереди одним вызовом write"""
+        if not records:
+            return
+        await self.open()
+        buffer = bytearray()
+        for record in records:
+            data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+            buffer += _LENGTH.pack(len(data))
+            buffer += data
+        await self._call(self._append_sync, bytes(buffer), len(records))
+
+    async def read(
+        self, max_records: int
+    ) -> Tuple[List[Dict[str, Any]], SpoolPosition]:
+        """
+        Чтение пакета с начала очереди без удаления
+
+        Returns:
+            Записи и позиция, которую нужно передать в commit после отправки
+        """
+        await self.open()
+        return await self._call(self._read_sync, max_records)
+
+    async def commit(self, position: SpoolPosition, count: int) -> None:
+        """Подтверждение отправки записей до указанной позиции"""
+        await self._call(self._commit_sync, position, count)
+
+    # Синхронные операции, выполняются только в потоке очереди
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self.directory / f"{segment_id:020d}{_SEGMENT_SUFFIX}"
+
+    def _open_sync(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segments = sorted(
+            int(path.stem)
+            for path in self.directory.glob(f"*{_SEGMENT_SUFFIX}")
+            if path.stem.isdigit()
+        )
+        if self._segments:
+            self._truncate_torn_tail_sync(self._segments[-1])
+        self._bytes_on_disk = sum(
+            self._segment_path(segment_id).stat().st_size
+            for segment_id in self._segments
+        )
+
+        cursor_path = self.directory / _CURSOR_FILE
+        if cursor_path.exists() and cursor_path.stat().st_size == _CURSOR.size:
+            self._read_pos = _CURSOR.unpack(cursor_path.read_bytes())
+        self._next_segment_id = max(self._segments[-1:] + [self._read_pos[0]]) + 1
+        if self._segments and self._read_pos[0] not in self._segments:
+            self._read_pos = (self._segments[0], 0)
+
+        self._pending = self._count_pending_sync()
+        if self._pending:
+            logger.info(
+                f"В дисковой очереди логов найдено {self._pending} неотправленных записей"
+            )
+
+    def _count_pending_sync(self) -> int:
+        count = 0
+        for segment_id in self._segments:
+            offset = self._read_pos[1] if segment_id == self._read_pos[0] else 0
+            if segment_id < self._read_pos[0]:
+                continue
+            count += self._scan_sync(segment_id, offset)[0]
+        return count
+
+    def _scan_sync(self, segment_id: int, offset: int) -> Tuple[int, int]:
+        """
+        Целые записи сегмента после смещения, без разбора JSON
+
+        Returns:
+            Число записей и смещение конца последней из них
+        """
+        with open(self._segment_path(segment_id), "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        count = 0
+        position = 0
+        while position + _LENGTH.size <= len(data):
+            (length,) = _LENGTH.unpack_from(data, position)
+            end = position + _LENGTH.size + length
+            if end > len(data):
+                break
+            position = end
+            count += 1
+        return count, offset + position
+
+    def _truncate_torn_tail_sync(self, segment_id: int) -> None:
+        """
+        Отрезание записи, оборванной при аварийном завершении
+
+        Иначе новые записи дописываются после обрывка и при чтении
+        разбираются со сдвигом.
+        """
+        path = self._segment_path(segment_id)
+        _, end = self._scan_sync(segment_id, 0)
+        size = path.stat().st_size
+        if end < size:
+            with open(path, "r+b") as f:
+                f.truncate(end)
+            logger.warning(
+                f"Отрезан оборванный хвост сегмента {path.name}: {size - end} байт"
+            )
+
+    def _append_sync(self, data: bytes, count: int) -> None:
+        if not self._segments or (
+            self._segment_path(self._segments[-1]).stat().st_size + len(data)
+            > self.segment_size
+        ):
+            next_id = self._next_segment_id
+            self._next_segment_id += 1
+            self._segments.append(next_id)
+            if len(self._segments) == 1:
+                self._read_pos = (next_id, 0)
+
+        with open(self._segment_path(self._segments[-1]), "ab") as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._bytes_on_disk += len(data)
+        self._pending += count
+        self._stats.appended += count
+        self._enforce_limit_sync()
+
+    def _enforce_limit_sync(self) -> None:
+        """Удаление самых старых сегментов при превышении лимита"""
+        while self._bytes_on_disk > self.max_bytes and len(self._segments) > 1:
+            segment_id = self._segments[0]
+            offset = self._read_pos[1] if segment_id == self._read_pos[0] else 0
+            lost = self._scan_sync(segment_id, offset)[0]
+            self._remove_segment_sync(segment_id)
+            self._pending -= lost
+            self._stats.dropped += lost
+            logger.warning(
+                f"Дисковая очередь логов переполнена, удалено записей: {lost}"
+            )
+
+    def _remove_segment_sync(self, segment_id: int) -> None:
+        path = self._segment_path(segment_id)
+        self._bytes_on_disk -= path.stat().st_size
+        path.unlink()
+        self._segments.remove(segment_id)
+        if self._segments:
+            self._read_pos = (self._segments[0], 0)
+        self._write_cursor_sync()
+
+    @staticmethod
+    def _decode(
+        data: bytes, limit: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[int]]:
+        """
+        Разбор записей из буфера
+
+        Разбор останавливается перед поврежденной записью.
+
+        Returns:
+            Записи, число разобранных байт и длина следующей за ними
+            поврежденной записи (None, если ее нет)
+        """
+        records: List[Dict[str, Any]] = []
+        offset = 0
+        while offset + _LENGTH.size <= len(data):
+            if limit is not None and len(records) >= limit:
+                break
+            (length,) = _LENGTH.unpack_from(data, offset)
+            end = offset + _LENGTH.size + length
+            if end > len(data):
+                break
+            try:
+                record = json.loads(data[offset + _LENGTH.size : end])
+            except ValueError:
+                return records, offset, end - offset
+            if not isinstance(record, dict):
+                return records, offset, end - offset
+            records.append(record)
+            offset = end
+        return records, offset, None
+
+    def _read_sync(
+        self, max_records: int
+    ) -> Tuple[List[Dict[str, Any]], SpoolPosition]:
+        while self._segments:
+            segment_id, offset = self._read_pos
+            if segment_id not in self._segments:
+                self._read_pos = (self._segments[0], 0)
+                continue
+            with open(self._segment_path(segment_id), "rb") as f:
+                f.seek(offset)
+                data = f.read(self.read_size)
+                if len(data) >= _LENGTH.size:
+                    # Запись больше буфера чтения: дочитываем ее целиком
+                    (length,) = _LENGTH.unpack_from(data)
+                    if _LENGTH.size + length > len(data):
+                        data += f.read(_LENGTH.size + length - len(data))
+
+            records, consumed, corrupt = self._decode(data, limit=max_records)
+            if records:
+                return records, (segment_id, offset + consumed)
+            if corrupt is not None:
+                # Поврежденная запись в начале очереди: пропускаем ее
+                self._skip_corrupt_sync((segment_id, offset + corrupt))
+                continue
+
+            # Сегмент прочитан полностью (или оборван при аварии) и он не последний
+            if segment_id != self._segments[-1]:
+                self._remove_segment_sync(segment_id)
+                continue
+            break
+
+        return [], self._read_pos
+
+    def _skip_corrupt_sync(self, position: SpoolPosition) -> None:
+        self._read_pos = position
+        self._pending = max(0, self._pending - 1)
+        self._stats.dropped += 1
+        self._write_cursor_sync()
+        logger.warning(
+            f"Пропущена поврежденная запись дисковой очереди логов в сегменте "
+            f"{position[0]}"
+        )
+
+    def _commit_sync(self, position: SpoolPosition, count: int) -> None:
+        segment_id, offset = position
+        self._stats.replayed += count
+        if segment_id not in self._segments:
+            # Сегмент удален при переполнении во время отправки: его записи
+            # уже учтены как потерянные, чтение продолжается с самого старого
+            if self._segments and self._read_pos[0] not in self._segments:
+                self._read_pos = (self._segments[0], 0)
+                self._write_cursor_sync()
+            return
+
+        self._read_pos = position
+        self._pending = max(0, self._pending - count)
+
+        path = self._segment_path(segment_id)
+        if (
+            segment_id != self._segments[-1]
+            and path.exists()
+            and offset >= path.stat().st_size
+        ):
+            self._remove_segment_sync(segment_id)
+        elif not self._pending and segment_id == self._segments[-1]:
+            # Очередь пуста: удаляем последний сегмент, чтобы не копить файлы
+            self._remove_segment_sync(segment_id)
+        else:
+            self._write_cursor_sync()
+
+    def _write_cursor_sync(self) -> None:
+        tmp_path = self.directory / f"{_CURSOR_FILE}.tmp"
+        tmp_path.write_bytes(_CURSOR.pack(*self._read_pos))
+        os.replace(tmp_path, self.directory / _CURSOR_FILE)
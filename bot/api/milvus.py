@@ -1,17 +1,135 @@
 """
 Клиент для работы с Milvus векторной базой данных.
 Обеспечивает поиск релевантного контекста и истории чата.
+Результаты поиска кэшируются по пользователю и нормализованному тексту
+запроса: дополнительные темы пользователей делают выдачу персональной.
 """
 
 import logging
-from typing import Dict, Any, Optional
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, Optional, Tuple
 from aiogram.types import Message
 
+from bot.config import cache_config
+from bot.utils.cache import TTLCache
+from .answers import normalize_question
 from .base import utils_client
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class MilvusCacheStats:
+    """Счетчики кэша поиска в Milvus"""
+
+    hits: int = 0
+    misses: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля запросов, обслуженных без поиска в Milvus"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Закэшированный поиск: контекст и хеши найденных документов
+_CachedSearch = Tuple[str, Tuple[str, ...]]
+
+# Начало очередного обмена в истории чата
+_TURN_RE = re.compile(r"\n(?=Пользователь: )")
+
+
+class MilvusResultCache:
+    """
+    Результаты поиска в Milvus с ограничением времени жизни и размера
+
+    По запросу кэшируются только найденный контекст и хеши документов.
+    История чата хранится отдельно для пользователя: она обновляется при
+    каждом поиске и дополняется ответами на общие запросы, отправленными
+    после него, поэтому результат из кэша содержит текущую историю. Как и
+    сервис поиска, кэш хранит только history_turns последних обменов и не
+    продлевает срок жизни истории при дополнении.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        ttl: float,
+        maxsize: int,
+        history_turns: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.history_turns = history_turns
+        self._cache: TTLCache[Tuple[int, str], _CachedSearch] = TTLCache(
+            maxsize, ttl, clock
+        )
+        self._history: TTLCache[int, Tuple[str, ...]] = TTLCache(maxsize, ttl, clock)
+        self._stats = MilvusCacheStats()
+
+    def get(self, user_id: int, text: str) -> Optional[Dict[str, Any]]:
+        """Результат поиска из кэша или None"""
+        if not self.enabled:
+            return None
+
+        entry = self._cache.get((user_id, normalize_question(text)))
+        history = self._history.get(user_id)
+        if entry is None or history is None:
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        combined_context, hashs = entry
+        return {
+            "combined_context": combined_context,
+            "chat_history": "\n".join(history),
+            "hashs": list(hashs),
+        }
+
+    def put(self, user_id: int, text: str, result: Dict[str, Any]) -> None:
+        """Сохранение результата поиска и актуальной истории чата"""
+        if self.enabled:
+            self._cache.set(
+                (user_id, normalize_question(text)),
+                (result["combined_context"], tuple(result["hashs"])),
+            )
+            self._history.set(user_id, tuple(_TURN_RE.split(result["chat_history"])))
+
+    def record_exchange(self, user_id: int, query: str, ai_response: str) -> None:
+        """Добавление отправленного ответа к сохраненной истории чата"""
+        history = self._history.get(user_id) if self.enabled else None
+        if history is not None:
+            turns = [turn for turn in history if turn]
+            turns.append(f"Пользователь: {query}\nАссистент: {ai_response}")
+            self._history.replace(user_id, tuple(turns[-self.history_turns :]))
+
+    def invalidate(self) -> None:
+        """Очистка кэша после изменения базы знаний"""
+        self._cache.clear()
+
+    @property
+    def stats(self) -> MilvusCacheStats:
+        """Снимок счетчиков кэша"""
+        return MilvusCacheStats(
+            hits=self._stats.hits, misses=self._stats.misses, size=len(self._cache)
+        )
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._stats = MilvusCacheStats()
+
+
+# Глобальный кэш результатов поиска
+milvus_cache = MilvusResultCache(
+    enabled=cache_config.milvus_cache_enabled,
+    ttl=cache_config.milvus_cache_ttl,
+    maxsize=cache_config.milvus_cache_maxsize,
+    history_turns=cache_config.milvus_history_turns,
+)
+
+
 async def search_milvus(
     user_id: int,
     message: Message,
@@ -27,16 +145,21 @@ async def search_milvus(
         Словарь с контекстом и историей или None в случае ошибки
     """
     try:
-        response = await utils_client.search_milvus(
-            user_id=user_id, text=message.text or "" if message else ""
-        )
+        text = message.text or "" if message else ""
+        cached = milvus_cache.get(user_id, text)
+        if cached is not None:
+            return cached
+
+        response = await utils_client.search_milvus(user_id=user_id, text=text)
 
         if response.success and response.data:
-            return {
+            result = {
                 "combined_context": response.data.get("combined_context", ""),
                 "chat_history": response.data.get("chat_history", ""),
                 "hashs": response.data.get("hashs", []),
             }
+            milvus_cache.put(user_id, text, result)
+            return dict(result)
 
         else:
             logger.error(f"Milvus search error: {response.error}")
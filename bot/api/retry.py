@@ -0,0 +1,84 @@
+"""
+Политика повторов запросов к внешним API.
+Экспоненциальная задержка со случайным разбросом и бюджет повторов,
+ограничивающий их долю от обычного трафика клиента.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from bot.config import RetryConfig
+
+# Ответы, после которых повтор может быть успешным
+RETRYABLE_STATUSES = (502, 503, 504)
+
+
+@dataclass
+class RetryStats:
+    """Счетчики повторов клиента"""
+
+    requests: int = 0
+    retries: int = 0
+    # Запросы, успешные после повтора
+    recovered: int = 0
+    # Повторы, пропущенные из-за исчерпанного бюджета
+    budget_exhausted: int = 0
+
+
+class RetryBudget:
+    """
+    Бюджет повторов
+
+    Каждый обычный запрос пополняет бюджет на ratio, каждый повтор
+    расходует единицу. При массовых ошибках повторы составляют не больше
+    ratio от трафика, поэтому не умножают нагрузку на упавший сервис.
+    """
+
+    def __init__(self, ratio: float, min_retries: int):
+        self.ratio = ratio
+        self.max_balance = float(max(min_retries, 1))
+        self._balance = self.max_balance
+
+    @property
+    def balance(self) -> float:
+        """Доступное количество повторов"""
+        return self._balance
+
+    def deposit(self) -> None:
+        """Учет обычного запроса"""
+        self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """Списание повтора, False если бюджет исчерпан"""
+        if self._balance < 1:
+            return False
+        self._balance -= 1
+        return True
+
+
+class RetryPolicy:
+    """Параметры повторов и бюджет одного клиента"""
+
+    def __init__(
+        self,
+        config: RetryConfig,
+        random_func: Callable[[float, float], float] = random.uniform,
+    ):
+        self.config = config
+        self.budget = RetryBudget(config.budget_ratio, config.budget_min_retries)
+        self.stats = RetryStats()
+        self._random = random_func
+
+    def max_attempts(self, method: str, idempotent: bool) -> int:
+        """Число попыток: повторяются только GET и POST, помеченные безопасными"""
+        if not self.config.enabled:
+            return 1
+        if method.upper() == "GET" or idempotent:
+            return max(self.config.max_attempts, 1)
+        return 1
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед повтором номер attempt (с нуля), full jitter"""
+        cap = min(self.config.max_delay, self.config.base_delay * 2**attempt)
+        return self._random(0, cap)
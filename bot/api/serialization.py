@@ -0,0 +1,101 @@
+"""
+Сериализация JSON для запросов к API и сессии Telegram бота.
+Использует orjson или ujson, если они установлены, иначе стандартный json.
+Бэкенд выбирается переменной JSON_BACKEND (auto, orjson, ujson, json).
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Union
+
+from bot.config import http_client_config
+
+logger = logging.getLogger(__name__)
+
+JsonInput = Union[str, bytes, bytearray]
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    """Набор функций сериализации одного бэкенда"""
+
+    name: str
+    # Объект -> bytes в UTF-8 (тело HTTP запроса)
+    dumps_bytes: Callable[[Any], bytes]
+    # Объект -> str (для aiogram, который ожидает строку)
+    dumps: Callable[[Any], str]
+    loads: Callable[[JsonInput], Any]
+
+
+def _stdlib_codec() -> JsonCodec:
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    return JsonCodec(
+        name="json",
+        dumps_bytes=lambda obj: dumps(obj).encode("utf-8"),
+        dumps=dumps,
+        loads=json.loads,
+    )
+
+
+def _orjson_codec() -> JsonCodec:
+    import orjson
+
+    return JsonCodec(
+        name="orjson",
+        dumps_bytes=orjson.dumps,
+        dumps=lambda obj: orjson.dumps(obj).decode("utf-8"),
+        loads=orjson.loads,
+    )
+
+
+def _ujson_codec() -> JsonCodec:
+    import ujson
+
+    def dumps(obj: Any) -> str:
+        text: str = ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+        return text
+
+    return JsonCodec(
+        name="ujson",
+        dumps_bytes=lambda obj: dumps(obj).encode("utf-8"),
+        dumps=dumps,
+        loads=ujson.loads,
+    )
+
+
+_FACTORIES: Dict[str, Callable[[], JsonCodec]] = {
+    "orjson": _orjson_codec,
+    "ujson": _ujson_codec,
+    "json": _stdlib_codec,
+}
+
+
+def get_codec(backend: str = "auto") -> JsonCodec:
+    """
+    Выбор бэкенда JSON
+
+    Args:
+        backend: auto (самый быстрый из установленных), orjson, ujson или json
+
+    Returns:
+        JsonCodec выбранного бэкенда, json если бэкенд не установлен
+    """
+    names = list(_FACTORIES) if backend == "auto" else [backend, "json"]
+    for name in names:
+        factory = _FACTORIES.get(name)
+        if factory is None:
+            logger.warning(f"Неизвестный JSON бэкенд: {name}")
+            continue
+        try:
+            return factory()
+        except ImportError:
+            if backend != "auto":
+                logger.warning(f"JSON бэкенд {name} не установлен, используем json")
+    return _stdlib_codec()
+
+
+# Глобальный кодек для API клиентов и сессии бота
+json_codec = get_codec(http_client_config.json_backend)
@@ -0,0 +1,127 @@
+"""
+Разбор потоковых ответов API.
+Поддерживаются Server-Sent Events (text/event-stream), обычный JSON и
+текст, передаваемый частями (chunked transfer encoding).
+"""
+
+import codecs
+from typing import Any, AsyncIterator, Optional, Tuple
+
+import aiohttp
+
+from .serialization import json_codec
+
+# Поля события SSE, содержащие текст
+_TEXT_FIELDS = ("delta", "content", "text", "ai_response")
+# Поля JSON ответа целиком: в "text" бэкенд может вернуть исходный запрос
+_BODY_TEXT_FIELDS = ("ai_response", "content", "text", "delta")
+
+# Статусы, которыми бэкенд отвечает на неподдерживаемый потоковый запрос
+STREAM_UNSUPPORTED_STATUSES = (400, 404, 406, 415)
+
+
+class StreamError(Exception):
+    """Потоковый запрос завершился ошибкой"""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        unsupported: bool = False,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        # Бэкенд не поддерживает потоковую передачу, ответ стоит запросить целиком
+        self.unsupported = unsupported or status_code in STREAM_UNSUPPORTED_STATUSES
+
+
+def _payload_text(payload: Any, fields: Tuple[str, ...] = _TEXT_FIELDS) -> str:
+    """Текст из JSON события или ответа; ошибка бэкенда - StreamError"""
+    if isinstance(payload, str):
+        return payload
+    if not isinstance(payload, dict):
+        return ""
+
+    for field in fields:
+        value = payload.get(field)
+        if isinstance(value, str):
+            return value
+    if payload.get("error"):
+        raise StreamError(str(payload["error"]))
+    return ""
+
+
+def _event_text(data: str) -> str:
+    """Текст из поля data события: JSON с одним из полей или строка"""
+    try:
+        payload: Any = json_codec.loads(data)
+    except ValueError:
+        return data
+    if isinstance(payload, (dict, str)):
+        return _payload_text(payload)
+    return data
+
+
+async def _iter_sse(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    data_lines = []
+    async for raw_line in response.content:
+        line = raw_line.decode("utf-8").rstrip("\r\n")
+        if line.startswith("data:"):
+            data_lines.append(line[5:].removeprefix(" "))
+            continue
+        if line or not data_lines:
+            # Поля event, id, retry и комментарии не используются
+            continue
+
+        data = "\n".join(data_lines)
+        data_lines = []
+        if data == "[DONE]":
+            return
+        text = _event_text(data)
+        if text:
+            yield text
+
+    if data_lines and data_lines != ["[DONE]"]:
+        text = _event_text("\n".join(data_lines))
+        if text:
+            yield text
+
+
+async def _iter_chunks(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    # Многобайтовый символ UTF-8 может быть разрезан между частями
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    async for chunk in response.content.iter_any():
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_text(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    """
+    Фрагменты текста ответа в порядке поступления
+
+    Raises:
+        StreamError: ответ другого типа (не поток, не JSON и не текст)
+    """
+    content_type = response.content_type
+    if content_type == "text/event-stream":
+        async for text in _iter_sse(response):
+            yield text
+    elif content_type == "application/json":
+        # Сервер не поддерживает потоковую передачу: ответ целиком
+        body = await response.json(loads=json_codec.loads)
+        text = _payload_text(body, _BODY_TEXT_FIELDS)
+        if text:
+            yield text
+    elif content_type.startswith("text/"):
+        async for text in _iter_chunks(response):
+            yield text
+    else:
+        raise StreamError(
+            f"Unexpected content type {content_type}",
+            response.status,
+            unsupported=True,
+        )
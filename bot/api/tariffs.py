@@ -0,0 +1,107 @@
+"""
+Кэш тарифов по territory_id.
+Таблицы тарифов меняются редко, поэтому успешные ответы хранятся в памяти
+процесса. Одновременные промахи по одной территории загружаются одним
+запросом независимо от настройки HTTP_COALESCE_REQUESTS клиента API.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from bot.config import cache_config
+from bot.utils.cache import TTLCache
+from .base import APIResponse, CoreClient, copy_response, core_client
+from .coalescing import RequestCoalescer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TariffCacheStats:
+    """Счетчики кэша тарифов"""
+
+    hits: int = 0
+    misses: int = 0
+    # Неуспешные загрузки (не кэшируются)
+    errors: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля запросов, обслуженных без обращения к Core API"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TariffCache:
+    """
+    Кэш ответов redis_tariffs
+
+    Хранятся только успешные ответы с данными. Каждый вызывающий получает
+    собственную копию ответа, поэтому изменение данных не портит кэш.
+    """
+
+    def __init__(self, client: CoreClient, ttl: float, maxsize: int):
+        self._client = client
+        self._cache: TTLCache[str, APIResponse] = TTLCache(maxsize, ttl)
+        # Меняется при сбросе, чтобы начатая до него загрузка не попала в кэш
+        self._generation = 0
+        # Одна загрузка на территорию при одновременных промахах
+        self._loads: RequestCoalescer[APIResponse] = RequestCoalescer(copy_response)
+        self._stats = TariffCacheStats()
+
+    async def get(self, territory_id: str) -> APIResponse:
+        """Тарифы территории из кэша или из Core API"""
+        cached = self._cache.get(territory_id)
+        if cached is not None:
+            self._stats.hits += 1
+            return copy_response(cached)
+
+        self._stats.misses += 1
+        # После сброса начатая до него загрузка не используется
+        generation = self._generation
+        return await self._loads.run(
+            (territory_id, generation), lambda: self._load(territory_id, generation)
+        )
+
+    async def _load(self, territory_id: str, generation: int) -> APIResponse:
+        """Загрузка тарифов из Core API с сохранением успешного ответа"""
+        response = await self._client.get_tariffs_from_redis(territory_id)
+        if not response.success or not response.data:
+            self._stats.errors += 1
+        elif generation == self._generation:
+            self._cache.set(territory_id, copy_response(response))
+        return response
+
+    def invalidate(self, territory_id: Optional[str] = None) -> None:
+        """Сброс тарифов территории или всего кэша, если territory_id не указан"""
+        self._generation += 1
+        if territory_id is None:
+            self._cache.clear()
+            logger.info("Кэш тарифов очищен")
+        else:
+            self._cache.pop(territory_id)
+            logger.info(f"Тарифы территории {territory_id} удалены из кэша")
+
+    @property
+    def stats(self) -> TariffCacheStats:
+        """Снимок счетчиков кэша"""
+        return TariffCacheStats(
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            errors=self._stats.errors,
+            size=len(self._cache),
+        )
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._stats = TariffCacheStats()
+
+
+# Глобальный кэш тарифов
+tariff_cache = TariffCache(
+    core_client,
+    ttl=cache_config.tariff_cache_ttl,
+    maxsize=cache_config.tariff_cache_maxsize,
+)
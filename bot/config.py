@@ -1,6 +1,6 @@
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
 # Загружаем переменные окружения из .env файла
@@ -41,6 +41,247 @@ class DatabaseConfig:
     postgres_db: Optional[str] = None
 
 
+@dataclass(frozen=True)
+class CacheConfig:
+    """Конфигурация кэшей в памяти процесса"""
+
+    # Кэш зарегистрированных пользователей
+    user_cache_ttl: float = 3600.0
+    user_cache_negative_ttl: float = 300.0
+    user_cache_maxsize: int = 10000
+    # Кэш тарифов по territory_id
+    tariff_cache_ttl: float = 600.0
+    tariff_cache_maxsize: int = 1000
+    # Кэш результатов поиска адресов в inline режиме
+    address_cache_ttl: float = 300.0
+    address_cache_maxsize: int = 5000
+    # Размер страницы redis_addresses: более короткий список считается полным
+    address_search_page_size: int = 50
+    # Время кэширования inline ответа на стороне Telegram
+    inline_cache_time: int = 300
+    # Кэш ответов на общие вопросы по базе знаний
+    answer_cache_enabled: bool = True
+    answer_cache_ttl: float = 3600.0
+    answer_cache_maxsize: int = 2000
+    # Короткие вопросы обычно уточняют предыдущий ответ и зависят от истории
+    answer_cache_min_words: int = 3
+    # Кэш результатов поиска в Milvus по пользователю и тексту запроса
+    milvus_cache_enabled: bool = True
+    milvus_cache_ttl: float = 600.0
+    milvus_cache_maxsize: int = 5000
+    # Число последних обменов в истории чата (как в выдаче сервиса поиска)
+    milvus_history_turns: int = 5
+
+
+@dataclass(frozen=True)
+class LogShipperConfig:
+    """Конфигурация фоновой отправки логов"""
+
+    enabled: bool = True
+    batch_size: int = 50
+    flush_interval: float = 1.0
+    max_queue: int = 10000
+    # drop_oldest | drop_newest | block
+    overflow_policy: str = "drop_oldest"
+    block_timeout: float = 1.0
+    max_in_flight: int = 4
+    drain_timeout: float = 10.0
+    # Дисковая очередь логов (пустой путь отключает ее)
+    spool_dir: str = ".spool/logs"
+    spool_segment_size: int = 4 * 1024 * 1024
+    spool_max_bytes: int = 256 * 1024 * 1024
+    spool_fsync: bool = True
+    replay_interval: float = 1.0
+    max_replay_backoff: float = 60.0
+
+
+@dataclass(frozen=True)
+class HttpClientConfig:
+    """Конфигурация общего пула HTTP соединений"""
+
+    # Общий лимит соединений и лимит на один хост (0 - без ограничений)
+    pool_limit: int = 200
+    pool_limit_per_host: int = 100
+    # Время жизни неиспользуемого keep-alive соединения
+    keepalive_timeout: float = 30.0
+    # Время кэширования DNS (0 отключает кэш)
+    dns_cache_ttl: int = 300
+    # Таймаут запроса по умолчанию, если вызывающий код не передал свой
+    default_timeout: float = 300.0
+    # Сериализация JSON: auto | orjson | ujson | json
+    json_backend: str = "auto"
+    # Сжатие тел запросов: none | gzip | zstd
+    request_compression: str = "none"
+    # Минимальный размер тела для сжатия
+    compression_min_size: int = 64 * 1024
+    # Тела больше этого размера сжимаются в отдельном потоке
+    compression_offload_size: int = 256 * 1024
+    # Одинаковые одновременные GET запросы выполняются один раз
+    coalesce_requests: bool = True
+
+
+@dataclass(frozen=True)
+class CircuitBreakerConfig:
+    """Конфигурация автоматических выключателей для внешних API"""
+
+    enabled: bool = True
+    # Ошибок подряд до размыкания
+    failure_threshold: int = 5
+    # Время до пробного запроса после размыкания
+    recovery_timeout: float = 30.0
+    # Одновременных пробных запросов в состоянии half-open
+    half_open_max_calls: int = 1
+
+
+@dataclass(frozen=True)
+class RetryConfig:
+    """Конфигурация повторов запросов к внешним API"""
+
+    enabled: bool = True
+    # Всего попыток, включая первую
+    max_attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+    # Доля повторов от обычных запросов клиента
+    budget_ratio: float = 0.1
+    # Запас повторов, доступный и при низком трафике
+    budget_min_retries: int = 10
+
+
+@dataclass(frozen=True)
+class HedgingConfig:
+    """Конфигурация дублирующих (hedged) запросов"""
+
+    enabled: bool = True
+    # Перцентиль задержки, после которого отправляется дубль
+    percentile: float = 0.95
+    # Границы задержки дубля и значение до накопления статистики
+    min_delay: float = 0.05
+    max_delay: float = 1.0
+    default_delay: float = 0.3
+    min_samples: int = 20
+    # Доля дублей от запросов с хеджированием
+    max_ratio: float = 0.05
+    # Запас дублей, доступный и при низком трафике
+    min_hedges: int = 5
+
+
+# Бюджеты запросов по эндпоинтам: (connect, sock_read, total) в секундах
+DEFAULT_ENDPOINT_TIMEOUTS: Dict[str, Tuple[float, float, float]] = {
+    # Поиск адресов на каждое нажатие в inline режиме
+    "redis_addresses": (1.0, 3.0, 5.0),
+    "redis_address_by_id": (1.0, 5.0, 5.0),
+    "redis_tariffs": (2.0, 10.0, 10.0),
+    "v1/mlv_search": (3.0, 20.0, 20.0),
+    # Генерация ответа, в том числе по большим CSV
+    "v1/ai": (5.0, 180.0, 180.0),
+    "v1/auth": (3.0, 10.0, 10.0),
+    "v1/admins": (3.0, 10.0, 10.0),
+    "v1/log": (3.0, 10.0, 10.0),
+    "v1/log/bulk": (3.0, 15.0, 15.0),
+    "v1/upload_wiki_data": (5.0, 600.0, 600.0),
+}
+
+# Долгие административные операции: их обработчики получают отдельный дедлайн
+LONG_RUNNING_ENDPOINTS = ("v1/upload_wiki_data",)
+
+
+@dataclass(frozen=True)
+class TimeoutConfig:
+    """Конфигурация таймаутов внешних API"""
+
+    # Общий бюджет обработки одного апдейта Telegram (0 - без ограничения)
+    request_deadline: float = 240.0
+    endpoint_timeouts: Dict[str, Tuple[float, float, float]] = field(
+        default_factory=lambda: dict(DEFAULT_ENDPOINT_TIMEOUTS)
+    )
+
+    def deadline_for(self, *endpoints: str) -> float:
+        """
+        Дедлайн обработчика, последовательно вызывающего эндпоинты
+
+        Не меньше общего дедлайна и суммы бюджетов эндпоинтов.
+        """
+        if self.request_deadline <= 0:
+            return 0.0
+        budget = sum(self.endpoint_timeouts[endpoint][2] for endpoint in endpoints)
+        return max(self.request_deadline, budget)
+
+
+@dataclass(frozen=True)
+class TelegramRateLimitConfig:
+    """Конфигурация ограничения частоты запросов к Telegram Bot API"""
+
+    enabled: bool = True
+    # Запросов в секунду от всего бота и допустимый всплеск
+    global_rate: float = 30.0
+    global_burst: int = 30
+    # Запросов в секунду в личный чат и в группу, допустимый всплеск в чат
+    chat_rate: float = 1.0
+    group_rate: float = 20 / 60
+    chat_burst: int = 3
+    # Наибольшая пауза RetryAfter, после которой запрос повторяется, секунды
+    max_retry_after: float = 30.0
+    # Индикатор набора, не отправленный за это время, пропускается
+    chat_action_max_wait: float = 3.0
+
+
+@dataclass(frozen=True)
+class QueryPipelineConfig:
+    """Конфигурация обработки текстовых запросов"""
+
+    # Локальная классификация без LLM для однозначных запросов
+    fast_classifier: bool = True
+    # Локальное извлечение адреса вместо разбора ответа LLM
+    local_address_extractor: bool = True
+    # JSON справочник населенных пунктов и улиц (необязательно)
+    address_gazetteer_path: str = ""
+    # Поиск контекста в Milvus параллельно с классификацией через LLM
+    speculative_milvus: bool = True
+    # Классификация и ответ на общий запрос одним вызовом LLM
+    combined_llm_call: bool = False
+    # Ожидание следующего нажатия перед поиском в inline режиме (0 - без ожидания)
+    inline_debounce: float = 0.3
+    # Выгрузка адресов для локального индекса (JSON или JSON Lines, необязательно)
+    address_index_path: str = ""
+    # Интервал проверки изменений файла выгрузки, секунды
+    address_index_refresh: float = 300.0
+    # Минимальная доля совпавших триграмм запроса
+    address_index_min_score: float = 0.6
+    # Доля совпадения, при которой адрес тарифного запроса берется из индекса
+    address_index_route_score: float = 0.9
+    # Показ ответа LLM по мере генерации правками одного сообщения
+    stream_responses: bool = True
+    # Минимальный интервал между правками сообщения, секунды
+    stream_edit_interval: float = 1.0
+    # Индикатор обработки запроса: typing (статус "печатает"), sticker, none
+    progress_style: str = "typing"
+    # Интервал обновления статуса "печатает" (Telegram показывает его ~5 с)
+    progress_refresh: float = 4.5
+    # Задержка первого статуса "печатает": мгновенные ответы обходятся без него
+    progress_delay: float = 0.2
+
+
+def _env_int(name: str, default: int) -> int:
+    """Целочисленная переменная окружения со значением по умолчанию"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Дробная переменная окружения со значением по умолчанию"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Логическая переменная окружения со значением по умолчанию"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 def get_bot_config() -> BotConfig:
     """Получить конфигурацию бота"""
     required_vars = ["TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL", "CORE_URL"]
@@ -77,9 +318,186 @@ def get_database_config() -> DatabaseConfig:
     )
 
 
+def get_cache_config() -> CacheConfig:
+    """Получить конфигурацию кэшей"""
+    return CacheConfig(
+        user_cache_ttl=_env_float("USER_CACHE_TTL", 3600.0),
+        user_cache_negative_ttl=_env_float("USER_CACHE_NEGATIVE_TTL", 300.0),
+        user_cache_maxsize=_env_int("USER_CACHE_MAXSIZE", 10000),
+        tariff_cache_ttl=_env_float("TARIFF_CACHE_TTL", 600.0),
+        tariff_cache_maxsize=_env_int("TARIFF_CACHE_MAXSIZE", 1000),
+        address_cache_ttl=_env_float("ADDRESS_CACHE_TTL", 300.0),
+        address_cache_maxsize=_env_int("ADDRESS_CACHE_MAXSIZE", 5000),
+        address_search_page_size=_env_int("ADDRESS_SEARCH_PAGE_SIZE", 50),
+        inline_cache_time=_env_int("INLINE_CACHE_TIME", 300),
+        answer_cache_enabled=_env_bool("ANSWER_CACHE_ENABLED", True),
+        answer_cache_ttl=_env_float("ANSWER_CACHE_TTL", 3600.0),
+        answer_cache_maxsize=_env_int("ANSWER_CACHE_MAXSIZE", 2000),
+        answer_cache_min_words=_env_int("ANSWER_CACHE_MIN_WORDS", 3),
+        milvus_cache_enabled=_env_bool("MILVUS_CACHE_ENABLED", True),
+        milvus_cache_ttl=_env_float("MILVUS_CACHE_TTL", 600.0),
+        milvus_cache_maxsize=_env_int("MILVUS_CACHE_MAXSIZE", 5000),
+        milvus_history_turns=_env_int("MILVUS_HISTORY_TURNS", 5),
+    )
+
+
+def get_log_shipper_config() -> LogShipperConfig:
+    """Получить конфигурацию фоновой отправки логов"""
+    return LogShipperConfig(
+        enabled=_env_bool("LOG_SHIPPER_ENABLED", True),
+        batch_size=_env_int("LOG_BATCH_SIZE", 50),
+        flush_interval=_env_float("LOG_FLUSH_INTERVAL", 1.0),
+        max_queue=_env_int("LOG_MAX_QUEUE", 10000),
+        overflow_policy=os.getenv("LOG_OVERFLOW_POLICY", "drop_oldest"),
+        block_timeout=_env_float("LOG_BLOCK_TIMEOUT", 1.0),
+        max_in_flight=_env_int("LOG_MAX_IN_FLIGHT", 4),
+        drain_timeout=_env_float("LOG_DRAIN_TIMEOUT", 10.0),
+        spool_dir=os.getenv("LOG_SPOOL_DIR", ".spool/logs"),
+        spool_segment_size=_env_int("LOG_SPOOL_SEGMENT_SIZE", 4 * 1024 * 1024),
+        spool_max_bytes=_env_int("LOG_SPOOL_MAX_BYTES", 256 * 1024 * 1024),
+        spool_fsync=_env_bool("LOG_SPOOL_FSYNC", True),
+        replay_interval=_env_float("LOG_REPLAY_INTERVAL", 1.0),
+        max_replay_backoff=_env_float("LOG_MAX_REPLAY_BACKOFF", 60.0),
+    )
+
+
+def get_http_client_config() -> HttpClientConfig:
+    """Получить конфигурацию пула HTTP соединений"""
+    return HttpClientConfig(
+        pool_limit=_env_int("HTTP_POOL_LIMIT", 200),
+        pool_limit_per_host=_env_int("HTTP_POOL_LIMIT_PER_HOST", 100),
+        keepalive_timeout=_env_float("HTTP_KEEPALIVE_TIMEOUT", 30.0),
+        dns_cache_ttl=_env_int("HTTP_DNS_CACHE_TTL", 300),
+        default_timeout=_env_float("HTTP_DEFAULT_TIMEOUT", 300.0),
+        json_backend=os.getenv("JSON_BACKEND", "auto"),
+        request_compression=os.getenv("HTTP_REQUEST_COMPRESSION", "none"),
+        compression_min_size=_env_int("HTTP_COMPRESSION_MIN_SIZE", 64 * 1024),
+        compression_offload_size=_env_int("HTTP_COMPRESSION_OFFLOAD_SIZE", 256 * 1024),
+        coalesce_requests=_env_bool("HTTP_COALESCE_REQUESTS", True),
+    )
+
+
+def get_circuit_breaker_config() -> CircuitBreakerConfig:
+    """Получить конфигурацию автоматических выключателей"""
+    return CircuitBreakerConfig(
+        enabled=_env_bool("CIRCUIT_BREAKER_ENABLED", True),
+        failure_threshold=_env_int("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5),
+        recovery_timeout=_env_float("CIRCUIT_BREAKER_RECOVERY_TIMEOUT", 30.0),
+        half_open_max_calls=_env_int("CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS", 1),
+    )
+
+
+def get_retry_config() -> RetryConfig:
+    """Получить конфигурацию повторов запросов"""
+    return RetryConfig(
+        enabled=_env_bool("RETRY_ENABLED", True),
+        max_attempts=_env_int("RETRY_MAX_ATTEMPTS", 3),
+        base_delay=_env_float("RETRY_BASE_DELAY", 0.1),
+        max_delay=_env_float("RETRY_MAX_DELAY", 2.0),
+        budget_ratio=_env_float("RETRY_BUDGET_RATIO", 0.1),
+        budget_min_retries=_env_int("RETRY_BUDGET_MIN_RETRIES", 10),
+    )
+
+
+def get_hedging_config() -> HedgingConfig:
+    """Получить конфигурацию дублирующих запросов"""
+    return HedgingConfig(
+        enabled=_env_bool("HEDGING_ENABLED", True),
+        percentile=_env_float("HEDGING_PERCENTILE", 0.95),
+        min_delay=_env_float("HEDGING_MIN_DELAY", 0.05),
+        max_delay=_env_float("HEDGING_MAX_DELAY", 1.0),
+        default_delay=_env_float("HEDGING_DEFAULT_DELAY", 0.3),
+        min_samples=_env_int("HEDGING_MIN_SAMPLES", 20),
+        max_ratio=_env_float("HEDGING_MAX_RATIO", 0.05),
+        min_hedges=_env_int("HEDGING_MIN_HEDGES", 5),
+    )
+
+
+def _parse_endpoint_timeouts(value: str) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Разбор переопределений таймаутов вида
+    "redis_addresses=1:3:5,v1/ai=5:240:240" (connect:sock_read:total)
+    """
+    timeouts: Dict[str, Tuple[float, float, float]] = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        endpoint, _, budgets = item.partition("=")
+        connect, sock_read, total = (float(part) for part in budgets.split(":"))
+        timeouts[endpoint.strip().strip("/")] = (connect, sock_read, total)
+    return timeouts
+
+
+def get_timeout_config() -> TimeoutConfig:
+    """Получить конфигурацию таймаутов"""
+    endpoint_timeouts = dict(DEFAULT_ENDPOINT_TIMEOUTS)
+    endpoint_timeouts.update(
+        _parse_endpoint_timeouts(os.getenv("API_ENDPOINT_TIMEOUTS", ""))
+    )
+    request_deadline = _env_float("REQUEST_DEADLINE", 240.0)
+    if request_deadline > 0:
+        # Дедлайн не должен обрывать запрос раньше бюджета эндпоинта
+        request_deadline = max(
+            request_deadline,
+            *(
+                total
+                for endpoint, (_, _, total) in endpoint_timeouts.items()
+                if endpoint not in LONG_RUNNING_ENDPOINTS
+            ),
+        )
+    return TimeoutConfig(
+        request_deadline=request_deadline,
+        endpoint_timeouts=endpoint_timeouts,
+    )
+
+
+def get_telegram_rate_limit_config() -> TelegramRateLimitConfig:
+    """Получить конфигурацию ограничения частоты запросов к Telegram"""
+    return TelegramRateLimitConfig(
+        enabled=_env_bool("TELEGRAM_RATE_LIMIT_ENABLED", True),
+        global_rate=_env_float("TELEGRAM_GLOBAL_RATE", 30.0),
+        global_burst=_env_int("TELEGRAM_GLOBAL_BURST", 30),
+        chat_rate=_env_float("TELEGRAM_CHAT_RATE", 1.0),
+        group_rate=_env_float("TELEGRAM_GROUP_RATE", 20 / 60),
+        chat_burst=_env_int("TELEGRAM_CHAT_BURST", 3),
+        max_retry_after=_env_float("TELEGRAM_MAX_RETRY_AFTER", 30.0),
+        chat_action_max_wait=_env_float("TELEGRAM_CHAT_ACTION_MAX_WAIT", 3.0),
+    )
+
+
+def get_query_pipeline_config() -> QueryPipelineConfig:
+    """Получить конфигурацию обработки запросов"""
+    return QueryPipelineConfig(
+        fast_classifier=_env_bool("FAST_CLASSIFIER", True),
+        local_address_extractor=_env_bool("LOCAL_ADDRESS_EXTRACTOR", True),
+        address_gazetteer_path=os.getenv("ADDRESS_GAZETTEER_PATH", ""),
+        speculative_milvus=_env_bool("SPECULATIVE_MILVUS", True),
+        combined_llm_call=_env_bool("COMBINED_LLM_CALL", False),
+        inline_debounce=_env_float("INLINE_DEBOUNCE", 0.3),
+        address_index_path=os.getenv("ADDRESS_INDEX_PATH", ""),
+        address_index_refresh=_env_float("ADDRESS_INDEX_REFRESH", 300.0),
+        address_index_min_score=_env_float("ADDRESS_INDEX_MIN_SCORE", 0.6),
+        address_index_route_score=_env_float("ADDRESS_INDEX_ROUTE_SCORE", 0.9),
+        stream_responses=_env_bool("STREAM_RESPONSES", True),
+        stream_edit_interval=_env_float("STREAM_EDIT_INTERVAL", 1.0),
+        progress_style=os.getenv("PROGRESS_STYLE", "typing").strip().lower(),
+        progress_refresh=_env_float("PROGRESS_REFRESH", 4.5),
+        progress_delay=_env_float("PROGRESS_DELAY", 0.2),
+    )
+
+
 # Глобальные экземпляры конфигурации
 bot_config = get_bot_config()
 db_config = get_database_config()
+cache_config = get_cache_config()
+log_shipper_config = get_log_shipper_config()
+http_client_config = get_http_client_config()
+circuit_breaker_config = get_circuit_breaker_config()
+timeout_config = get_timeout_config()
+retry_config = get_retry_config()
+hedging_config = get_hedging_config()
+telegram_rate_limit_config = get_telegram_rate_limit_config()
+query_pipeline_config = get_query_pipeline_config()
 
 # Обратная совместимость (для существующих импортов)
 TOKEN = bot_config.token
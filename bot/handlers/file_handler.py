@@ -11,9 +11,11 @@ import pandas as pd
 import chardet
 
 from bot.utils.decorators import check_and_add_user, send_typing_action
-from bot.config import bot_config
-from bot.api.ai import call_ai
+from bot.utils.progress import progress_tracker
+from bot.api.ai import call_ai_stream
+from bot.config import timeout_config
 from bot.handlers.models import user_model
+from bot.utils.streaming import stream_answer
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -30,7 +32,8 @@ SUPPORTED_MIME_TYPES = [
 
 @router.message(
     lambda message: message.document
-    and message.document.mime_type in SUPPORTED_MIME_TYPES
+    and message.document.mime_type in SUPPORTED_MIME_TYPES,
+    flags={"deadline": timeout_config.deadline_for("v1/ai")},
 )
 @check_and_add_user
 @send_typing_action
@@ -77,6 +80,8 @@ async def handle_file(message: Message):
         return
 
     # Обработка файла в зависимости от типа
+    progress = progress_tracker.start(message)
+
     try:
         if file.mime_type == "text/csv":
             data = await _process_csv_file(file_data, user_id)
@@ -113,17 +118,18 @@ async def handle_file(message: Message):
         query = message.caption if message.caption else "Напиши общий отчет по таблице"
 
         try:
-            loading_message = await message.answer_sticker(bot_config.loading_sticker)
-
-            ai_response = await call_ai(
-                text=query,
-                combined_context=csv_text,
-                input_type="csv",
-                model=user_model.get(user_id, "mistral-large-latest"),
+            # Отчет показывается по мере генерации
+            ai_response = await stream_answer(
+                message,
+                call_ai_stream(
+                    text=query,
+                    combined_context=csv_text,
+                    input_type="csv",
+                    model=user_model.get(user_id, "mistral-large-latest"),
+                ),
             )
 
             if ai_response:
-                await message.answer(ai_response)
                 logger.info(f"Успешно обработан файл пользователя {user_id}")
             else:
                 await message.answer("⚠️ Произошла ошибка при анализе файла в Mistral.")
@@ -148,10 +154,7 @@ async def handle_file(message: Message):
         )
 
     finally:
-        try:
-            await loading_message.delete()
-        except Exception as delete_error:
-            logger.warning(f"Не удалось удалить loading message: {delete_error}")
+        await progress.stop()
 
 
 async def _process_csv_file(file_data: bytes, user_id: int) -> pd.DataFrame | None:
@@ -15,7 +15,7 @@ from aiogram.enums import ParseMode
 from aiogram.fsm.context import FSMContext
 
 from bot.utils.decorators import check_and_add_user, send_typing_action
-from bot.config import bot_config
+from bot.utils.progress import progress_tracker
 from bot.api.log import log
 from bot.handlers.tariff_handler import TariffQuestionForm
 from bot.utils.helpers import (
@@ -88,9 +88,9 @@ async def message_handler(message: Message, state: FSMContext):
 
     user_id = message.from_user.id
 
-    try:
-        loading_message = await message.answer_sticker(bot_config.loading_sticker)
+    progress = progress_tracker.start(message)
 
+    try:
         # Используем новую функцию классификации и обработки запросов
         await classify_and_process_query(message.text, user_id, message)
 
@@ -115,10 +115,7 @@ async def message_handler(message: Message, state: FSMContext):
             logger.error(f"Не удалось отправить сообщение об ошибке: {log_error}")
 
     finally:
-        try:
-            await loading_message.delete()
-        except Exception as delete_error:
-            logger.warning(f"Не удалось удалить loading message: {delete_error}")
+        await progress.stop()
 
 
 # Обработчик callback-запросов для подтверждения адреса
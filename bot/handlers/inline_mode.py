@@ -12,7 +12,9 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 from aiogram.filters import Command
-from bot.api.base import core_client
+from bot.api.addresses import search_addresses
+from bot.config import cache_config
+from bot.utils.coalescer import inline_query_coalescer
 from bot.utils.decorators import check_and_add_user, send_typing_action
 from bot.api.log import log
 
@@ -60,55 +62,10 @@ async def inline_hint(message: Message):
 @check_and_add_user
 async def inline_address_search(inline_query: InlineQuery):
     try:
-        query = inline_query.query.strip()
-        if not query:
-            await inline_query.answer(
-                [],
-                cache_time=1,
-                switch_pm_text="Введите адрес",
-                switch_pm_parameter="start",
-            )
-            return
-
-        # Запрос к redis_addresses
-        api_response = await core_client.get_addresses_from_redis(query)
-        if not api_response.success or not api_response.data:
-            await inline_query.answer(
-                [],
-                cache_time=1,
-                switch_pm_text="Ничего не найдено",
-                switch_pm_parameter="notfound",
-            )
-            return
-
-        addresses = api_response.data.get("addresses")
-        if not isinstance(addresses, list) or not addresses:
-            await inline_query.answer(
-                [],
-                cache_time=1,
-                switch_pm_text="Ничего не найдено",
-                switch_pm_parameter="notfound",
-            )
-            return
-
-        results = []
-        for i, item in enumerate(addresses):
-            terr_id = "terId_" + str(item.get("territory_id", ""))
-            address = item.get("address")
-            territory_name = item.get("territory_name")
-            if not address:
-                continue
-            address = html.escape(address.replace("<>", "?"))
-            results.append(
-                InlineQueryResultArticle(
-                    id=str(item.get("id", i)),
-                    title=territory_name,
-                    description=address,
-                    input_message_content=InputTextMessageContent(message_text=terr_id),
-                )
-            )
-
-        await inline_query.answer(results[:50], cache_time=1)
+        # Пока пользователь печатает, обрабатывается только последний запрос
+        await inline_query_coalescer.run(
+            inline_query.from_user.id, lambda: _answer_address_query(inline_query)
+        )
 
     except Exception as e:
         logger.error(f"Ошибка в inline режиме: {e}")
@@ -121,3 +78,60 @@ async def inline_address_search(inline_query: InlineQuery):
             )
         except Exception as answer_error:
             logger.error(f"Не удалось отправить ответ на inline запрос: {answer_error}")
+
+
+async def _answer_address_query(inline_query: InlineQuery) -> None:
+    """Поиск адресов и ответ на inline запрос"""
+    query = inline_query.query.strip()
+    if not query:
+        await inline_query.answer(
+            [],
+            cache_time=1,
+            switch_pm_text="Введите адрес",
+            switch_pm_parameter="start",
+        )
+        return
+
+    # Локальный индекс или redis_addresses через кэш
+    api_response = await search_addresses(query)
+    if not api_response.success or not api_response.data:
+        await inline_query.answer(
+            [],
+            cache_time=1,
+            switch_pm_text="Ничего не найдено",
+            switch_pm_parameter="notfound",
+        )
+        return
+
+    addresses = api_response.data.get("addresses")
+    if not isinstance(addresses, list) or not addresses:
+        await inline_query.answer(
+            [],
+            cache_time=1,
+            switch_pm_text="Ничего не найдено",
+            switch_pm_parameter="notfound",
+        )
+        return
+
+    results = []
+    for i, item in enumerate(addresses):
+        terr_id = "terId_" + str(item.get("territory_id", ""))
+        address = item.get("address")
+        territory_name = item.get("territory_name")
+        if not address:
+            continue
+        address = html.escape(address.replace("<>", "?"))
+        results.append(
+            InlineQueryResultArticle(
+                id=str(item.get("id", i)),
+                title=territory_name,
+                description=address,
+                input_message_content=InputTextMessageContent(message_text=terr_id),
+            )
+        )
+
+    # Ответ кэшируется Telegram для каждого пользователя отдельно, чтобы
+    # результаты не получали пользователи, не прошедшие проверку доступа
+    await inline_query.answer(
+        results[:50], cache_time=cache_config.inline_cache_time, is_personal=True
+    )
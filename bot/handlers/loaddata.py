@@ -10,8 +10,9 @@ from aiogram.filters import Command
 
 from bot.api.auth import get_admins
 from bot.api.loaddata import upload_wiki_data
+from bot.config import timeout_config
 from bot.utils.decorators import check_and_add_user, send_typing_action
-from bot.config import bot_config
+from bot.utils.progress import progress_tracker
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -19,7 +20,12 @@ logger = logging.getLogger(__name__)
 router = Router()
 
 
-@router.message(Command("loaddata"))
+@router.message(
+    Command("loaddata"),
+    flags={
+        "deadline": timeout_config.deadline_for("v1/admins", "v1/upload_wiki_data")
+    },
+)
 @check_and_add_user
 @send_typing_action
 async def handle_loaddata_command(message: Message):
@@ -30,9 +36,9 @@ async def handle_loaddata_command(message: Message):
 
     user_id = message.from_user.id
 
-    try:
-        loading_message = await message.answer_sticker(bot_config.loading_sticker)
+    progress = progress_tracker.start(message)
 
+    try:
         result = await upload_wiki_data(user_id)
 
         if result["status"] == "success":
@@ -119,7 +125,4 @@ async def handle_loaddata_command(message: Message):
         )
 
     finally:
-        try:
-            await loading_message.delete()
-        except Exception as delete_error:
-            logger.warning(f"Не удалось удалить loading message: {delete_error}")
+        await progress.stop()
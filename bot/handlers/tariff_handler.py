@@ -5,13 +5,14 @@ from aiogram import Router, F
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from bot.api.base import core_client
-from bot.config import bot_config
+from bot.api.tariffs import tariff_cache
+from bot.utils.progress import progress_tracker
 
-from bot.api.ai import call_ai
+from bot.api.ai import call_ai_stream
 from bot.api.log import log
 from bot.utils.decorators import check_and_add_user, send_typing_action
 from bot.utils.user_settings import user_model
+from bot.utils.streaming import stream_answer
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -39,7 +40,7 @@ async def handle_tariff_message(message: Message, state: FSMContext):
         return
 
     terr_id = tariff_code.split("_")[1]
-    api_response = await core_client.get_tariffs_from_redis(terr_id)
+    api_response = await tariff_cache.get(terr_id)
 
     if not api_response.success or not api_response.data:
         await message.answer("⚠️ Что-то пошло не так. Попробуйте позже")
@@ -117,9 +118,9 @@ async def process_tariff_question(message: Message, state: FSMContext):
 
     await state.set_state(TariffQuestionForm.in_tariff_mode)
 
-    try:
-        loading_message = await message.answer_sticker(bot_config.loading_sticker)
+    progress = progress_tracker.start(message)
 
+    try:
         if message.from_user is None:
             await message.answer("⚠️ Непредвиденная ошибка: пользователь не найден.")
             return
@@ -130,21 +131,23 @@ async def process_tariff_question(message: Message, state: FSMContext):
             f"Информация о тарифах для территории {territory_id}:\n{str(tariff_info)}"
         )
 
-        ai_response = await call_ai(
-            text=message.text,
-            combined_context=tariff_context,
-            chat_history=chat_history,
-            model=selected_model,
+        # Ответ показывается по мере генерации под строкой статуса
+        status_bar = f"📍 Территория: {territory_id}\n\n"
+        ai_response = await stream_answer(
+            message,
+            call_ai_stream(
+                text=message.text,
+                combined_context=tariff_context,
+                chat_history=chat_history,
+                model=selected_model,
+            ),
+            prefix=status_bar,
         )
 
         if ai_response:
             new_history = f"{chat_history}\nПользователь: {message.text}\nАссистент: {ai_response}"
             await state.update_data(chat_history=new_history)
 
-            status_bar = f"📍 Территория: {territory_id}\n\n"
-
-            await message.answer(status_bar + ai_response, parse_mode="HTML")
-
             # Логируем успешный ответ
             await log(
                 user_id=message.from_user.id,
@@ -208,10 +211,7 @@ async def process_tariff_question(message: Message, state: FSMContext):
         )
 
     finally:
-        try:
-            await loading_message.delete()
-        except Exception as delete_error:
-            logger.warning(f"Не удалось удалить loading message: {delete_error}")
+        await progress.stop()
 
 
 @router.callback_query(F.data == "continue_tariff")
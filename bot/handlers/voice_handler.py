@@ -12,6 +12,8 @@ from aiogram.enums import ContentType
 from bot.utils.decorators import check_and_add_user, send_typing_action
 from bot.utils.helpers import check_transcription_status
 from bot.config import bot_config
+from bot.utils.progress import progress_tracker
+from bot.api.http import http_client
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -58,73 +60,65 @@ async def handle_audio_or_voice(message: Message):
         await message.answer("❌ Ошибка при получении аудио файла")
         return
 
-    loading_message = await message.answer_sticker(bot_config.loading_sticker)
+    progress = progress_tracker.start(message)
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            # Получаем файл с серверов Telegram
-            file_url = (
-                f"https://api.telegram.org/file/bot{message.bot.token}/{file_path}"
-            )
-
-            async with session.get(file_url) as response:
-                if response.status == 200:
-                    audio_data = await response.read()
-                    form_data = aiohttp.FormData()
-                    form_data.add_field(
-                        "file",
-                        audio_data,
-                        filename="audio.ogg",
-                        content_type="audio/ogg",
-                    )
-
-                    # Отправка файла на API Whisper
-                    async with session.post(
-                        f"{bot_config.whisper_api}/transcribe/", data=form_data
-                    ) as api_response:
-                        if api_response.status == 200:
-                            result = await api_response.json()
-                            task_id = result.get("task_id")
-
-                            if task_id:
-                                logger.info(
-                                    f"Запущена транскрипция для пользователя {user_id}, task_id: {task_id}"
-                                )
-                                # Запуск проверки статуса транскрипции
-                                await check_transcription_status(
-                                    task_id, message, session
-                                )
-                            else:
-                                logger.error(
-                                    f"Не получен task_id для пользователя {user_id}"
-                                )
-                                await message.answer(
-                                    "❌ Ошибка при инициализации транскрипции"
-                                )
+    try:
+        session = await http_client.get_session()
+
+        # Получаем файл с серверов Telegram
+        file_url = f"https://api.telegram.org/file/bot{message.bot.token}/{file_path}"
+
+        async with session.get(file_url) as response:
+            if response.status == 200:
+                audio_data = await response.read()
+                form_data = aiohttp.FormData()
+                form_data.add_field(
+                    "file",
+                    audio_data,
+                    filename="audio.ogg",
+                    content_type="audio/ogg",
+                )
+
+                # Отправка файла на API Whisper
+                async with session.post(
+                    f"{bot_config.whisper_api}/transcribe/", data=form_data
+                ) as api_response:
+                    if api_response.status == 200:
+                        result = await api_response.json()
+                        task_id = result.get("task_id")
+
+                        if task_id:
+                            logger.info(
+                                f"Запущена транскрипция для пользователя {user_id}, task_id: {task_id}"
+                            )
+                            # Запуск проверки статуса транскрипции
+                            await check_transcription_status(task_id, message, session)
                         else:
-                            error_text = await api_response.text()
                             logger.error(
-                                f"Ошибка Whisper API для пользователя {user_id}: {error_text}"
+                                f"Не получен task_id для пользователя {user_id}"
                             )
                             await message.answer(
-                                "❌ Ошибка при отправке файла на транскрипцию. Попробуйте позже."
+                                "❌ Ошибка при инициализации транскрипции"
                             )
-                else:
-                    logger.error(
-                        f"Ошибка при загрузке файла с Telegram для пользователя {user_id}: {response.status}"
-                    )
-                    await message.answer("❌ Ошибка при загрузке аудио файла")
-
-        except Exception as e:
-            logger.exception(
-                f"Ошибка при обработке аудио для пользователя {user_id}: {e}"
-            )
-            await message.answer(
-                "❌ Произошла ошибка при обработке вашего аудио сообщения."
-            )
+                    else:
+                        error_text = await api_response.text()
+                        logger.error(
+                            f"Ошибка Whisper API для пользователя {user_id}: {error_text}"
+                        )
+                        await message.answer(
+                            "❌ Ошибка при отправке файла на транскрипцию. Попробуйте позже."
+                        )
+            else:
+                logger.error(
+                    f"Ошибка при загрузке файла с Telegram для пользователя {user_id}: {response.status}"
+                )
+                await message.answer("❌ Ошибка при загрузке аудио файла")
+
+    except Exception as e:
+        logger.exception(f"Ошибка при обработке аудио для пользователя {user_id}: {e}")
+        await message.answer(
+            "❌ Произошла ошибка при обработке вашего аудио сообщения."
+        )
 
-        finally:
-            try:
-                await loading_message.delete()
-            except Exception as delete_error:
-                logger.warning(f"Не удалось удалить loading message: {delete_error}")
+    finally:
+        await progress.stop()
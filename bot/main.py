@@ -16,8 +16,22 @@ from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.types import BotCommand
 
 from bot.handlers import register_all_handlers
-from bot.config import bot_config
+from bot.config import (
+    bot_config,
+    log_shipper_config,
+    query_pipeline_config,
+    timeout_config,
+)
+from bot.api.answers import answer_cache
+from bot.api.http import http_client
+from bot.api.log import log_shipper
+from bot.api.serialization import json_codec
+from bot.utils.address_extractor import address_extractor
+from bot.utils.address_index import local_address_index
 from bot.utils.logger import setup_logger, setup_root_logger
+from bot.utils.middlewares import DeadlineMiddleware
+from bot.utils.progress import progress_tracker
+from bot.utils.telegram_limiter import RateLimitMiddleware, telegram_scheduler
 
 # Настройка корневого логирования в самом начале
 setup_root_logger(level=logging.INFO)
@@ -36,7 +50,11 @@ class BotApplication:
 
     async def _create_bot(self) -> Bot:
         """Создание экземпляра бота"""
-        session = AiohttpSession()
+        session = AiohttpSession(
+            json_loads=json_codec.loads, json_dumps=json_codec.dumps
+        )
+        # Ограничение частоты запросов к Telegram с учетом RetryAfter
+        session.middleware(RateLimitMiddleware(telegram_scheduler))
         return Bot(
             token=bot_config.token,
             default=DefaultBotProperties(parse_mode=ParseMode.HTML),
@@ -73,6 +91,18 @@ class BotApplication:
             self.bot = await self._create_bot()
             self.dp = Dispatcher()
 
+            # Общий пул HTTP соединений
+            await http_client.start()
+
+            # Дедлайн обработки каждого апдейта с учетом флагов обработчика
+            deadline_middleware = DeadlineMiddleware(timeout_config.request_deadline)
+            for observer in (
+                self.dp.message,
+                self.dp.callback_query,
+                self.dp.inline_query,
+            ):
+                observer.middleware(deadline_middleware)
+
             # Регистрация обработчиков
             register_all_handlers(self.dp)
             logger.info("Обработчики зарегистрированы")
@@ -80,6 +110,23 @@ class BotApplication:
             # Настройка команд
             await self._setup_commands()
 
+            # Справочник адресов для локального извлечения
+            if query_pipeline_config.address_gazetteer_path:
+                try:
+                    address_extractor.load_gazetteer(
+                        query_pipeline_config.address_gazetteer_path
+                    )
+                except Exception as e:
+                    logger.warning(f"Не удалось загрузить справочник адресов: {e}")
+
+            # Локальный индекс адресов загружается и обновляется в фоне
+            if query_pipeline_config.address_index_path:
+                local_address_index.start()
+
+            # Фоновая отправка логов
+            if log_shipper_config.enabled:
+                log_shipper.start()
+
             logger.info("Бот успешно инициализирован")
 
         except Exception as e:
@@ -99,6 +146,21 @@ class BotApplication:
                 except Exception as e:
                     logger.warning(f"Ошибка при остановке диспетчера: {e}")
 
+            # Останавливаем обновление индекса адресов
+            await local_address_index.stop()
+
+            # Отправляем накопленные логи
+            try:
+                await log_shipper.stop(timeout=log_shipper_config.drain_timeout)
+            except Exception as e:
+                logger.warning(f"Ошибка при остановке отправки логов: {e}")
+
+            # Закрываем пул HTTP соединений после отправки логов
+            try:
+                await http_client.close()
+            except Exception as e:
+                logger.warning(f"Ошибка при закрытии пула HTTP соединений: {e}")
+
             # Затем закрываем сессию бота
             if self.bot:
                 try:
@@ -107,6 +169,31 @@ class BotApplication:
                 except Exception as e:
                     logger.warning(f"Ошибка при закрытии сессии бота: {e}")
 
+            stats = answer_cache.stats
+            logger.info(
+                f"Кэш ответов: попаданий {stats.hits} ({stats.hit_rate:.0%}), "
+                f"сэкономлено {stats.saved_time:.0f} с генерации"
+            )
+
+            telegram_stats = telegram_scheduler.stats
+            logger.info(
+                f"Запросы к Telegram: {telegram_stats.requests}, "
+                f"ожидали квоту {telegram_stats.throttled} "
+                f"(в среднем {telegram_stats.avg_wait * 1000:.0f} мс, "
+                f"максимум {telegram_stats.max_wait:.1f} с), "
+                f"наибольшая очередь {telegram_stats.max_queue_depth}, "
+                f"RetryAfter {telegram_stats.retry_after}, "
+                f"пропущено индикаторов {telegram_stats.dropped}"
+            )
+
+            progress_stats = progress_tracker.stats
+            logger.info(
+                f"Индикаторы обработки: {progress_stats.indicators}, "
+                f"вызовов Telegram {progress_stats.calls} "
+                f"({progress_stats.calls_per_indicator:.1f} на запрос), "
+                f"сэкономлено по сравнению со стикером {progress_stats.saved_calls}"
+            )
+
             logger.info("Завершение работы выполнено успешно")
 
         except Exception as e:
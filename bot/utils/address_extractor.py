@@ -0,0 +1,389 @@
+"""
+Локальное извлечение адреса из текста запроса.
+Распознает сокращения российских адресов и названия из справочника
+населенных пунктов и улиц без обращения к LLM.
+"""
+
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Порядок компонентов в нормализованном адресе
+_COMPONENT_ORDER = (
+    "region",
+    "district",
+    "settlement",
+    "street",
+    "house",
+    "corpus",
+    "building",
+    "apartment",
+)
+
+# Тип объекта -> (вид компонента, каноническое сокращение)
+_TYPE_ALIASES: Dict[str, Tuple[str, str]] = {
+    "обл": ("region", "обл."),
+    "область": ("region", "обл."),
+    "р-н": ("district", "р-н"),
+    "район": ("district", "р-н"),
+    "г": ("settlement", "г."),
+    "город": ("settlement", "г."),
+    "пос": ("settlement", "пос."),
+    "п": ("settlement", "пос."),
+    "поселок": ("settlement", "пос."),
+    "пгт": ("settlement", "пгт"),
+    "с": ("settlement", "с."),
+    "село": ("settlement", "с."),
+    "д": ("settlement", "д."),
+    "дер": ("settlement", "д."),
+    "деревня": ("settlement", "д."),
+    "снт": ("settlement", "снт"),
+    "мкр": ("settlement", "мкр."),
+    "микрорайон": ("settlement", "мкр."),
+    "ул": ("street", "ул."),
+    "улица": ("street", "ул."),
+    "пр": ("street", "пр."),
+    "пр-т": ("street", "пр."),
+    "пр-кт": ("street", "пр."),
+    "проспект": ("street", "пр."),
+    "ш": ("street", "ш."),
+    "шоссе": ("street", "ш."),
+    "пер": ("street", "пер."),
+    "переулок": ("street", "пер."),
+    "пл": ("street", "пл."),
+    "площадь": ("street", "пл."),
+    "б-р": ("street", "б-р"),
+    "бульвар": ("street", "б-р"),
+    "наб": ("street", "наб."),
+    "набережная": ("street", "наб."),
+}
+
+_NUMBER_PREFIXES = {
+    "house": "д.",
+    "corpus": "корп.",
+    "building": "стр.",
+    "apartment": "кв.",
+}
+
+# Перед заглавной буквой (проверка без учета флага IGNORECASE)
+_BEFORE_CAPITAL = r"(?=\s*(?-i:[А-ЯЁ]))"
+
+# Сокращение с необязательной точкой или полное слово. Однобуквенные
+# сокращения населенных пунктов требуют название с заглавной буквы,
+# чтобы "д. 5" оставался домом, а "п. 3" не становился поселком
+_TYPE_RE = (
+    rf"(?:обл(?:\.|асть\b)|р-н\b|район\b|г\.|г\b{_BEFORE_CAPITAL}|город\b|пгт\b"
+    rf"|пос(?:\.|[её]лок\b)|п\.{_BEFORE_CAPITAL}|с\.{_BEFORE_CAPITAL}|село\b"
+    rf"|д\.{_BEFORE_CAPITAL}|дер(?:\.|евня\b)|снт\b|мкр(?:\.|\b|орайон\b)"
+    r"|ул(?:\.|\b|ица\b)|пр-к?т\b|пр(?:\.|оспект\b)|ш(?:\.|оссе\b)"
+    r"|пер(?:\.|\b|еулок\b)|пл(?:\.|ощадь\b)|б-р\b|бульвар\b|наб(?:\.|ережная\b))"
+)
+
+# Тип объекта, записываемый после названия: "Пермская обл.", "Ленина ул."
+_SUFFIX_TYPE_RE = (
+    r"(?:обл(?:\.|асть\b)|р-н\b|район\b|ул(?:\.|\b|ица\b)|ш(?:\.|оссе\b)"
+    r"|пер(?:\.|еулок\b)|пр-к?т\b|проспект\b|б-р\b|бульвар\b)"
+)
+
+# Номер в начале названия: "1-я Советская", "8 Марта"
+_ORDINAL_RE = r"(?:\d+(?:-?(?:й|я|е|ой|ая|го))?\s+)"
+
+# Название: необязательный номер и одно-два слова. Второе слово пишется с
+# заглавной буквы и не должно быть названием следующего объекта ("д. Ивановка
+# Кунгурский р-н")
+_NAME_RE = (
+    rf"{_ORDINAL_RE}?[А-ЯЁа-яёA-Za-z][\wЁё-]*"
+    rf"(?:\s+(?-i:[А-ЯЁ])[\wЁё-]*(?![\wЁё-])(?!\s+{_SUFFIX_TYPE_RE}))?"
+)
+
+_NUMBER_RE = r"\d+[а-яА-Я]?(?:/\d+[а-яА-Я]?)?"
+
+# "ул. Ленина", "г Пермь", "улица 8 Марта"
+_TYPED_PREFIX_RE = re.compile(
+    rf"(?<![\wЁё-])(?P<type>{_TYPE_RE})\s*(?P<name>{_NAME_RE})",
+    re.IGNORECASE,
+)
+
+# "Пермская обл.", "Кунгурский р-н", "Космонавтов ш.", "1-я Красноармейская ул."
+_TYPED_SUFFIX_RE = re.compile(
+    rf"(?<![\wЁё-])(?P<name>{_ORDINAL_RE}?[А-ЯЁ][\wЁё-]*)\s+"
+    rf"(?P<type>{_SUFFIX_TYPE_RE})"
+)
+
+# "д. 5", "дом 5а", "корп. 2", "стр 1", "кв. 12"
+_NUMBERED_RE = re.compile(
+    rf"(?<![\wЁё-])(?P<type>д(?:\.|ом\b)?|корп(?:\.|ус\b)?|к\.|стр(?:\.|оение\b)?"
+    rf"|кв(?:\.|артира\b)?)\s*(?P<value>{_NUMBER_RE})(?![\wЁё])",
+    re.IGNORECASE,
+)
+
+# Номер дома сразу после названия улицы: "ул. Ленина 5", "Ленина, 5"
+_TRAILING_HOUSE_RE = re.compile(rf"^\s*,?\s*(?P<value>{_NUMBER_RE})(?![\wЁё])")
+
+_NUMBERED_KINDS = {
+    "д": "house",
+    "дом": "house",
+    "корп": "corpus",
+    "корпус": "corpus",
+    "к": "corpus",
+    "стр": "building",
+    "строение": "building",
+    "кв": "apartment",
+    "квартира": "apartment",
+}
+
+
+@dataclass(frozen=True)
+class AddressComponent:
+    """Компонент адреса с позицией в исходном тексте"""
+
+    kind: str
+    value: str
+    start: int
+    end: int
+    # Каноническое сокращение типа объекта (ул., г., д. ...)
+    type_abbr: str = ""
+
+
+@dataclass
+class AddressMatch:
+    """Найденный в тексте адрес"""
+
+    components: List[AddressComponent] = field(default_factory=list)
+
+    @property
+    def spans(self) -> List[Tuple[int, int]]:
+        """Позиции компонентов адреса в исходном тексте"""
+        return [(c.start, c.end) for c in self.components]
+
+    @property
+    def normalized(self) -> str:
+        """Адрес в каноническом виде: 'г. Пермь, ул. Ленина, д. 5'"""
+        parts = []
+        for component in self.components:
+            if component.kind in ("region", "district"):
+                parts.append(f"{component.value} {component.type_abbr}".strip())
+            else:
+                parts.append(f"{component.type_abbr} {component.value}".strip())
+        return ", ".join(parts)
+
+    def get(self, kind: str) -> Optional[str]:
+        """Значение компонента по виду"""
+        for component in self.components:
+            if component.kind == kind:
+                return component.value
+        return None
+
+
+@dataclass
+class AddressExtractorStats:
+    """Счетчики извлечения адресов"""
+
+    calls: int = 0
+    found: int = 0
+    total_time: float = 0.0
+
+    @property
+    def avg_time_us(self) -> float:
+        """Среднее время извлечения в микросекундах"""
+        return self.total_time / self.calls * 1e6 if self.calls else 0.0
+
+
+def _normalize_name(name: str) -> str:
+    """Приведение названия к виду 'Ленина', '8 Марта', 'Малая Ямская'"""
+    words = name.split()
+    return " ".join(w[:1].upper() + w[1:] if w[:1].isalpha() else w for w in words)
+
+
+def _normalize_number(value: str) -> str:
+    return re.sub(r"\s+", "", value).lower()
+
+
+class AddressExtractor:
+    """
+    Извлечение адреса по сокращениям и справочнику названий
+
+    Справочник (gazetteer) позволяет находить населенные пункты и улицы,
+    написанные без указания типа: "Пермь, Ленина 5".
+    """
+
+    def __init__(
+        self,
+        settlements: Iterable[str] = (),
+        streets: Iterable[str] = (),
+    ):
+        self._gazetteer: Dict[str, Tuple[str, str]] = {}
+        self._gazetteer_re: Optional[Pattern[str]] = None
+        self._stats = AddressExtractorStats()
+        self.load_names(settlements=settlements, streets=streets)
+
+    @property
+    def stats(self) -> AddressExtractorStats:
+        """Снимок счетчиков"""
+        return AddressExtractorStats(
+            calls=self._stats.calls,
+            found=self._stats.found,
+            total_time=self._stats.total_time,
+        )
+
+    @property
+    def gazetteer_size(self) -> int:
+        """Количество названий в справочнике"""
+        return len(self._gazetteer)
+
+    def load_names(
+        self, settlements: Iterable[str] = (), streets: Iterable[str] = ()
+    ) -> None:
+        """Добавление названий в справочник и перекомпиляция шаблона"""
+        for name in settlements:
+            if name.strip():
+                self._gazetteer[name.strip().lower().replace("ё", "е")] = (
+                    "settlement",
+                    name.strip(),
+                )
+        for name in streets:
+            if name.strip():
+                self._gazetteer[name.strip().lower().replace("ё", "е")] = (
+                    "street",
+                    name.strip(),
+                )
+
+        if self._gazetteer:
+            # Длинные названия проверяются первыми: "Нижний Новгород" раньше "Новгород"
+            names = sorted(self._gazetteer, key=len, reverse=True)
+            alternation = "|".join(re.escape(name) for name in names)
+            self._gazetteer_re = re.compile(
+                rf"(?<![\wЁё-])(?:{alternation})(?![\wЁё-])", re.IGNORECASE
+            )
+
+    def load_gazetteer(self, path: str) -> None:
+        """
+        Загрузка справочника из JSON файла
+
+        Формат: {"settlements": ["Пермь", ...], "streets": ["Ленина", ...]}
+        """
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        self.load_names(
+            settlements=data.get("settlements", []), streets=data.get("streets", [])
+        )
+        logger.info(
+            f"Загружен справочник адресов {path}: {self.gazetteer_size} названий"
+        )
+
+    def extract(self, text: str) -> Optional[AddressMatch]:
+        """
+        Поиск адреса в тексте
+
+        Returns:
+            AddressMatch или None, если не найден ни населенный пункт, ни улица
+        """
+        started = time.perf_counter()
+        self._stats.calls += 1
+        try:
+            match = self._extract(text)
+        finally:
+            self._stats.total_time += time.perf_counter() - started
+        if match:
+            self._stats.found += 1
+        return match
+
+    def _extract(self, text: str) -> Optional[AddressMatch]:
+        found: Dict[str, AddressComponent] = {}
+        occupied: List[Tuple[int, int]] = []
+
+        def overlaps(start: int, end: int) -> bool:
+            return any(start < o_end and o_start < end for o_start, o_end in occupied)
+
+        def add(component: AddressComponent) -> None:
+            if component.kind in found or overlaps(component.start, component.end):
+                return
+            found[component.kind] = component
+            occupied.append((component.start, component.end))
+
+        # Номера: дом, корпус, строение, квартира ("д." перед числом - это дом)
+        for m in _NUMBERED_RE.finditer(text):
+            type_key = m.group("type").lower().rstrip(".")
+            kind = _NUMBERED_KINDS.get(type_key)
+            if kind:
+                add(
+                    AddressComponent(
+                        kind,
+                        _normalize_number(m.group("value")),
+                        m.start(),
+                        m.end(),
+                        _NUMBER_PREFIXES[kind],
+                    )
+                )
+
+        # Объекты с типом перед названием
+        for m in _TYPED_PREFIX_RE.finditer(text):
+            type_key = m.group("type").lower().rstrip(".").replace("ё", "е")
+            alias = _TYPE_ALIASES.get(type_key)
+            if not alias:
+                continue
+            kind, abbr = alias
+            name = self._canonical_name(m.group("name"))
+            add(AddressComponent(kind, name, m.start(), m.end(), abbr))
+            if kind == "street":
+                self._add_trailing_house(text, m.end(), add)
+
+        # Объекты с типом после названия
+        for m in _TYPED_SUFFIX_RE.finditer(text):
+            type_key = m.group("type").lower().rstrip(".")
+            alias = _TYPE_ALIASES.get(type_key)
+            if not alias:
+                continue
+            kind, abbr = alias
+            name = self._canonical_name(m.group("name"))
+            add(AddressComponent(kind, name, m.start(), m.end(), abbr))
+            if kind == "street":
+                self._add_trailing_house(text, m.end(), add)
+
+        # Названия из справочника без указания типа
+        if self._gazetteer_re:
+            for m in self._gazetteer_re.finditer(text):
+                key = m.group(0).lower().replace("ё", "е")
+                kind, canonical = self._gazetteer[key]
+                abbr = "г." if kind == "settlement" else "ул."
+                before = len(found)
+                add(AddressComponent(kind, canonical, m.start(), m.end(), abbr))
+                if kind == "street" and len(found) > before:
+                    self._add_trailing_house(text, m.end(), add)
+
+        if "settlement" not in found and "street" not in found:
+            return None
+
+        components = [found[kind] for kind in _COMPONENT_ORDER if kind in found]
+        return AddressMatch(components=components)
+
+    def _canonical_name(self, name: str) -> str:
+        """Название в написании справочника или с заглавной буквы"""
+        entry = self._gazetteer.get(name.lower().replace("ё", "е"))
+        return entry[1] if entry else _normalize_name(name)
+
+    @staticmethod
+    def _add_trailing_house(
+        text: str, position: int, add: Callable[[AddressComponent], None]
+    ) -> None:
+        """Номер дома, записанный сразу после улицы без 'д.'"""
+        m = _TRAILING_HOUSE_RE.match(text[position:])
+        if m:
+            add(
+                AddressComponent(
+                    "house",
+                    _normalize_number(m.group("value")),
+                    position + m.start("value"),
+                    position + m.end("value"),
+                    _NUMBER_PREFIXES["house"],
+                )
+            )
+
+
+# Глобальный экземпляр, справочник подгружается из ADDRESS_GAZETTEER_PATH
+address_extractor = AddressExtractor()
@@ -0,0 +1,459 @@
+"""
+Локальный индекс адресов для inline режима и тарифных запросов.
+Адреса загружаются из файла выгрузки и ищутся по триграммам нормализованного
+текста, что допускает опечатки и недописанное последнее слово. Файл
+периодически перечитывается в фоне, если он изменился.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from bot.config import query_pipeline_config
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[\wЁё]+")
+
+
+def normalize_address(text: str) -> str:
+    """Нижний регистр, ё -> е, без знаков препинания и лишних пробелов"""
+    return " ".join(_TOKEN_RE.findall(text.lower().replace("ё", "е")))
+
+
+def _trigrams(token: str, partial: bool = False) -> List[str]:
+    """
+    Уникальные триграммы слова, дополненного пробелами
+
+    Для недописанного слова (partial) пробел добавляется только в начало.
+    """
+    padded = f" {token}" if partial else f" {token} "
+    grams: Dict[str, None] = {}
+    for i in range(len(padded) - 2):
+        grams[padded[i : i + 3]] = None
+    return list(grams)
+
+
+def _contains(posting: "array[int]", doc: int) -> bool:
+    i = bisect_left(posting, doc)
+    return i < len(posting) and posting[i] == doc
+
+
+def _intersect(
+    candidates: List[int], postings: List["array[int]"], size: int
+) -> List[int]:
+    """Кандидаты, входящие хотя бы в один из отсортированных массивов"""
+    # Двоичный поиск дешевле, пока кандидатов намного меньше, чем адресов
+    # в массивах; иначе пересекаем множества за один проход по массивам
+    if len(candidates) * len(postings) * 20 < size:
+        return [
+            doc
+            for doc in candidates
+            if any(_contains(posting, doc) for posting in postings)
+        ]
+
+    pending = set(candidates)
+    found: Set[int] = set()
+    for posting in postings:
+        found.update(pending.intersection(posting))
+    return sorted(found)
+
+
+@dataclass(frozen=True)
+class AddressHit:
+    """Найденный адрес"""
+
+    id: str
+    address: str
+    territory_id: str
+    territory_name: str
+    conn_type: Tuple[str, ...]
+    # Доля слов запроса, найденных в этом адресе (с учетом похожести)
+    score: float
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Адрес в формате ответа redis_addresses"""
+        return {
+            "id": self.id,
+            "address": self.address,
+            "territory_id": self.territory_id,
+            "territory_name": self.territory_name,
+            "conn_type": list(self.conn_type),
+        }
+
+
+class AddressIndex:
+    """
+    Неизменяемый индекс адресов
+
+    Данные хранятся в списках и массивах array по номеру адреса; адреса
+    нумеруются по возрастанию длины, поэтому при равной оценке в выдачу
+    попадают адреса с меньшими номерами. Повторяющиеся
+    территории и наборы типов подключения хранятся один раз, в адресах - их
+    номера. Для каждого слова словаря хранится отсортированный массив номеров
+    адресов. Слова с опечатками сопоставляются со словарем по триграммам,
+    недописанное последнее слово запроса - по префиксу.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[Dict[str, Any]],
+        fuzzy_threshold: float = 0.5,
+        max_expansions: int = 50,
+        common_ratio: float = 0.05,
+    ):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_expansions = max_expansions
+        # Доля адресов, начиная с которой слово считается частым
+        self.common_ratio = common_ratio
+
+        self._ids: List[str] = []
+        self._addresses: List[str] = []
+        self._territories: List[Tuple[str, str]] = []
+        self._territory_refs = array("I")
+        self._conn_types: List[Tuple[str, ...]] = []
+        self._conn_type_refs = array("H")
+
+        territory_numbers: Dict[Tuple[str, str], int] = {}
+        conn_type_numbers: Dict[Tuple[str, ...], int] = {}
+        self._words: Dict[str, int] = {}
+        postings: List[List[int]] = []
+
+        by_length = sorted(records, key=lambda record: len(record.get("address") or ""))
+        for record in by_length:
+            address = record.get("address")
+            if not address:
+                continue
+
+            doc = len(self._addresses)
+            self._ids.append(str(record.get("id", doc)))
+            self._addresses.append(address)
+
+            territory = (
+                str(record.get("territory_id") or ""),
+                str(record.get("territory_name") or ""),
+            )
+            number = territory_numbers.setdefault(territory, len(self._territories))
+            if number == len(self._territories):
+                self._territories.append(territory)
+            self._territory_refs.append(number)
+
+            conn_type = tuple(record.get("conn_type") or ())
+            number = conn_type_numbers.setdefault(conn_type, len(self._conn_types))
+            if number == len(self._conn_types):
+                self._conn_types.append(conn_type)
+            self._conn_type_refs.append(number)
+
+            for word in set(normalize_address(f"{territory[1]} {address}").split()):
+                word_id = self._words.setdefault(word, len(postings))
+                if word_id == len(postings):
+                    postings.append([])
+                postings[word_id].append(doc)
+
+        # Номера добавлялись по возрастанию, массивы уже отсортированы
+        self._postings: List["array[int]"] = [array("I", docs) for docs in postings]
+
+        # Словарь по алфавиту для поиска по префиксу
+        self._sorted_words = sorted(self._words)
+        # Триграммы слов словаря для сопоставления слов с опечатками
+        self._word_grams = array("H")
+        word_trigrams: Dict[str, List[int]] = {}
+        for word, word_id in sorted(self._words.items(), key=lambda item: item[1]):
+            grams = _trigrams(word)
+            self._word_grams.append(len(grams))
+            for gram in grams:
+                word_trigrams.setdefault(gram, []).append(word_id)
+        self._trigrams: Dict[str, "array[int]"] = {
+            gram: array("I", ids) for gram, ids in word_trigrams.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    @property
+    def word_count(self) -> int:
+        """Размер словаря"""
+        return len(self._words)
+
+    def _hit(self, doc: int, score: float) -> AddressHit:
+        territory_id, territory_name = self._territories[self._territory_refs[doc]]
+        return AddressHit(
+            id=self._ids[doc],
+            address=self._addresses[doc],
+            territory_id=territory_id,
+            territory_name=territory_name,
+            conn_type=self._conn_types[self._conn_type_refs[doc]],
+            score=score,
+        )
+
+    def _prefix_words(self, prefix: str) -> Optional[List[int]]:
+        """Слова с префиксом, None если их больше max_expansions"""
+        words: List[int] = []
+        i = bisect_left(self._sorted_words, prefix)
+        while i < len(self._sorted_words) and self._sorted_words[i].startswith(prefix):
+            if len(words) == self.max_expansions:
+                return None
+            words.append(self._words[self._sorted_words[i]])
+            i += 1
+        return words
+
+    def _similar_words(self, word: str, partial: bool) -> List[Tuple[int, float]]:
+        """Слова словаря, похожие по триграммам (коэффициент Дайса)"""
+        grams = _trigrams(word, partial)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for word_id in self._trigrams.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        similar = []
+        for word_id, count in shared.items():
+            similarity = 2 * count / (len(grams) + self._word_grams[word_id])
+            if similarity >= self.fuzzy_threshold:
+                similar.append((word_id, similarity))
+        return heapq.nlargest(3, similar, key=lambda item: item[1])
+
+    def _match_word(
+        self, word: str, partial: bool
+    ) -> Optional[List[Tuple[int, float]]]:
+        """
+        Слова словаря для слова запроса с их похожестью
+
+        Returns:
+            Список (номер слова, похожесть), пустой если совпадений нет,
+            None если слово слишком общее, чтобы сузить поиск
+        """
+        if partial:
+            words = self._prefix_words(word)
+            if words is None:
+                return None
+            if words:
+                return [(word_id, 1.0) for word_id in words]
+        elif word in self._words:
+            return [(self._words[word], 1.0)]
+        return self._similar_words(word, partial)
+
+    def _doc_score(self, doc: int, matches: List[List[Tuple[int, float]]]) -> float:
+        """Сумма похожести слов запроса, найденных в адресе"""
+        score = 0.0
+        for matched in matches:
+            score += max(
+                (
+                    similarity
+                    for word_id, similarity in matched
+                    if _contains(self._postings[word_id], doc)
+                ),
+                default=0.0,
+            )
+        return score
+
+    def search(
+        self, query: str, limit: int = 10, min_score: float = 0.6
+    ) -> List[AddressHit]:
+        """
+        Поиск адресов, содержащих все найденные в словаре слова запроса
+
+        Слово запроса без совпадений в словаре не сужает поиск, но уменьшает
+        оценку. Последнее слово считается недописанным.
+
+        Returns:
+            Адреса по убыванию оценки, при равенстве - более короткие
+        """
+        words = normalize_address(query).split()
+        if not words:
+            return []
+
+        total = 0
+        score = 0.0
+        # Для каждого слова запроса: варианты (номер слова, похожесть)
+        matches: List[List[Tuple[int, float]]] = []
+        for position, word in enumerate(words):
+            matched = self._match_word(word, partial=position == len(words) - 1)
+            if matched is None:
+                continue
+            total += 1
+            if matched:
+                matches.append(matched)
+                score += max(similarity for _, similarity in matched)
+
+        if not matches or score / total < min_score:
+            return []
+
+        # Начинаем с самого редкого слова, остальные проверяем поиском в массивах
+        matches.sort(key=lambda m: sum(len(self._postings[w]) for w, _ in m))
+        first, rest = matches[0], matches[1:]
+        candidates = sorted(
+            {doc for word_id, _ in first for doc in self._postings[word_id]}
+        )
+        applied = [True]
+        common = len(self._addresses) * self.common_ratio
+        for matched in rest:
+            postings = [self._postings[word_id] for word_id, _ in matched]
+            size = sum(map(len, postings))
+            # Частые слова (д, ул, пер) почти не сужают поиск, а проверка
+            # большого числа кандидатов по ним дорогая
+            skip = len(candidates) > 256 and size > common
+            applied.append(not skip)
+            if skip:
+                continue
+            candidates = _intersect(candidates, postings, size)
+            if not candidates:
+                return []
+
+        # Слово, участвовавшее в отборе, есть в каждом кандидате: при
+        # одинаковой похожести вариантов его вклад не зависит от адреса
+        constant = 0.0
+        variable: List[List[Tuple[int, float]]] = []
+        for matched, used in zip(matches, applied):
+            similarities = {similarity for _, similarity in matched}
+            if used and len(similarities) == 1:
+                constant += similarities.pop()
+            else:
+                variable.append(matched)
+
+        # Кандидаты идут по возрастанию длины адреса: после limit адресов
+        # с наибольшей возможной оценкой остальные уже не попадут в выдачу
+        top_score = round(score / total, 3)
+        scored: List[Tuple[float, int]] = []
+        perfect = 0
+        for doc in candidates:
+            doc_score = round((constant + self._doc_score(doc, variable)) / total, 3)
+            if doc_score < min_score:
+                continue
+            scored.append((doc_score, doc))
+            if doc_score >= top_score:
+                perfect += 1
+                if perfect == limit:
+                    break
+
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+        return [self._hit(doc, doc_score) for doc_score, doc in best]
+
+
+def _read_snapshot(path: str) -> List[Dict[str, Any]]:
+    """Чтение выгрузки адресов: JSON массив или JSON Lines"""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    if content.lstrip().startswith("["):
+        records: List[Dict[str, Any]] = json.loads(content)
+        return records
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+@dataclass
+class AddressIndexStats:
+    """Счетчики локального индекса адресов"""
+
+    searches: int = 0
+    hits: int = 0
+    reloads: int = 0
+    size: int = 0
+    total_time: float = 0.0
+
+    @property
+    def avg_time_us(self) -> float:
+        """Среднее время поиска в микросекундах"""
+        return self.total_time / self.searches * 1e6 if self.searches else 0.0
+
+
+class LocalAddressIndex:
+    """Индекс адресов из файла выгрузки с фоновым обновлением"""
+
+    def __init__(self, path: str, refresh_interval: float, min_score: float):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.min_score = min_score
+        self._index: Optional[AddressIndex] = None
+        self._mtime: Optional[float] = None
+        self._refresher: Optional["asyncio.Task[None]"] = None
+        self._stats = AddressIndexStats()
+
+    @property
+    def ready(self) -> bool:
+        """Загружен ли индекс"""
+        return self._index is not None
+
+    async def load(self) -> bool:
+        """
+        Загрузка индекса, если файл выгрузки изменился
+
+        Returns:
+            True если индекс перестроен
+        """
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return False
+
+        started = time.perf_counter()
+        index = await asyncio.to_thread(lambda: AddressIndex(_read_snapshot(self.path)))
+        self._index = index
+        self._mtime = mtime
+        self._stats.reloads += 1
+        logger.info(
+            f"Индекс адресов загружен: {len(index)} адресов, "
+            f"{index.word_count} слов за {time.perf_counter() - started:.1f} с"
+        )
+        return True
+
+    def start(self) -> None:
+        """Загрузка и периодическое обновление индекса в фоне"""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(
+                self._refresh(), name="address-index-refresh"
+            )
+
+    async def stop(self) -> None:
+        """Остановка фонового обновления"""
+        if self._refresher:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+
+    async def _refresh(self) -> None:
+        while True:
+            try:
+                await self.load()
+            except Exception as e:
+                logger.warning(f"Не удалось обновить индекс адресов: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def search(self, query: str, limit: int = 10) -> List[AddressHit]:
+        """Поиск адресов, пустой список если индекс не загружен"""
+        index = self._index
+        if index is None:
+            return []
+
+        started = time.perf_counter()
+        hits = index.search(query, limit=limit, min_score=self.min_score)
+        self._stats.total_time += time.perf_counter() - started
+        self._stats.searches += 1
+        if hits:
+            self._stats.hits += 1
+        return hits
+
+    @property
+    def stats(self) -> AddressIndexStats:
+        """Снимок счетчиков индекса"""
+        return AddressIndexStats(
+            searches=self._stats.searches,
+            hits=self._stats.hits,
+            reloads=self._stats.reloads,
+            size=len(self._index) if self._index else 0,
+            total_time=self._stats.total_time,
+        )
+
+
+# Глобальный индекс адресов (используется, если задан файл выгрузки)
+local_address_index = LocalAddressIndex(
+    path=query_pipeline_config.address_index_path,
+    refresh_interval=query_pipeline_config.address_index_refresh,
+    min_score=query_pipeline_config.address_index_min_score,
+)
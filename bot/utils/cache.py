@@ -0,0 +1,140 @@
+"""
+Кэши в памяти процесса.
+Обеспечивают хранение значений с ограничением по времени жизни и размеру.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Счетчики обращений к кэшу"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий среди всех обращений"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TTLCache(Generic[K, V]):
+    """
+    LRU кэш с ограничением времени жизни записей
+
+    Записи с истекшим сроком удаляются при обращении к ним, при переполнении
+    вытесняется наименее недавно использованная запись.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize должен быть положительным")
+        if ttl <= 0:
+            raise ValueError("ttl должен быть положительным")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] > self._clock()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Получение значения с учетом срока жизни"""
+        item = self._data.get(key)
+        if item is None:
+            self._stats.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            self._stats.expirations += 1
+            self._stats.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """Сохранение значения (ttl переопределяет значение по умолчанию)"""
+        expires_at = self._clock() + (ttl if ttl is not None else self.ttl)
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (expires_at, value)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._stats.evictions += 1
+
+    def replace(self, key: K, value: V) -> bool:
+        """Замена значения живой записи без продления срока жизни"""
+        item = self._data.get(key)
+        if item is None or item[0] <= self._clock():
+            return False
+        self._data[key] = (item[0], value)
+        return True
+
+    def pop(self, key: K) -> Optional[V]:
+        """Удаление записи по ключу"""
+        item = self._data.pop(key, None)
+        if item is None:
+            return None
+        self._stats.invalidations += 1
+        return item[1]
+
+    def clear(self) -> None:
+        """Полная очистка кэша"""
+        self._stats.invalidations += len(self._data)
+        self._data.clear()
+
+    def purge_expired(self) -> int:
+        """Удаление всех записей с истекшим сроком, возвращает их количество"""
+        now = self._clock()
+        expired = [
+            key for key, (expires_at, _) in self._data.items() if expires_at <= now
+        ]
+        for key in expired:
+            del self._data[key]
+        self._stats.expirations += len(expired)
+        return len(expired)
+
+    @property
+    def stats(self) -> CacheStats:
+        """Снимок счетчиков кэша"""
+        return CacheStats(
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            evictions=self._stats.evictions,
+            expirations=self._stats.expirations,
+            invalidations=self._stats.invalidations,
+            size=len(self._data),
+        )
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._stats = CacheStats()
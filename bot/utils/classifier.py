@@ -0,0 +1,108 @@
+"""
+Локальная классификация запросов пользователей.
+Определяет категорию запроса по ключевым словам без обращения к LLM,
+если решение однозначно.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+CATEGORY_TARIFFS = "Тарифы"
+CATEGORY_GENERAL = "Общий"
+
+# Основа слова "тариф" во всех формах: тариф, тарифы, тарифов, тарифный...
+_TARIFF_RE = re.compile(r"\bтариф", re.IGNORECASE)
+
+# Опечатки и транслитерация: решение оставляем LLM
+_FUZZY_TARIFF_RE = re.compile(r"\b(?:т[ао]р+и[фв]|tarr?iff?)", re.IGNORECASE)
+
+# Вопросы о стоимости без слова "тариф": LLM может отнести их к тарифам
+_PRICING_RE = re.compile(
+    r"\b(?:стоимост\w*|сколько\s+стоит|цен[аыуе]\b|расценк\w*|абонплат\w*"
+    r"|абонентск\w*\s+плат\w*)",
+    re.IGNORECASE,
+)
+
+# Признаки адреса: сокращения и типы объектов
+_ADDRESS_RE = re.compile(
+    r"(?:(?<!т\.)(?<!т\. )"
+    r"\b(?:ул|д|г|обл|кв|корп|стр|мкр|пр|ш|пер|пл|пос|с|дер|пгт)\.)"
+    r"|(?:\b(?:р-н|снт|мкр)\b)"
+    r"|(?:\b(?:улиц\w*|проспект\w*|переул\w*|шоссе|площад\w*|бульвар\w*"
+    r"|микрорайон\w*|район\w*|област\w*|город\w*|посел\w*|пос[её]л\w*|сел[оаеу]"
+    r"|деревн\w*|дом[ауе]?|квартир\w*|корпус\w*|строени\w*)\b)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ClassificationDecision:
+    """Результат локальной классификации"""
+
+    # Категория запроса или None, если решение за LLM
+    category: Optional[str]
+    # Нужен ли вызов LLM (неоднозначный запрос или извлечение адреса)
+    needs_llm: bool
+    # Правило, по которому принято решение
+    reason: str
+
+
+class QueryClassifier:
+    """
+    Детерминированный классификатор запросов по ключевым словам
+
+    Повторяет правило из промпта классификации: категория "Тарифы" только
+    если в запросе есть слово "тариф". LLM вызывается для запросов с
+    опечатками или вопросами о стоимости, а также когда в тарифном запросе
+    есть адрес, который нужно извлечь.
+    """
+
+    def __init__(self) -> None:
+        self._decisions: Counter[str] = Counter()
+
+    def classify(self, query: str) -> ClassificationDecision:
+        """Классификация запроса"""
+        text = query.replace("ё", "е").replace("Ё", "Е")
+
+        if _TARIFF_RE.search(text):
+            if _ADDRESS_RE.search(text):
+                decision = ClassificationDecision(
+                    CATEGORY_TARIFFS, needs_llm=True, reason="tariff_with_address"
+                )
+            else:
+                decision = ClassificationDecision(
+                    CATEGORY_TARIFFS, needs_llm=False, reason="tariff_keyword"
+                )
+        elif _FUZZY_TARIFF_RE.search(text):
+            decision = ClassificationDecision(
+                None, needs_llm=True, reason="fuzzy_tariff"
+            )
+        elif _PRICING_RE.search(text):
+            decision = ClassificationDecision(None, needs_llm=True, reason="pricing")
+        else:
+            decision = ClassificationDecision(
+                CATEGORY_GENERAL, needs_llm=False, reason="no_tariff_keyword"
+            )
+
+        self._decisions[decision.reason] += 1
+        return decision
+
+    @property
+    def decisions(self) -> Dict[str, int]:
+        """Количество решений по каждому правилу"""
+        return dict(self._decisions)
+
+    @property
+    def llm_calls_saved(self) -> int:
+        """Количество запросов, классифицированных без вызова LLM"""
+        return self._decisions["tariff_keyword"] + self._decisions["no_tariff_keyword"]
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._decisions.clear()
+
+
+# Глобальный экземпляр классификатора
+query_classifier = QueryClassifier()
@@ -0,0 +1,109 @@
+"""
+Объединение inline запросов пользователя.
+Telegram присылает новый InlineQuery на каждое нажатие клавиши. Обработка
+запроса начинается после короткой паузы, а новый запрос того же
+пользователя отменяет предыдущий, даже если тот уже обращается к API.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+from bot.config import query_pipeline_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class CoalescerStats:
+    """Счетчики объединения inline запросов"""
+
+    queries: int = 0
+    executed: int = 0
+    # Отброшены во время паузы, до обращения к API
+    debounced: int = 0
+    # Отменены во время обращения к API
+    cancelled: int = 0
+
+    @property
+    def saved_calls(self) -> int:
+        """Обращения к API, которые не понадобились"""
+        return self.debounced
+
+    @property
+    def superseded_rate(self) -> float:
+        """Доля запросов, замененных более новыми"""
+        return (self.debounced + self.cancelled) / self.queries if self.queries else 0.0
+
+
+class _Pending(Generic[T]):
+    """Обрабатываемый запрос пользователя"""
+
+    def __init__(self) -> None:
+        self.task: Optional["asyncio.Task[T]"] = None
+        self.started = False
+        self.superseded = False
+
+
+class InlineQueryCoalescer:
+    """Обработка только последнего inline запроса каждого пользователя"""
+
+    def __init__(self, debounce: float):
+        self.debounce = debounce
+        self._pending: Dict[int, _Pending[Any]] = {}
+        self.stats = CoalescerStats()
+
+    async def run(self, user_id: int, func: Callable[[], Awaitable[T]]) -> Optional[T]:
+        """
+        Выполнение обработчика после паузы, если не пришел более новый запрос
+
+        Returns:
+            Результат обработчика или None, если запрос заменен более новым
+        """
+        self.stats.queries += 1
+        self._supersede(user_id)
+
+        pending: _Pending[T] = _Pending()
+        task = pending.task = asyncio.create_task(self._execute(pending, func))
+        self._pending[user_id] = pending
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if pending.superseded:
+                return None
+            raise
+        finally:
+            if self._pending.get(user_id) is pending:
+                del self._pending[user_id]
+
+    def _supersede(self, user_id: int) -> None:
+        previous = self._pending.get(user_id)
+        if previous is None or previous.task is None or previous.task.done():
+            return
+
+        previous.superseded = True
+        previous.task.cancel()
+        if previous.started:
+            self.stats.cancelled += 1
+        else:
+            self.stats.debounced += 1
+
+    async def _execute(
+        self, pending: _Pending[T], func: Callable[[], Awaitable[T]]
+    ) -> T:
+        if self.debounce > 0:
+            await asyncio.sleep(self.debounce)
+        pending.started = True
+        self.stats.executed += 1
+        return await func()
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self.stats = CoalescerStats()
+
+
+# Глобальный объединитель inline запросов
+inline_query_coalescer = InlineQueryCoalescer(query_pipeline_config.inline_debounce)
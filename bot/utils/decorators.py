@@ -5,9 +5,9 @@
 
 from functools import wraps
 import logging
-from aiogram.enums.chat_action import ChatAction
 
 from bot.api.auth import check_and_register_user
+from bot.utils.progress import progress_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -80,7 +80,9 @@ def check_and_add_user(func):
 def send_typing_action(func):
     """
     Декоратор для отправки статуса "печатает" во время обработки сообщения
-    Работает только с Message объектами, игнорирует InlineQuery
+    Статус отправляется в фоне параллельно с обработчиком и обновляется,
+    пока обработчик не завершится. Работает только с Message объектами,
+    игнорирует InlineQuery
 
     Args:
         func: Обработчик сообщения
@@ -91,13 +93,11 @@ def send_typing_action(func):
 
     @wraps(func)
     async def wrapper(event, *args, **kwargs):
-        try:
-            # Проверяем, что это Message объект, а не InlineQuery
-            if hasattr(event, "chat") and hasattr(event, "bot") and event.bot:
-                await event.bot.send_chat_action(event.chat.id, ChatAction.TYPING)
-        except Exception as e:
-            logger.warning(f"Не удалось отправить статус печатания: {e}")
+        # Проверяем, что это Message объект, а не InlineQuery
+        if not (hasattr(event, "chat") and hasattr(event, "bot") and event.bot):
+            return await func(event, *args, **kwargs)
 
-        return await func(event, *args, **kwargs)
+        async with progress_tracker.keep_typing(event.bot, event.chat.id):
+            return await func(event, *args, **kwargs)
 
     return wrapper
@@ -5,23 +5,42 @@
 import asyncio
 import logging
 import os
+import time
 import PyPDF2
 import aiohttp
 import docx
 import urllib.parse
+import re
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.enums import ParseMode
 
-from bot.config import bot_config
-from bot.api.milvus import search_milvus
-from bot.api.ai import call_ai
+from bot.config import bot_config, query_pipeline_config
+from bot.api.milvus import milvus_cache, search_milvus
+from bot.api.ai import call_ai, call_ai_stream
 from bot.api.log import log
 from bot.api.base import core_client
+from bot.api.addresses import search_addresses
+from bot.api.answers import answer_cache
+from bot.api.tariffs import tariff_cache
+from bot.api import deadline
+from bot.api.circuit_breaker import circuit_breakers
+from bot.api.http import http_client
 from bot.utils.user_settings import user_model
+from bot.utils.classifier import CATEGORY_TARIFFS, query_classifier
+from bot.utils.address_extractor import address_extractor
+from bot.utils.address_index import AddressHit, local_address_index
+from bot.utils.progress import progress_tracker
+from bot.utils.speculative import SpeculativeSearch
+from bot.utils.streaming import stream_answer
 
 logger = logging.getLogger(__name__)
 
+# Микросервис поиска house_id по адресу
+ADDRESS_SERVICE_URL = "http://192.168.110.115:8888"
+ADDRESS_SERVICE_TIMEOUT = aiohttp.ClientTimeout(connect=2, sock_read=10, total=10)
+
 # Временное хранилище запросов пользователей для тарифов
 user_tariff_queries = {}
 
@@ -298,26 +317,20 @@ async def fetch_transcription_result(
         await message.answer("❌ Ошибка при получении результата транскрипции.")
 
 
-async def classify_and_process_query(
-    user_query: str, user_id: int, message: Message
-) -> None:
+def build_classification_prompt(user_query: str) -> str:
     """
-    Классифицирует запрос пользователя и обрабатывает его в зависимости от категории.
+    Формирует промпт для классификации запроса и извлечения адреса через LLM
 
     Args:
         user_query: Текстовый запрос пользователя
-        user_id: ID пользователя
-        message: Сообщение от пользователя
+
+    Returns:
+        Текст промпта
     """
-    logger.debug(
-        f"🔄 Начинаем классификацию запроса пользователя {user_id}: {user_query[:100]}..."
-    )
-    try:
-        # Категории запросов
-        categories = ["Тарифы", "Общий"]
+    # Категории запросов
+    categories = ["Тарифы", "Общий"]
 
-        # Создаем промпт для классификации
-        classification_prompt = f"""
+    return f"""
         Определи категорию следующего запроса пользователя и извлеки адрес, если он есть.
         Категория "Тарифы" - только, если в запросе есть слово "тариф"
         
@@ -332,8 +345,146 @@ async def classify_and_process_query(
         Если в запросе есть упоминание адреса (улица, дом, населенный пункт, регион, сокращения по типу: ул., д., г., обл., р-н, снт, кв., корп., стр., мкр., пр., ш., пер., пл.), обязательно извлеки его.
         """
 
+
+def parse_classification_result(
+    classification_result: str,
+) -> Tuple[str, Optional[str]]:
+    """
+    Разбирает ответ LLM на промпт классификации
+
+    Args:
+        classification_result: Ответ модели
+
+    Returns:
+        Категория и извлеченный адрес (None, если адрес не найден)
+    """
+    # Определяем категорию и извлекаем адрес
+    logger.debug("🔍 Начинаем разбор результата классификации...")
+    extracted_address = None
+    classification_lower = classification_result.lower().strip()
+    logger.debug(f"📝 Результат для анализа: {classification_lower}")
+
+    # Парсим категорию
+    if "тариф" in classification_lower:
+        category = "Тарифы"
+        logger.debug("✅ Определена категория: Тарифы")
+    elif "общий" in classification_lower:
+        category = "Общий"
+        logger.debug("✅ Определена категория: Общий")
+    else:
+        category = "Общий"
+        logger.debug("⚠️ Категория не определена, используем: Общий")
+
+    # Парсим адрес из ответа LLM
+    logger.debug("🏠 Ищем адрес в ответе...")
+    lines = classification_result.split("\n")
+    for line in lines:
+        if "адрес:" in line.lower():
+            address_part = line.split(":", 1)[1].strip()
+            if address_part and address_part.lower() != "не найден":
+                extracted_address = address_part
+                logger.debug(f"📍 Найден адрес: {extracted_address}")
+            break
+
+    if not extracted_address:
+        logger.debug("❌ Адрес не найден в ответе")
+
+    return category, extracted_address
+
+
+def build_combined_prompt(user_query: str) -> str:
+    """
+    Формирует промпт, по которому LLM одним вызовом классифицирует запрос
+    и отвечает на него, если запрос общий
+
+    Args:
+        user_query: Текстовый запрос пользователя
+
+    Returns:
+        Текст промпта
+    """
+    return f"""
+        {build_classification_prompt(user_query).strip()}
+
+        Если категория "Общий", ответь на запрос, используя контекст из базы знаний.
+        Если категория "Тарифы", на запрос не отвечай.
+
+        Добавь в конец ответа строку "Ответ:" и с новой строки сам ответ:
+        Ответ:
+        [ответ на запрос или пусто для категории "Тарифы"]
+        """
+
+
+async def classify_and_process_query(
+    user_query: str, user_id: int, message: Message
+) -> None:
+    """
+    Классифицирует запрос пользователя и обрабатывает его в зависимости от категории.
+
+    Args:
+        user_query: Текстовый запрос пользователя
+        user_id: ID пользователя
+        message: Сообщение от пользователя
+    """
+    logger.debug(
+        f"🔄 Начинаем классификацию запроса пользователя {user_id}: {user_query[:100]}..."
+    )
+    # Категория, известная до вызова LLM (если LLM нужен только для адреса)
+    known_category = None
+    # Поиск контекста, запущенный параллельно с классификацией
+    speculative_search: Optional[SpeculativeSearch] = None
+    try:
+        # Однозначные запросы классифицируем локально, без вызова LLM
+        if query_pipeline_config.fast_classifier:
+            decision = query_classifier.classify(user_query)
+            known_category = decision.category
+            if not decision.needs_llm:
+                logger.info(
+                    f"Запрос пользователя {user_id} классифицирован локально как: "
+                    f"{decision.category} ({decision.reason})"
+                )
+                if decision.category == CATEGORY_TARIFFS:
+                    await _handle_tariff_query(user_query, user_id, message)
+                else:
+                    await _handle_general_query(user_query, user_id, message)
+                return
+
+            # Тарифный запрос с адресом: извлекаем адрес без LLM
+            if (
+                known_category == CATEGORY_TARIFFS
+                and query_pipeline_config.local_address_extractor
+            ):
+                address_match = address_extractor.extract(user_query)
+                if address_match:
+                    logger.info(
+                        f"Запрос пользователя {user_id} классифицирован локально как: "
+                        f"{known_category}, извлеченный адрес: {address_match.normalized}"
+                    )
+                    await _handle_tariff_query(
+                        user_query, user_id, message, address_match.normalized
+                    )
+                    return
+
+        # Контекст для общего ответа ищется один раз: его используют и
+        # объединенный вызов, и обычная классификация, если он не удался
+        if known_category != CATEGORY_TARIFFS and (
+            query_pipeline_config.combined_llm_call
+            or query_pipeline_config.speculative_milvus
+        ):
+            speculative_search = SpeculativeSearch(user_id, message)
+
+        # Классификация и ответ на общий запрос одним вызовом LLM
+        if query_pipeline_config.combined_llm_call and speculative_search:
+            if await _classify_and_answer(
+                user_query, user_id, message, speculative_search
+            ):
+                return
+
         # Классифицируем запрос
-        logger.debug(f"🤖 Отправляем запрос на классификацию к AI модели... {classification_prompt}")
+        classification_prompt = build_classification_prompt(user_query)
+        logger.debug(
+            f"🤖 Отправляем запрос на классификацию к AI модели... {classification_prompt}"
+        )
         selected_model = user_model.get(user_id, "mistral-large-latest")
         classification_result = await call_ai(
             text=classification_prompt,
@@ -348,40 +499,18 @@ async def classify_and_process_query(
             logger.error(
                 f"Не удалось классифицировать запрос для пользователя {user_id}"
             )
-            await _handle_general_query(user_query, user_id, message)
+            if known_category == CATEGORY_TARIFFS:
+                await _handle_tariff_query(user_query, user_id, message)
+            else:
+                await _handle_general_query(
+                    user_query, user_id, message, speculative_search
+                )
             return
 
-        # Определяем категорию и извлекаем адрес
-        logger.debug("🔍 Начинаем разбор результата классификации...")
-        category = None
-        extracted_address = None
-        classification_lower = classification_result.lower().strip()
-        logger.debug(f"📝 Результат для анализа: {classification_lower}")
-
-        # Парсим категорию
-        if "тариф" in classification_lower:
-            category = "Тарифы"
-            logger.debug("✅ Определена категория: Тарифы")
-        elif "общий" in classification_lower:
-            category = "Общий"
-            logger.debug("✅ Определена категория: Общий")
-        else:
-            category = "Общий"
-            logger.debug("⚠️ Категория не определена, используем: Общий")
-
-        # Парсим адрес из ответа LLM
-        logger.debug("🏠 Ищем адрес в ответе...")
-        lines = classification_result.split("\n")
-        for line in lines:
-            if "адрес:" in line.lower():
-                address_part = line.split(":", 1)[1].strip()
-                if address_part and address_part.lower() != "не найден":
-                    extracted_address = address_part
-                    logger.debug(f"📍 Найден адрес: {extracted_address}")
-                break
-
-        if not extracted_address:
-            logger.debug("❌ Адрес не найден в ответе")
+        category, extracted_address = parse_classification_result(classification_result)
+        if known_category:
+            category = known_category
+            logger.debug(f"✅ Категория определена локально: {category}")
 
         logger.info(
             f"Запрос пользователя {user_id} классифицирован как: {category}, извлеченный адрес: {extracted_address}"
@@ -390,16 +519,167 @@ async def classify_and_process_query(
         # Обрабатываем запрос в зависимости от категории
         if category == "Тарифы":
             logger.debug("🎯 Переходим к обработке тарифного запроса")
+            if speculative_search:
+                speculative_search.discard()
+                # При ошибке обработки тарифов общий ответ ищет контекст заново
+                speculative_search = None
             await _handle_tariff_query(user_query, user_id, message, extracted_address)
         else:
             logger.debug("💬 Переходим к обработке общего запроса")
-            await _handle_general_query(user_query, user_id, message)
+            await _handle_general_query(
+                user_query, user_id, message, speculative_search
+            )
 
     except Exception as e:
         logger.exception(
             f"Ошибка при классификации запроса для пользователя {user_id}: {e}"
         )
-        await _handle_general_query(user_query, user_id, message)
+        await _handle_general_query(user_query, user_id, message, speculative_search)
+
+    finally:
+        if speculative_search:
+            speculative_search.discard()
+
+
+async def _classify_and_answer(
+    user_query: str, user_id: int, message: Message, search: SpeculativeSearch
+) -> bool:
+    """
+    Классифицирует запрос и отвечает на общий запрос одним вызовом LLM
+
+    Ответ показывается по мере генерации после строки "Ответ:" и сохраняется
+    в кэше ответов. Для тарифных запросов генерация прерывается, запрос
+    передается в обработку тарифов.
+
+    Returns:
+        True если запрос обработан, False если нужна обычная классификация
+    """
+    result = await search.result()
+    if not result:
+        logger.warning(
+            f"Контекст для пользователя {user_id} не найден, "
+            "используем раздельную классификацию"
+        )
+        return False
+
+    selected_model = user_model.get(user_id, "mistral-large-latest")
+    cache_key = answer_cache.key(user_query, result.get("hashs", []), selected_model)
+    cached_response = answer_cache.get(cache_key)
+    if cached_response:
+        # В кэше только ответы на общие запросы
+        logger.info(f"Ответ на запрос пользователя {user_id} взят из кэша")
+        await _send_general_answer(
+            user_query, user_id, message, cached_response, result
+        )
+        return True
+
+    started = time.monotonic()
+    chunks = call_ai_stream(
+        build_combined_prompt(user_query),
+        result.get("combined_context", ""),
+        result.get("chat_history", ""),
+        model=selected_model,
+    )
+    ai_response: Optional[str] = None
+    try:
+        header, answer_start = await _read_combined_header(chunks)
+        category, extracted_address = parse_classification_result(header)
+        classified = bool(header.strip())
+        if classified:
+            logger.info(
+                f"Запрос пользователя {user_id} классифицирован как: {category}, "
+                f"извлеченный адрес: {extracted_address} (объединенный вызов)"
+            )
+        else:
+            logger.error(
+                f"Не удалось классифицировать запрос для пользователя {user_id}"
+            )
+
+        if classified and category != CATEGORY_TARIFFS and answer_start is not None:
+            try:
+                ai_response = await stream_answer(
+                    message, _answer_chunks(answer_start, chunks)
+                )
+            except Exception as e:
+                # Часть ответа уже показана: повторно не отвечаем
+                logger.exception(
+                    f"Ошибка при обработке общего запроса для пользователя {user_id}: {e}"
+                )
+                await log(
+                    user_id=user_id,
+                    query=user_query,
+                    ai_response=str(e),
+                    status=0,
+                    hashes=result.get("hashs", []),
+                    category="Общий",
+                )
+                await message.answer(
+                    "❌ Произошла ошибка при обработке запроса",
+                    parse_mode=ParseMode.HTML,
+                )
+                return True
+    finally:
+        # Для тарифного запроса остаток генерации не нужен
+        await chunks.aclose()
+
+    if classified and category == CATEGORY_TARIFFS:
+        await _handle_tariff_query(user_query, user_id, message, extracted_address)
+    elif ai_response:
+        answer_cache.put(cache_key, ai_response, time.monotonic() - started)
+        await _log_general_answer(user_query, user_id, ai_response, result)
+    else:
+        # Модель не вернула ответ: запрашиваем его отдельно
+        await _answer_general_query(user_query, user_id, message, result)
+    return True
+
+
+# Строка объединенного ответа, после которой идет ответ на запрос
+_ANSWER_MARKER_RE = re.compile(r"^[ \t]*ответ:", re.IGNORECASE | re.MULTILINE)
+
+
+async def _read_combined_header(
+    chunks: AsyncIterator[str],
+) -> Tuple[str, Optional[str]]:
+    """
+    Чтение объединенного ответа LLM до строки "Ответ:"
+
+    Returns:
+        Заголовок с категорией и адресом и начало ответа после "Ответ:"
+        (None, если строки "Ответ:" нет и ответ прочитан целиком)
+    """
+    text = ""
+    async for chunk in chunks:
+        text += chunk
+        match = _ANSWER_MARKER_RE.search(text)
+        if match:
+            return text[: match.start()], text[match.end() :]
+    return text, None
+
+
+async def _answer_chunks(start: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Фрагменты ответа после строки "Ответ:" без начальных пробелов"""
+    pending = start.lstrip()
+    if pending:
+        yield pending
+    async for chunk in chunks:
+        if not pending:
+            chunk = pending = chunk.lstrip()
+        if chunk:
+            yield chunk
+
+
+def _match_local_address(extracted_address: str | None) -> AddressHit | None:
+    """Единственный уверенно найденный в локальном индексе адрес"""
+    if not extracted_address:
+        return None
+
+    hits = local_address_index.search(extracted_address, limit=2)
+    if not hits or hits[0].score < query_pipeline_config.address_index_route_score:
+        return None
+    # Несколько одинаково подходящих адресов: уточняем через сервис адресов
+    if len(hits) > 1 and hits[1].score == hits[0].score:
+        return None
+    return hits[0]
 
 
 async def _handle_tariff_query(
@@ -418,6 +698,22 @@ async def _handle_tariff_query(
         logger.debug(f"📝 Текст запроса: {user_query}")
         logger.debug(f"📍 Извлеченный адрес: {extracted_address}")
 
+        # Адрес найден в локальном индексе: сервисы адресов не нужны
+        local_hit = _match_local_address(extracted_address)
+        if local_hit:
+            logger.debug(f"📍 Адрес найден в локальном индексе: {local_hit.address}")
+            user_tariff_queries[user_id] = {
+                "query": user_query,
+                "territory_id": local_hit.territory_id,
+                "address": local_hit.address,
+                "territory_name": local_hit.territory_name,
+                "conn_type": list(local_hit.conn_type),
+            }
+            await _ask_address_confirmation(
+                user_id, message, local_hit.address, local_hit.territory_name
+            )
+            return
+
         # Ищем адрес в запросе через микросервис
         logger.debug("🔍 Ищем house_id через микросервис...")
         house_id = await _extract_address_from_query(user_query)
@@ -637,16 +933,14 @@ async def _process_confirmed_tariff_request(
     """
     Обрабатывает тарифный запрос после подтверждения адреса
     """
-    loading_message = None
+    # Индикатор обработки запускается без ожидания Telegram
+    progress = progress_tracker.start(message)
     try:
         territory_id = user_data["territory_id"]
         user_query = user_data["query"]
 
-        # Показываем загрузочный стикер
-        loading_message = await message.answer_sticker(bot_config.loading_sticker)
-
         # Получаем данные о тарифах из Redis по territory_id
-        api_response = await core_client.get_tariffs_from_redis(territory_id)
+        api_response = await tariff_cache.get(territory_id)
 
         if not api_response.success or not api_response.data:
             await message.edit_text(
@@ -749,54 +1043,29 @@ async def _process_confirmed_tariff_request(
         )
 
     finally:
-        # Удаляем загрузочный стикер
-        if loading_message:
-            try:
-                await loading_message.delete()
-            except Exception as delete_error:
-                logger.warning(f"Не удалось удалить loading message: {delete_error}")
+        await progress.stop()
 
 
 async def _handle_general_query(
-    user_query: str, user_id: int, message: Message
+    user_query: str,
+    user_id: int,
+    message: Message,
+    speculative_search: Optional[SpeculativeSearch] = None,
 ) -> None:
     """
     Обрабатывает общие запросы через векторную базу знаний
+
+    Если поиск контекста уже запущен параллельно с классификацией,
+    используется его результат.
     """
     try:
-        result = await search_milvus(user_id, message)
+        if speculative_search:
+            result = await speculative_search.result()
+        else:
+            result = await search_milvus(user_id, message)
 
         if result:
-            selected_model = user_model.get(user_id, "mistral-large-latest")
-            ai_response = await call_ai(
-                user_query,
-                result.get("combined_context", ""),
-                result.get("chat_history", ""),
-                model=selected_model,
-            )
-
-            if ai_response:
-                await message.answer(ai_response, parse_mode=ParseMode.HTML)
-                await log(
-                    user_id=user_id,
-                    query=user_query,
-                    ai_response=ai_response,
-                    status=1,
-                    hashes=result.get("hashs", []),
-                    category="Общий",
-                )
-                logger.info(f"Успешно обработан общий запрос пользователя {user_id}")
-            else:
-                error_msg = "⚠️ Прошу прощения, я не смогла обработать Ваш запрос. Попробуйте позже..."
-                await message.answer(error_msg, parse_mode=ParseMode.HTML)
-                await log(
-                    user_id=user_id,
-                    query=user_query,
-                    ai_response=error_msg,
-                    status=0,
-                    hashes=result.get("hashs", []),
-                    category="Общий",
-                )
+            await _answer_general_query(user_query, user_id, message, result)
         else:
             await message.answer(
                 "❌ Ошибка при поиске контекста",
@@ -821,6 +1090,85 @@ async def _handle_general_query(
         )
 
 
+async def _answer_general_query(
+    user_query: str, user_id: int, message: Message, result: Dict[str, Any]
+) -> None:
+    """
+    Генерирует и отправляет ответ на общий запрос по найденному контексту
+    """
+    selected_model = user_model.get(user_id, "mistral-large-latest")
+    cache_key = answer_cache.key(user_query, result.get("hashs", []), selected_model)
+    cached_response = answer_cache.get(cache_key)
+    if cached_response:
+        logger.info(f"Ответ на запрос пользователя {user_id} взят из кэша")
+        await _send_general_answer(
+            user_query, user_id, message, cached_response, result
+        )
+        return
+
+    # Ответ показывается по мере генерации
+    started = time.monotonic()
+    ai_response = await stream_answer(
+        message,
+        call_ai_stream(
+            user_query,
+            result.get("combined_context", ""),
+            result.get("chat_history", ""),
+            model=selected_model,
+        ),
+    )
+
+    if ai_response:
+        answer_cache.put(cache_key, ai_response, time.monotonic() - started)
+        await _log_general_answer(user_query, user_id, ai_response, result)
+    else:
+        error_msg = (
+            "⚠️ Прошу прощения, я не смогла обработать Ваш запрос. Попробуйте позже..."
+        )
+        await message.answer(error_msg, parse_mode=ParseMode.HTML)
+        await log(
+            user_id=user_id,
+            query=user_query,
+            ai_response=error_msg,
+            status=0,
+            hashes=result.get("hashs", []),
+            category="Общий",
+        )
+
+
+async def _send_general_answer(
+    user_query: str,
+    user_id: int,
+    message: Message,
+    ai_response: str,
+    result: Dict[str, Any],
+) -> None:
+    """
+    Отправляет ответ на общий запрос и логирует его
+    """
+    await message.answer(ai_response, parse_mode=ParseMode.HTML)
+    await _log_general_answer(user_query, user_id, ai_response, result)
+
+
+async def _log_general_answer(
+    user_query: str, user_id: int, ai_response: str, result: Dict[str, Any]
+) -> None:
+    """
+    Логирует отправленный ответ на общий запрос
+    """
+    # Ответ уже входит в историю чата, которую вернул бы новый поиск
+    milvus_cache.record_exchange(user_id, user_query, ai_response)
+    await log(
+        user_id=user_id,
+        query=user_query,
+        ai_response=ai_response,
+        status=1,
+        hashes=result.get("hashs", []),
+        category="Общий",
+    )
+    logger.info(f"Успешно обработан общий запрос пользователя {user_id}")
+
+
 async def _extract_address_from_query(user_query: str) -> str | None:
     """
     Извлекает адрес из запроса пользователя и возвращает house_id
@@ -831,39 +1179,65 @@ async def _extract_address_from_query(user_query: str) -> str | None:
     Returns:
         house_id или None если адрес не найден
     """
+    # Сервис адресов не отвечает: не ждем таймаута
+    breaker = circuit_breakers.get(ADDRESS_SERVICE_URL, "adress")
+    permit = breaker.allow_request() if breaker else None
+    if breaker and permit is None:
+        logger.warning("Сервис адресов временно недоступен, запрос пропущен")
+        return None
+
     try:
         # Кодируем запрос для URL
         encoded_query = urllib.parse.quote(user_query)
 
         # Формируем URL для запроса к микросервису адресов
-        url = f"http://192.168.110.115:8888/adress?query={encoded_query}"
+        url = f"{ADDRESS_SERVICE_URL}/adress?query={encoded_query}"
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url, headers={"accept": "application/json"}
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    house_id = data.get("houseid")
+        session = await http_client.get_session()
+        async with session.get(
+            url,
+            headers={"accept": "application/json"},
+            timeout=deadline.bounded_timeout(ADDRESS_SERVICE_TIMEOUT),
+        ) as response:
+            if permit:
+                if response.status >= 500:
+                    permit.record_failure()
+                else:
+                    permit.record_success()
 
-                    if house_id:
-                        logger.info(
-                            f"Найден house_id: {house_id} для запроса: {user_query}"
-                        )
-                        return house_id
-                    else:
-                        logger.info(
-                            f"house_id не найден в ответе для запроса: {user_query}"
-                        )
-                        return None
+            if response.status == 200:
+                data = await response.json()
+                house_id = data.get("houseid")
+
+                if house_id:
+                    logger.info(
+                        f"Найден house_id: {house_id} для запроса: {user_query}"
+                    )
+                    return house_id
                 else:
-                    logger.error(f"Ошибка при запросе адреса: HTTP {response.status}")
+                    logger.info(
+                        f"house_id не найден в ответе для запроса: {user_query}"
+                    )
                     return None
+            else:
+                logger.error(f"Ошибка при запросе адреса: HTTP {response.status}")
+                return None
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        if permit:
+            permit.record_failure()
+        logger.error(f"Сервис адресов недоступен для запроса '{user_query}': {e}")
+        return None
 
     except Exception as e:
         logger.exception(f"Ошибка при извлечении адреса из запроса '{user_query}': {e}")
         return None
 
+    finally:
+        # Результат не зафиксирован (отмена или ошибка разбора ответа)
+        if permit:
+            permit.release()
+
 
 async def _handle_tariff_via_redis_addresses(
     user_query: str, user_id: int, message: Message, extracted_address: str
@@ -872,8 +1246,8 @@ async def _handle_tariff_via_redis_addresses(
     Обрабатывает тарифный запрос через redis_addresses (как в команде /tariff)
     """
     try:
-        # Ищем адреса через redis_addresses
-        api_response = await core_client.get_addresses_from_redis(extracted_address)
+        # Ищем адреса в локальном индексе или через redis_addresses
+        api_response = await search_addresses(extracted_address)
 
         if not api_response.success or not api_response.data:
             await message.answer(
@@ -929,7 +1303,7 @@ async def _handle_tariff_via_redis_addresses(
             return
 
         # Получаем тарифы для территории
-        tariffs_response = await core_client.get_tariffs_from_redis(territory_id)
+        tariffs_response = await tariff_cache.get(territory_id)
 
         if not tariffs_response.success or not tariffs_response.data:
             await message.answer(
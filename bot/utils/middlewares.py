@@ -0,0 +1,38 @@
+"""
+Middleware диспетчера бота.
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+
+from bot.api.deadline import deadline_scope
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineMiddleware(BaseMiddleware):
+    """
+    Задает дедлайн обработки апдейта с момента его получения
+
+    Все вызовы внешних API внутри обработчика получают таймаут не больше
+    оставшегося времени. Обработчик долгой операции задает свой бюджет
+    флагом ``deadline`` (0 - без ограничения), поэтому middleware
+    регистрируется как внутренний для типов событий.
+    """
+
+    def __init__(self, budget: float):
+        self.budget = budget
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        budget = get_flag(data, "deadline", default=self.budget)
+        with deadline_scope(budget):
+            return await handler(event, data)
@@ -0,0 +1,273 @@
+"""
+Индикатор обработки запроса пользователя.
+По умолчанию - статус "печатает", который отправляется в фоне и обновляется,
+пока идет обработка; стикер загрузки доступен как необязательный стиль.
+Запуск индикатора не ждет ответа Telegram.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.enums.chat_action import ChatAction
+from aiogram.types import Message
+
+from bot.config import bot_config, query_pipeline_config
+
+logger = logging.getLogger(__name__)
+
+STYLE_TYPING = "typing"
+STYLE_STICKER = "sticker"
+STYLE_NONE = "none"
+
+ChatId = Union[int, str]
+
+# Вызовов Telegram API на запрос со стикером загрузки: отправка и удаление
+# стикера и однократный статус "печатает" обработчика
+_STICKER_BASELINE_CALLS = 3
+
+
+@dataclass
+class ProgressStats:
+    """Счетчики индикаторов обработки"""
+
+    # Запущенные индикаторы (запросы пользователей)
+    indicators: int = 0
+    # Статусы "печатает", отправленные, пока в чате есть индикатор
+    chat_actions: int = 0
+    # Отправленные и удаленные стикеры загрузки
+    sticker_calls: int = 0
+
+    @property
+    def calls(self) -> int:
+        """Всего вызовов Telegram API для индикаторов"""
+        return self.chat_actions + self.sticker_calls
+
+    @property
+    def calls_per_indicator(self) -> float:
+        """Вызовов Telegram API на один запрос"""
+        return self.calls / self.indicators if self.indicators else 0.0
+
+    @property
+    def saved_calls(self) -> int:
+        """Вызовов меньше, чем при стикере и однократном статусе обработчика"""
+        return _STICKER_BASELINE_CALLS * self.indicators - self.calls
+
+
+class _ChatTyping:
+    """Статус "печатает" в чате, общий для всех индикаторов чата"""
+
+    def __init__(self) -> None:
+        self.task: Optional["asyncio.Task[None]"] = None
+        # Индикаторы чата и те из них, чей ответ еще не показан
+        self.users = 0
+        self.waiting = 0
+        # Индикаторы обработки среди них (без keep_typing)
+        self.indicators = 0
+
+
+class _TypingLease:
+    """Участие одного индикатора в статусе "печатает" чата"""
+
+    def __init__(self, chat_id: ChatId, indicator: bool):
+        self.chat_id = chat_id
+        self.indicator = indicator
+        self.answered = False
+        self.released = False
+
+
+# Индикаторы "печатает", запущенные при обработке текущего запроса
+_leases: ContextVar[Tuple[_TypingLease, ...]] = ContextVar(
+    "progress_leases", default=()
+)
+
+
+class ProgressIndicator:
+    """Индикатор обработки одного запроса"""
+
+    def __init__(self, tracker: "ProgressTracker", message: Message, style: str):
+        self.tracker = tracker
+        self.message = message
+        self.style = style
+        self._sticker_task: Optional["asyncio.Task[Optional[Message]]"] = None
+        self._lease: Optional[_TypingLease] = None
+        self._stopped = False
+
+    def _start(self) -> None:
+        if self.style == STYLE_TYPING and self.message.bot:
+            self._lease = self.tracker._acquire_typing(
+                self.message.bot, self.message.chat.id, indicator=True
+            )
+        elif self.style == STYLE_STICKER:
+            self._sticker_task = asyncio.create_task(self._send_sticker())
+
+    async def _send_sticker(self) -> Optional[Message]:
+        try:
+            sticker = await self.message.answer_sticker(bot_config.loading_sticker)
+            self.tracker._stats.sticker_calls += 1
+            return sticker
+        except Exception as e:
+            logger.warning(f"Не удалось отправить стикер загрузки: {e}")
+            return None
+
+    async def stop(self) -> None:
+        """Остановка индикатора (повторный вызов ничего не делает)"""
+        if self._stopped:
+            return
+        self._stopped = True
+
+        if self._lease is not None:
+            await self.tracker._release_typing(self._lease)
+            return
+
+        if self._sticker_task is None:
+            return
+        # Отправку не отменяем: стикер мог уже дойти до Telegram
+        sticker = await self._sticker_task
+        if sticker is not None:
+            try:
+                await sticker.delete()
+                self.tracker._stats.sticker_calls += 1
+            except Exception as e:
+                logger.warning(f"Не удалось удалить loading message: {e}")
+
+
+class ProgressTracker:
+    """
+    Запуск индикаторов обработки
+
+    Статус "печатает" обновляется одной фоновой задачей на чат, сколько бы
+    индикаторов в нем ни было запущено. Задача останавливается, когда ответы
+    всех индикаторов чата показаны, и запускается снова для нового запроса.
+    """
+
+    def __init__(self, style: str, refresh: float, delay: float = 0.0):
+        self.style = style
+        self.refresh = refresh
+        self.delay = delay
+        self._typing: Dict[ChatId, _ChatTyping] = {}
+        self._stats = ProgressStats()
+
+    def start(self, message: Message, style: Optional[str] = None) -> ProgressIndicator:
+        """Запуск индикатора без ожидания Telegram"""
+        indicator = ProgressIndicator(self, message, style or self.style)
+        self._stats.indicators += 1
+        indicator._start()
+        return indicator
+
+    @asynccontextmanager
+    async def keep_typing(self, bot: Bot, chat_id: ChatId) -> AsyncIterator[None]:
+        """
+        Статус "печатает" в чате на время выполнения блока
+
+        Статус отправляется в фоне, вход в блок не ждет Telegram; при выходе
+        (в том числе по отмене) обновление статуса останавливается.
+        """
+        lease = self._acquire_typing(bot, chat_id)
+        try:
+            yield
+        finally:
+            await self._release_typing(lease)
+
+    def _acquire_typing(
+        self, bot: Bot, chat_id: ChatId, indicator: bool = False
+    ) -> _TypingLease:
+        entry = self._typing.get(chat_id)
+        if entry is None:
+            entry = self._typing[chat_id] = _ChatTyping()
+        if entry.task is None:
+            entry.task = asyncio.create_task(self._keep_typing(bot, chat_id))
+        entry.users += 1
+        entry.waiting += 1
+        entry.indicators += indicator
+
+        lease = _TypingLease(chat_id, indicator)
+        _leases.set(_leases.get() + (lease,))
+        return lease
+
+    async def _release_typing(self, lease: _TypingLease) -> None:
+        if lease.released:
+            return
+        lease.released = True
+        entry = self._typing.get(lease.chat_id)
+        if entry is None:
+            return
+        entry.users -= 1
+        entry.indicators -= lease.indicator
+        if not lease.answered:
+            entry.waiting -= 1
+
+        if entry.users > 0:
+            self._stop_answered(entry)
+            return
+
+        del self._typing[lease.chat_id]
+        if entry.task is not None:
+            entry.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await entry.task
+
+    def answer_shown(self, chat_id: ChatId) -> None:
+        """
+        Ответ на текущий запрос уже виден пользователю
+
+        Telegram сам снимает статус при получении сообщения от бота, поэтому
+        при потоковом ответе обновлять его после первого фрагмента не нужно.
+        Статус продолжает обновляться, пока в чате есть запросы без ответа.
+        """
+        entry = self._typing.get(chat_id)
+        if entry is None:
+            return
+        for lease in _leases.get():
+            if lease.chat_id == chat_id and not lease.answered and not lease.released:
+                lease.answered = True
+                entry.waiting -= 1
+        self._stop_answered(entry)
+
+    @staticmethod
+    def _stop_answered(entry: _ChatTyping) -> None:
+        """Остановка обновления статуса, если все ответы чата показаны"""
+        if entry.waiting == 0 and entry.task is not None:
+            entry.task.cancel()
+            entry.task = None
+
+    async def _keep_typing(self, bot: Bot, chat_id: ChatId) -> None:
+        """Отправка статуса "печатает" до отмены задачи"""
+        # Быстрый ответ приходит раньше статуса, и статус не отправляется
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        while True:
+            try:
+                # Статус, пропущенный планировщиком запросов, не учитывается
+                sent = await bot.send_chat_action(chat_id, ChatAction.TYPING)
+                entry = self._typing.get(chat_id)
+                if sent and entry is not None and entry.indicators:
+                    self._stats.chat_actions += 1
+            except Exception as e:
+                logger.warning(f"Не удалось отправить статус печатания: {e}")
+            await asyncio.sleep(self.refresh)
+
+    @property
+    def stats(self) -> ProgressStats:
+        """Снимок счетчиков индикаторов"""
+        return ProgressStats(
+            indicators=self._stats.indicators,
+            chat_actions=self._stats.chat_actions,
+            sticker_calls=self._stats.sticker_calls,
+        )
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._stats = ProgressStats()
+
+
+# Глобальный запуск индикаторов обработки
+progress_tracker = ProgressTracker(
+    style=query_pipeline_config.progress_style,
+    refresh=query_pipeline_config.progress_refresh,
+    delay=query_pipeline_config.progress_delay,
+)
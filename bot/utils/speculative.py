@@ -0,0 +1,127 @@
+"""
+Спекулятивный поиск контекста в Milvus.
+Поиск запускается одновременно с классификацией запроса через LLM, и если
+запрос оказался общим, его результат уже готов или почти готов.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from aiogram.types import Message
+
+from bot.api.milvus import search_milvus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpeculativeSearchStats:
+    """Счетчики спекулятивного поиска"""
+
+    started: int = 0
+    used: int = 0
+    discarded: int = 0
+    # Суммарное время поиска, перекрытое классификацией, в секундах
+    saved_total: float = 0.0
+
+    @property
+    def avg_saved_ms(self) -> float:
+        """Среднее сэкономленное время на использованный поиск"""
+        return self.saved_total / self.used * 1000 if self.used else 0.0
+
+
+@dataclass(frozen=True)
+class SpeculativeSearchTimings:
+    """Тайминги одного запроса"""
+
+    # Время от запуска поиска до окончания классификации
+    classification: float
+    # Длительность поиска в Milvus
+    search: float
+    # Ожидание поиска после классификации
+    waited: float
+
+    @property
+    def saved(self) -> float:
+        """Время, которое поиск занял бы при последовательном выполнении"""
+        return self.search - self.waited
+
+
+# Глобальные счетчики спекулятивного поиска
+speculative_search_stats = SpeculativeSearchStats()
+
+
+class SpeculativeSearch:
+    """
+    Поиск в Milvus, запущенный параллельно с классификацией
+
+    Результат забирается через result(), если запрос общий, иначе поиск
+    отменяется через discard(). Если результат понадобился после отмены,
+    result() выполняет поиск заново.
+    """
+
+    def __init__(self, user_id: int, message: Message):
+        self.user_id = user_id
+        self.message = message
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self._consumed = False
+        self._discarded = False
+        self._task = asyncio.create_task(self._search(user_id, message))
+        speculative_search_stats.started += 1
+
+    async def _search(self, user_id: int, message: Message) -> Optional[Dict[str, Any]]:
+        try:
+            return await search_milvus(user_id, message)
+        finally:
+            self._finished = time.perf_counter()
+
+    async def result(self) -> Optional[Dict[str, Any]]:
+        """Результат поиска, ожидает его завершения при необходимости"""
+        if self._discarded:
+            # Поиск отменен, но запрос все же обрабатывается как общий
+            logger.debug(
+                f"Спекулятивный поиск Milvus для пользователя {self.user_id} "
+                f"был отменен, выполняется повторный поиск"
+            )
+            return await search_milvus(self.user_id, self.message)
+        if self._consumed:
+            # Результат уже получен ранее: повторно не учитываем
+            return await self._task
+
+        self._consumed = True
+        classified_at = time.perf_counter()
+        result = await self._task
+
+        finished = self._finished or classified_at
+        timings = SpeculativeSearchTimings(
+            classification=classified_at - self._started,
+            search=finished - self._started,
+            waited=max(0.0, finished - classified_at),
+        )
+        speculative_search_stats.used += 1
+        speculative_search_stats.saved_total += timings.saved
+        logger.info(
+            f"Спекулятивный поиск Milvus для пользователя {self.user_id}: "
+            f"классификация {timings.classification * 1000:.0f} мс, "
+            f"поиск {timings.search * 1000:.0f} мс, "
+            f"ожидание {timings.waited * 1000:.0f} мс, "
+            f"сэкономлено {timings.saved * 1000:.0f} мс"
+        )
+        return result
+
+    def discard(self) -> None:
+        """Отмена поиска, если его результат не понадобился"""
+        if self._consumed:
+            return
+        self._consumed = True
+        self._discarded = True
+        speculative_search_stats.discarded += 1
+        if not self._task.done():
+            self._task.cancel()
+        logger.debug(
+            f"Спекулятивный поиск Milvus для пользователя {self.user_id} отменен"
+        )
@@ -0,0 +1,263 @@
+"""
+Показ ответа модели по мере генерации.
+Текст накапливается и выводится правками одного сообщения не чаще заданного
+интервала, чтобы не превышать ограничения Telegram на частоту правок.
+Ответ длиннее лимита сообщения продолжается в следующем сообщении.
+"""
+
+import asyncio
+import html
+import logging
+import re
+import time
+from contextlib import suppress
+from typing import AsyncIterator, List, Optional, Tuple
+
+from aiogram.enums import ParseMode
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramRetryAfter,
+)
+from aiogram.types import Message
+
+from bot.config import query_pipeline_config
+from bot.utils.progress import progress_tracker
+from bot.utils.telegram_limiter import intermediate_edits
+
+logger = logging.getLogger(__name__)
+
+# Максимальная длина текста сообщения Telegram
+MESSAGE_LIMIT = 4096
+
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z][\w-]*)[^>]*>")
+# Незавершенный тег или HTML сущность в конце частичного ответа
+_INCOMPLETE_RE = re.compile(r"<[^>]*$|&#?\w*$")
+
+
+def _balance_tags(text: str) -> str:
+    """
+    Частичный HTML, пригодный для разбора Telegram: незавершенный хвост
+    отбрасывается, лишние закрывающие теги удаляются, открытые закрываются
+    """
+    text = _INCOMPLETE_RE.sub("", text)
+    parts: List[str] = []
+    stack: List[str] = []
+    pos = 0
+    for match in _TAG_RE.finditer(text):
+        closing, name = match.group(1), match.group(2).lower()
+        parts.append(text[pos : match.start()])
+        pos = match.end()
+        if not closing:
+            stack.append(name)
+            parts.append(match.group(0))
+        elif name in stack:
+            # Закрываем вложенные теги, оставшиеся открытыми
+            while stack[-1] != name:
+                parts.append(f"</{stack.pop()}>")
+            stack.pop()
+            parts.append(match.group(0))
+    parts.append(text[pos:])
+    parts.extend(f"</{name}>" for name in reversed(stack))
+    return "".join(parts)
+
+
+def _plain_text(text: str) -> str:
+    """Текст без HTML разметки"""
+    return html.unescape(_TAG_RE.sub("", _INCOMPLETE_RE.sub("", text)))
+
+
+def _split_point(text: str, limit: int = MESSAGE_LIMIT) -> int:
+    """Позиция разбиения длинного текста: по абзацу, строке или слову"""
+    for separator in ("\n\n", "\n", " "):
+        position = text.rfind(separator, 0, limit)
+        if position > limit // 2:
+            return position
+    return limit
+
+
+class StreamingMessage:
+    """Сообщение, дополняемое по мере поступления текста"""
+
+    def __init__(
+        self,
+        message: Message,
+        prefix: str = "",
+        interval: Optional[float] = None,
+        parse_mode: Optional[str] = ParseMode.HTML,
+    ):
+        """
+        Args:
+            message: Сообщение пользователя, на которое дается ответ
+            prefix: Текст перед ответом (например, строка статуса)
+            interval: Минимальный интервал между правками, секунды
+            parse_mode: Разметка ответа (None - обычный текст)
+        """
+        self.message = message
+        self.prefix = prefix
+        self.interval = (
+            query_pipeline_config.stream_edit_interval if interval is None else interval
+        )
+        self.parse_mode = parse_mode
+        # Весь полученный текст ответа (без префикса)
+        self.text = ""
+        # Текст текущего сообщения: префикс и еще не закрепленная часть ответа
+        self._tail = prefix
+        self._current: Optional[Message] = None
+        self._shown: Optional[Tuple[str, Optional[str]]] = None
+        self._next_edit = 0.0
+        # Частичный HTML не разобран Telegram: до конца показываем без разметки
+        self._plain = False
+        self.edits = 0
+
+    async def append(self, chunk: str) -> None:
+        """Добавление фрагмента; сообщение обновляется не чаще интервала"""
+        self.text += chunk
+        self._tail += chunk
+        await self._rollover()
+        if self.text.strip() and time.monotonic() >= self._next_edit:
+            await self._show_partial(self._tail)
+
+    async def finish(self) -> None:
+        """Окончательный вид ответа с разметкой"""
+        await self._rollover()
+        if self._tail.strip():
+            await self._show_final(self._tail)
+
+    async def _rollover(self) -> None:
+        """Закрепление заполненных сообщений и переход к следующему"""
+        while len(self._tail) > MESSAGE_LIMIT:
+            position = _split_point(self._tail)
+            await self._show_final(self._tail[:position])
+            self._tail = self._tail[position:].lstrip()
+            self._current = None
+            self._shown = None
+
+    async def _show_partial(self, text: str) -> None:
+        """Промежуточная правка; ошибки не прерывают получение ответа"""
+        try:
+            if self.parse_mode is None:
+                await self._render(text, None)
+                return
+            if self._plain:
+                await self._render(_plain_text(text), None)
+                return
+            try:
+                await self._render(_balance_tags(text), self.parse_mode)
+            except TelegramBadRequest as e:
+                logger.debug(f"Частичный ответ не разобран как HTML: {e}")
+                self._plain = True
+                await self._render(_plain_text(text), None)
+
+        except TelegramAPIError as e:
+            logger.warning(f"Не удалось обновить сообщение с ответом: {e}")
+            self._next_edit = time.monotonic() + self.interval
+
+    async def _show_final(self, text: str) -> None:
+        """Окончательная правка; при ошибке разметки - обычный текст"""
+        if self.parse_mode is not None:
+            try:
+                await self._render(_balance_tags(text), self.parse_mode, wait=True)
+                return
+            except TelegramBadRequest as e:
+                logger.warning(
+                    f"Ответ не разобран как HTML, отправка без разметки: {e}"
+                )
+            text = _plain_text(text)
+        await self._render(text, None, wait=True)
+
+    async def _render(
+        self, text: str, parse_mode: Optional[str], wait: bool = False
+    ) -> None:
+        """
+        Отправка первого или правка текущего сообщения
+
+        При превышении частоты запросов промежуточная правка пропускается до
+        окончания паузы, а окончательная повторяется после ожидания.
+        Промежуточную правку может пропустить и планировщик запросов.
+        """
+        if (text, parse_mode) == self._shown:
+            return
+
+        while True:
+            try:
+                if self._current is None:
+                    self._current = await self.message.answer(
+                        text, parse_mode=parse_mode
+                    )
+                    progress_tracker.answer_shown(self.message.chat.id)
+                else:
+                    with intermediate_edits(not wait):
+                        edited = await self._current.edit_text(
+                            text, parse_mode=parse_mode
+                        )
+                    if edited is False:
+                        # Правка пропущена планировщиком: текст еще не показан
+                        self._next_edit = time.monotonic() + self.interval
+                        return
+                    self.edits += 1
+                break
+
+            except TelegramRetryAfter as e:
+                self._next_edit = time.monotonic() + e.retry_after
+                if not wait:
+                    logger.debug(f"Правка сообщения отложена на {e.retry_after} с")
+                    return
+                logger.warning(f"Превышена частота правок, ожидание {e.retry_after} с")
+                await asyncio.sleep(e.retry_after)
+
+            except TelegramBadRequest as e:
+                if "message is not modified" not in str(e):
+                    raise
+                break
+
+        self._shown = (text, parse_mode)
+        self._next_edit = time.monotonic() + self.interval
+
+
+async def stream_answer(
+    message: Message,
+    chunks: AsyncIterator[str],
+    prefix: str = "",
+    parse_mode: Optional[str] = ParseMode.HTML,
+) -> Optional[str]:
+    """
+    Показ ответа по мере генерации в одном сообщении
+
+    Args:
+        message: Сообщение пользователя, на которое дается ответ
+        chunks: Фрагменты ответа (например, call_ai_stream)
+        prefix: Текст перед ответом
+        parse_mode: Разметка ответа
+
+    Returns:
+        Полный текст ответа или None, если ответ пуст (ничего не отправлено)
+
+    Raises:
+        Ошибку источника фрагментов, если поток прерван после начала ответа
+    """
+    streaming = StreamingMessage(message, prefix=prefix, parse_mode=parse_mode)
+    started = time.monotonic()
+    first_chunk: Optional[float] = None
+
+    try:
+        async for chunk in chunks:
+            if first_chunk is None:
+                first_chunk = time.monotonic() - started
+            await streaming.append(chunk)
+    except Exception:
+        # Полученная часть ответа остается, ошибку обрабатывает вызывающий код
+        if streaming.text.strip():
+            with suppress(TelegramAPIError):
+                await streaming.finish()
+        raise
+
+    if not streaming.text.strip():
+        return None
+
+    await streaming.finish()
+    logger.debug(
+        f"Ответ показан потоково: первый фрагмент через {first_chunk or 0:.2f} с, "
+        f"всего {time.monotonic() - started:.2f} с, правок {streaming.edits}"
+    )
+    return streaming.text
@@ -0,0 +1,340 @@
+"""
+Планировщик исходящих запросов к Telegram Bot API.
+Частоту запросов ограничивают общая для бота и отдельные для каждого чата
+маркерные корзины (token bucket). Ответы пользователю получают квоту раньше
+служебных действий: стикера загрузки, индикатора набора, удаления сообщений.
+После RetryAfter чат не получает запросов до окончания паузы.
+Ответ пользователю всегда дожидается квоты, а индикатор набора и
+промежуточные правки после дедлайна обработки запроса пропускаются.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    DeleteMessage,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    SendChatAction,
+    SendSticker,
+)
+from aiogram.methods.base import TelegramMethod, TelegramType
+
+from bot.api import deadline
+from bot.config import TelegramRateLimitConfig, telegram_rate_limit_config
+
+logger = logging.getLogger(__name__)
+
+ChatId = Union[int, str]
+
+# Приоритеты запросов: меньшее значение получает квоту раньше
+PRIORITY_ANSWER = 0
+PRIORITY_COSMETIC = 1
+
+_COSMETIC_METHODS = (SendChatAction, SendSticker, DeleteMessage)
+_EDIT_METHODS = (
+    EditMessageText,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+)
+
+# Правки внутри intermediate_edits() промежуточные: их можно пропустить
+_intermediate: ContextVar[bool] = ContextVar("telegram_intermediate", default=False)
+
+# Повторов запроса после RetryAfter
+_MAX_RETRIES = 3
+# Число чатов, после которого удаляются корзины простаивающих чатов
+_MAX_CHATS = 10000
+
+
+class TokenBucket:
+    """Маркерная корзина: rate маркеров в секунду, не больше burst"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(max(burst, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        # Корзина может быть создана позже момента now, вычисленного ранее
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = max(self._updated, now)
+
+    def ready_at(self, now: float) -> float:
+        """Момент, когда в корзине будет хотя бы один маркер"""
+        self._refill(now)
+        if self._tokens >= 1:
+            return now
+        return now + (1 - self._tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        """Списание маркера (наличие проверяется через ready_at)"""
+        self._refill(now)
+        self._tokens -= 1
+
+    def idle(self, now: float) -> bool:
+        """Корзина полна: чат давно не получал запросов"""
+        self._refill(now)
+        return self._tokens >= self.capacity
+
+
+@dataclass
+class TelegramSchedulerStats:
+    """Счетчики планировщика запросов к Telegram"""
+
+    requests: int = 0
+    # Запросы, ожидавшие квоту
+    throttled: int = 0
+    # Ответы RetryAfter от Telegram
+    retry_after: int = 0
+    # Запросы, не получившие квоту за допустимое время ожидания
+    dropped: int = 0
+    # Текущая и наибольшая длина очереди
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    # Суммарное и наибольшее ожидание квоты, секунды
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        """Среднее ожидание квоты на запрос"""
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+# Ожидающий запрос: приоритет, порядковый номер, чат и будущий результат
+_Waiter = Tuple[int, int, ChatId, "asyncio.Future[None]"]
+
+
+class TelegramScheduler:
+    """Очередь запросов с общей и отдельными для чатов квотами"""
+
+    def __init__(self, config: TelegramRateLimitConfig):
+        self.config = config
+        self._global = TokenBucket(config.global_rate, config.global_burst)
+        self._chats: Dict[ChatId, TokenBucket] = {}
+        # Окончание паузы RetryAfter по чатам
+        self._blocked: Dict[ChatId, float] = {}
+        self._waiters: List[_Waiter] = []
+        self._sequence = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = TelegramSchedulerStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def _bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= _MAX_CHATS:
+                self._prune(time.monotonic())
+            # Отрицательный идентификатор - группа или канал
+            group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.config.group_rate if group else self.config.chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.config.chat_burst)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        """Удаление корзин чатов без запросов и активной паузы"""
+        waiting = {waiter[2] for waiter in self._waiters}
+        for chat_id, bucket in list(self._chats.items()):
+            if chat_id not in waiting and bucket.idle(now):
+                del self._chats[chat_id]
+        for chat_id, until in list(self._blocked.items()):
+            if until <= now:
+                del self._blocked[chat_id]
+
+    async def acquire(
+        self, chat_id: ChatId, priority: int, max_wait: Optional[float] = None
+    ) -> bool:
+        """
+        Ожидание квоты на запрос в чат
+
+        Returns:
+            False, если квота не получена за max_wait секунд
+        """
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[None]" = loop.create_future()
+        self._sequence += 1
+        self._waiters.append((priority, self._sequence, chat_id, future))
+        self._stats.requests += 1
+        self._dispatch()
+
+        if future.done():
+            return True
+
+        self._stats.throttled += 1
+        self._stats.queue_depth = len(self._waiters)
+        self._stats.max_queue_depth = max(
+            self._stats.max_queue_depth, self._stats.queue_depth
+        )
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, max_wait)
+            return True
+        except asyncio.TimeoutError:
+            self._stats.dropped += 1
+            # Убираем отмененное ожидание из очереди, не дожидаясь таймера
+            self._dispatch()
+            return False
+        finally:
+            waited = time.monotonic() - started
+            self._stats.total_wait += waited
+            self._stats.max_wait = max(self._stats.max_wait, waited)
+
+    def block(self, chat_id: ChatId, delay: float) -> None:
+        """Пауза запросов в чат после RetryAfter"""
+        self._stats.retry_after += 1
+        until = time.monotonic() + delay
+        self._blocked[chat_id] = max(self._blocked.get(chat_id, 0.0), until)
+
+    def _dispatch(self) -> None:
+        """Выдача квоты ожидающим запросам в порядке приоритета"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        remaining: List[_Waiter] = []
+        next_ready = float("inf")
+        for waiter in sorted(self._waiters):
+            chat_id, future = waiter[2], waiter[3]
+            if future.done():
+                # Ожидание отменено
+                continue
+
+            bucket = self._bucket(chat_id)
+            ready = max(
+                self._global.ready_at(now),
+                bucket.ready_at(now),
+                self._blocked.get(chat_id, 0.0),
+            )
+            if ready <= now:
+                self._global.consume(now)
+                bucket.consume(now)
+                future.set_result(None)
+            else:
+                remaining.append(waiter)
+                next_ready = min(next_ready, ready)
+
+        self._waiters = remaining
+        self._stats.queue_depth = len(remaining)
+        if remaining:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(next_ready - now, self._dispatch)
+
+    @property
+    def stats(self) -> TelegramSchedulerStats:
+        """Снимок счетчиков планировщика"""
+        return TelegramSchedulerStats(
+            requests=self._stats.requests,
+            throttled=self._stats.throttled,
+            retry_after=self._stats.retry_after,
+            dropped=self._stats.dropped,
+            queue_depth=len(self._waiters),
+            max_queue_depth=self._stats.max_queue_depth,
+            total_wait=self._stats.total_wait,
+            max_wait=self._stats.max_wait,
+        )
+
+    def reset_stats(self) -> None:
+        """Обнуление счетчиков"""
+        self._stats = TelegramSchedulerStats()
+
+
+@contextmanager
+def intermediate_edits(enabled: bool = True) -> Iterator[None]:
+    """
+    Правки сообщений внутри блока промежуточные
+
+    Такая правка не повторяется после RetryAfter и пропускается (запрос
+    возвращает False), если квота не получена до дедлайна обработки запроса.
+    """
+    token = _intermediate.set(enabled)
+    try:
+        yield
+    finally:
+        _intermediate.reset(token)
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: запросы в чаты проходят через планировщик
+
+    Запросы без чата (getUpdates, answerInlineQuery, answerCallbackQuery и
+    т.п.) отправляются сразу. Ответы и окончательные правки всегда ожидают
+    квоту и повторяются после RetryAfter. Индикатор набора и промежуточные
+    правки не повторяются и пропускаются, если квота не получена вовремя.
+    """
+
+    def __init__(self, scheduler: TelegramScheduler):
+        self.scheduler = scheduler
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        if not self.scheduler.enabled or chat_id is None:
+            return await make_request(bot, method)
+
+        config = self.scheduler.config
+        cosmetic = isinstance(method, _COSMETIC_METHODS)
+        chat_action = isinstance(method, SendChatAction)
+        intermediate = isinstance(method, _EDIT_METHODS) and _intermediate.get()
+        retry = not cosmetic and not intermediate
+        priority = PRIORITY_COSMETIC if cosmetic or intermediate else PRIORITY_ANSWER
+
+        attempt = 0
+        while True:
+            max_wait: Optional[float] = None
+            if chat_action:
+                # Устаревший индикатор набора бесполезен
+                max_wait = config.chat_action_max_wait
+            elif intermediate:
+                # Промежуточная правка после дедлайна пользователю не нужна
+                left = deadline.remaining()
+                max_wait = None if left is None else max(left, 0.0)
+
+            if not await self.scheduler.acquire(chat_id, priority, max_wait):
+                logger.debug(f"Запрос {method.__api_method__} в чат {chat_id} пропущен")
+                return False
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.scheduler.block(chat_id, e.retry_after)
+                attempt += 1
+                if (
+                    not retry
+                    or attempt >= _MAX_RETRIES
+                    or e.retry_after > config.max_retry_after
+                ):
+                    raise
+                logger.warning(
+                    f"Превышена частота запросов в чат {chat_id}, "
+                    f"повтор {method.__api_method__} через {e.retry_after} с"
+                )
+
+
+# Глобальный планировщик запросов к Telegram
+telegram_scheduler = TelegramScheduler(telegram_rate_limit_config)
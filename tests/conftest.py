@@ -0,0 +1,53 @@
+"""
+Общие настройки тестов.
+bot.config читает обязательные переменные окружения при импорте, поэтому
+они задаются до импорта модулей бота.
+"""
+
+import os
+from typing import AsyncIterator, Awaitable, Callable, List
+
+import pytest
+from aiohttp import web
+
+for _name in ("TOKEN", "TEST_TOKEN", "API_KEY", "WHISPER_API", "UTILS_URL"):
+    os.environ.setdefault(_name, "test")
+os.environ.setdefault("CORE_URL", "http://core.test")
+
+from bot.api.http import http_client  # noqa: E402
+
+# Запуск локального HTTP сервера: приложение -> базовый URL
+Serve = Callable[[web.Application], Awaitable[str]]
+
+
+class FakeClock:
+    """Управляемые часы для кэшей и выключателей"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+async def serve() -> AsyncIterator[Serve]:
+    """Запуск локального HTTP сервера, возвращает его базовый URL"""
+    runners: List[web.AppRunner] = []
+
+    async def start(app: web.Application) -> str:
+        runner = web.AppRunner(app)
+        await runner.setup()
+        runners.append(runner)
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    await http_client.close()
+    for runner in runners:
+        await runner.cleanup()
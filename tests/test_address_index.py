@@ -0,0 +1,99 @@
+"""Тесты локального индекса адресов"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from bot.utils.address_index import AddressIndex, LocalAddressIndex, normalize_address
+
+
+def _record(i: int, address: str, territory: str = "Пермь") -> Dict[str, Any]:
+    return {
+        "id": str(i),
+        "address": address,
+        "territory_id": "59",
+        "territory_name": territory,
+        "conn_type": ["FTTB"],
+    }
+
+
+_RECORDS = [
+    _record(1, "ул. Ленина, д. 5"),
+    _record(2, "ул. Ленина, д. 17, корп. 2"),
+    _record(3, "ул. Лесная, д. 5"),
+    _record(4, "ул. Мира, д. 12", territory="Березники"),
+]
+
+
+@pytest.fixture(scope="module")
+def index() -> AddressIndex:
+    return AddressIndex(_RECORDS)
+
+
+def test_normalize_address() -> None:
+    assert normalize_address("  Ул. Пушкина, д.5/1 ёлка ") == "ул пушкина д 5 1 елка"
+
+
+def test_exact_address_ranks_first(index: AddressIndex) -> None:
+    hits = index.search("Пермь ленина 5")
+
+    assert hits[0].id == "1"
+    assert hits[0].score == 1.0
+    assert hits[0].as_dict()["conn_type"] == ["FTTB"]
+
+
+def test_last_word_is_matched_by_prefix(index: AddressIndex) -> None:
+    assert [hit.id for hit in index.search("березники ми")] == ["4"]
+
+
+def test_typo_is_matched_by_trigrams(index: AddressIndex) -> None:
+    hits = index.search("лениан 17")
+
+    assert hits[0].id == "2"
+    assert 0.6 <= hits[0].score < 1.0
+
+
+def test_equal_scores_prefer_shorter_addresses(index: AddressIndex) -> None:
+    hits = index.search("ленина")
+
+    assert [hit.id for hit in hits] == ["1", "2"]
+    assert hits[0].score == hits[1].score
+
+
+def test_unknown_words_lower_score(index: AddressIndex) -> None:
+    assert index.search("ленина 5 абвгд", min_score=0.5)[0].score < 1.0
+    assert index.search("абвгд ежзик ленина", min_score=0.6) == []
+
+
+def test_limit_with_frequent_words() -> None:
+    # Частые слова (ул, д) не используются для отбора большого числа кандидатов
+    records = [_record(i, f"ул. Садовая, д. {i}") for i in range(1, 600)]
+    index = AddressIndex(records + [_record(1000, "ул. Лесная, д. 7")])
+
+    hits = index.search("ул садовая д 7", limit=3)
+
+    assert hits[0].address == "ул. Садовая, д. 7"
+    assert len(hits) == 3
+
+
+async def test_local_index_reloads_changed_snapshot(tmp_path: Path) -> None:
+    path = tmp_path / "addresses.jsonl"
+    path.write_text(
+        "\n".join(json.dumps(record, ensure_ascii=False) for record in _RECORDS),
+        encoding="utf-8",
+    )
+    local = LocalAddressIndex(str(path), refresh_interval=60, min_score=0.6)
+    assert local.search("ленина") == []
+
+    assert await local.load()
+    assert not await local.load()
+    assert local.stats.size == 4
+
+    records: List[Dict[str, Any]] = [_record(9, "ул. Ленина, д. 1")]
+    path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, (0, 1))
+    assert await local.load()
+    assert [hit.id for hit in local.search("ленина")] == ["9"]
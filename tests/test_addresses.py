@@ -0,0 +1,101 @@
+"""Тесты кэша поиска адресов"""
+
+from typing import Any, Dict, List
+
+from bot.api.addresses import AddressSearchCache
+from bot.api.base import APIResponse
+from bot.utils.address_index import normalize_address
+
+_ADDRESSES = [
+    {"territory_name": "Пермь", "address": "ул. Ленина, д. 5"},
+    {"territory_name": "Пермь", "address": "ул. Ленина, д. 17"},
+    {"territory_name": "Пермь", "address": "ул. Лесная, д. 1"},
+]
+
+
+class _Client:
+    """Core API, возвращающий адреса, в которых есть все слова запроса"""
+
+    def __init__(self, addresses: List[Dict[str, Any]]):
+        self.addresses = addresses
+        self.queries: List[str] = []
+
+    async def get_addresses_from_redis(self, query: str) -> APIResponse:
+        self.queries.append(query)
+        words = normalize_address(query).split()
+        found = [
+            item
+            for item in self.addresses
+            if all(
+                word in normalize_address(f"{item['territory_name']} {item['address']}")
+                for word in words
+            )
+        ]
+        return APIResponse(success=True, data={"addresses": found})
+
+
+def _cache(client: _Client, page_size: int = 50) -> AddressSearchCache:
+    return AddressSearchCache(
+        client, ttl=60, maxsize=100, page_size=page_size  # type: ignore[arg-type]
+    )
+
+
+async def test_same_normalized_query_is_served_from_cache() -> None:
+    client = _Client(_ADDRESSES)
+    cache = _cache(client)
+
+    await cache.search("Пермь, Ленина")
+    response = await cache.search("  пермь ленина ")
+
+    assert response.data == {"addresses": _ADDRESSES[:2]}
+    assert client.queries == ["Пермь, Ленина"]
+    assert cache.stats.hits == 1
+
+
+async def test_longer_query_is_filtered_from_complete_prefix() -> None:
+    client = _Client(_ADDRESSES)
+    cache = _cache(client)
+
+    await cache.search("пермь ле")
+    response = await cache.search("пермь лен")
+
+    assert response.data == {"addresses": _ADDRESSES[:2]}
+    assert client.queries == ["пермь ле"]
+    assert cache.stats.prefix_hits == 1
+
+
+async def test_incomplete_page_is_not_reused_for_prefix() -> None:
+    client = _Client(_ADDRESSES)
+    cache = _cache(client, page_size=3)
+
+    await cache.search("пермь")
+    await cache.search("пермь лес")
+
+    assert client.queries == ["пермь", "пермь лес"]
+
+
+async def test_empty_prefix_result_is_checked_in_core_api() -> None:
+    client = _Client(_ADDRESSES)
+    cache = _cache(client)
+
+    await cache.search("пермь")
+    await cache.search("пермь мира")
+
+    assert client.queries == ["пермь", "пермь мира"]
+    assert cache.stats.misses == 2
+
+
+async def test_prefix_filter_matches_whole_words() -> None:
+    client = _Client(_ADDRESSES)
+    cache = _cache(client)
+
+    await cache.search("пермь ленина")
+    response = await cache.search("пермь ленина 1")
+
+    # Номер дома набирается по цифрам: "1" - начало номера 17
+    assert response.data == {"addresses": [_ADDRESSES[1]]}
+    assert client.queries == ["пермь ленина"]
+
+    # "7" - конец номера 17, а не начало слова: запрос уходит в Core API
+    await cache.search("пермь ленина д 7")
+    assert client.queries == ["пермь ленина", "пермь ленина д 7"]
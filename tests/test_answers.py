@@ -0,0 +1,52 @@
+"""Тесты кэша ответов на общие вопросы"""
+
+from bot.api.answers import AnswerCache, normalize_question
+
+
+def _cache(enabled: bool = True) -> AnswerCache:
+    return AnswerCache(enabled=enabled, ttl=60, maxsize=10, min_words=2)
+
+
+def test_normalize_question() -> None:
+    assert (
+        normalize_question("  Как ПОДКЛЮЧИТЬ роутер?! Ёж ")
+        == "как подключить роутер еж"
+    )
+
+
+def test_rephrased_question_with_same_context_hits() -> None:
+    cache = _cache()
+    cache.put(cache.key("Как подключить роутер?", ["b", "a"], "m"), "Ответ", 2.5)
+
+    key = cache.key("как подключить  роутер", ["a", "b"], "m")
+
+    assert cache.get(key) == "Ответ"
+    assert cache.stats.saved_time == 2.5
+
+
+def test_context_and_model_are_part_of_key() -> None:
+    cache = _cache()
+    cache.put(cache.key("как подключить роутер", ["a"], "m"), "Ответ", 1.0)
+
+    assert cache.get(cache.key("как подключить роутер", ["c"], "m")) is None
+    assert cache.get(cache.key("как подключить роутер", ["a"], "other")) is None
+    assert cache.stats.misses == 2
+
+
+def test_short_questions_and_disabled_cache_are_skipped() -> None:
+    cache = _cache()
+    assert cache.key("привет", [], "m") is None
+    assert cache.stats.skipped == 1
+
+    assert _cache(enabled=False).key("как подключить роутер", [], "m") is None
+
+
+def test_invalidate_clears_answers() -> None:
+    cache = _cache()
+    key = cache.key("как подключить роутер", [], "m")
+    cache.put(key, "Ответ", 1.0)
+    cache.put(cache.key("пустой ответ", [], "m"), "", 1.0)
+    assert cache.stats.size == 1
+
+    cache.invalidate()
+    assert cache.get(key) is None
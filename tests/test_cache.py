@@ -0,0 +1,62 @@
+"""Тесты TTL кэша и кэша проверенных пользователей"""
+
+from conftest import FakeClock
+
+from bot.api.auth import UserRegistrationCache
+from bot.utils.cache import TTLCache
+
+
+def test_ttl_cache_expires_entries() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    clock.advance(5)
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+
+
+def test_ttl_cache_replace_keeps_expiry() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.advance(3)
+    assert cache.replace("a", 2)
+    assert cache.get("a") == 2
+    clock.advance(2)
+    assert not cache.replace("a", 3)
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.stats.evictions == 1
+
+
+def test_user_cache_positive_hit_requires_same_profile() -> None:
+    cache = UserRegistrationCache(ttl=60, negative_ttl=10, maxsize=10)
+    profile = ("Иван", "Петров", "ivan")
+    cache.remember(1, profile, allowed=True)
+
+    assert cache.lookup(1, profile) is True
+    # Профиль в Telegram изменился: Core API должен получить новые данные
+    assert cache.lookup(1, ("Иван", "Петров", "ivan_new")) is None
+
+
+def test_user_cache_denial_replaces_positive_entry() -> None:
+    cache = UserRegistrationCache(ttl=60, negative_ttl=10, maxsize=10)
+    profile = ("Иван", "", "")
+    cache.remember(1, profile, allowed=True)
+    cache.remember(1, profile, allowed=False)
+
+    assert cache.lookup(1, profile) is False
+    assert cache.stats.negative_hits == 1
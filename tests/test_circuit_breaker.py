@@ -0,0 +1,126 @@
+"""Тесты автоматических выключателей"""
+
+from conftest import FakeClock
+
+from bot.api.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitPermit,
+    CircuitState,
+)
+from bot.config import CircuitBreakerConfig
+
+
+def _breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(
+        "core/v1/test", failure_threshold=2, recovery_timeout=10, clock=clock
+    )
+
+
+def _permit(breaker: CircuitBreaker) -> CircuitPermit:
+    permit = breaker.allow_request()
+    assert permit is not None
+    return permit
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        _permit(breaker).record_failure()
+
+
+def test_opens_after_consecutive_failures() -> None:
+    breaker = _breaker(FakeClock())
+    _permit(breaker).record_failure()
+    _permit(breaker).record_success()
+    _permit(breaker).record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    _permit(breaker).record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request() is None
+    assert breaker.snapshot().rejected == 1
+
+
+def test_probe_success_closes_breaker() -> None:
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _open(breaker)
+    clock.advance(10)
+
+    probe = _permit(breaker)
+    assert probe.probe
+    # Пробный запрос один: остальные отклоняются до его результата
+    assert breaker.allow_request() is None
+
+    probe.record_success()
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_probe_failure_reopens_breaker() -> None:
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _open(breaker)
+    clock.advance(10)
+
+    _permit(breaker).record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.snapshot().times_opened == 2
+    assert breaker.snapshot().retry_in == 10
+
+
+def test_released_probe_frees_slot() -> None:
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _open(breaker)
+    clock.advance(10)
+
+    _permit(breaker).release()
+
+    assert breaker.allow_request() is not None
+
+
+def test_requests_started_before_opening_do_not_change_state() -> None:
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    stale = _permit(breaker)
+    _open(breaker)
+    clock.advance(10)
+    probe = _permit(breaker)
+
+    # Запоздалый успех не закрывает выключатель вместо пробного запроса
+    stale.record_success()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is None
+
+    probe.record_success()
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_result_is_recorded_once() -> None:
+    breaker = _breaker(FakeClock())
+    permit = _permit(breaker)
+    permit.record_failure()
+    permit.record_failure()
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.snapshot().total_failures == 1
+
+
+def test_registry_shares_breaker_per_endpoint() -> None:
+    registry = CircuitBreakerRegistry(CircuitBreakerConfig(failure_threshold=1))
+    breaker = registry.get("http://core/", "/v1/log")
+
+    assert breaker is registry.get("http://core", "v1/log")
+    assert breaker is not registry.get("http://core", "v1/users")
+
+    assert breaker is not None
+    _permit(breaker).record_failure()
+    assert registry.open_circuits() == ["http://core/v1/log"]
+
+    assert (
+        CircuitBreakerRegistry(CircuitBreakerConfig(enabled=False)).get(
+            "http://core", "v1/log"
+        )
+        is None
+    )
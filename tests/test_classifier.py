@@ -0,0 +1,42 @@
+"""Тесты локальной классификации запросов"""
+
+import pytest
+
+from bot.utils.classifier import CATEGORY_GENERAL, CATEGORY_TARIFFS, QueryClassifier
+
+
+@pytest.mark.parametrize(
+    "query, category, needs_llm, reason",
+    [
+        ("Какие у вас тарифы?", CATEGORY_TARIFFS, False, "tariff_keyword"),
+        ("Смена тарифного плана", CATEGORY_TARIFFS, False, "tariff_keyword"),
+        ("тарифы ул. Ленина, д. 5", CATEGORY_TARIFFS, True, "tariff_with_address"),
+        ("тарифы и т.д.", CATEGORY_TARIFFS, False, "tariff_keyword"),
+        ("какие тарифы на улице Мира", CATEGORY_TARIFFS, True, "tariff_with_address"),
+        ("тарифф подешевле", CATEGORY_TARIFFS, False, "tariff_keyword"),
+        ("покажи торифы", None, True, "fuzzy_tariff"),
+        ("tariff list", None, True, "fuzzy_tariff"),
+        ("Сколько стоит подключение?", None, True, "pricing"),
+        ("Как настроить роутер?", CATEGORY_GENERAL, False, "no_tariff_keyword"),
+    ],
+)
+def test_classify(query: str, category: str, needs_llm: bool, reason: str) -> None:
+    decision = QueryClassifier().classify(query)
+
+    assert (decision.category, decision.needs_llm, decision.reason) == (
+        category,
+        needs_llm,
+        reason,
+    )
+
+
+def test_decisions_are_counted() -> None:
+    classifier = QueryClassifier()
+    for query in ("тарифы", "тарифы ул. Мира 1", "как дела", "цена"):
+        classifier.classify(query)
+
+    assert classifier.llm_calls_saved == 2
+    assert classifier.decisions["pricing"] == 1
+
+    classifier.reset_stats()
+    assert classifier.decisions == {}
@@ -0,0 +1,58 @@
+"""Тесты разбора объединенного ответа LLM (классификация и ответ)"""
+
+from typing import AsyncIterator, Iterable, List
+
+from bot.utils.helpers import (
+    _answer_chunks,
+    _read_combined_header,
+    parse_classification_result,
+)
+
+
+async def _stream(chunks: Iterable[str]) -> AsyncIterator[str]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(chunks: AsyncIterator[str]) -> List[str]:
+    return [chunk async for chunk in chunks]
+
+
+async def test_answer_is_streamed_after_marker() -> None:
+    chunks = _stream(
+        ["Категория: Общий\nАдрес: не найден\nОт", "вет:\n Роутер ", "перезагрузите"]
+    )
+
+    header, start = await _read_combined_header(chunks)
+    answer = await _collect(_answer_chunks(start or "", chunks))
+
+    assert parse_classification_result(header) == ("Общий", None)
+    assert "".join(answer) == "Роутер перезагрузите"
+    assert answer[0] == "Роутер "
+
+
+async def test_marker_is_matched_at_line_start_only() -> None:
+    chunks = _stream(["Категория: Общий\nКомментарий: ответ: позже\n", "ОТВЕТ: да"])
+
+    header, start = await _read_combined_header(chunks)
+
+    assert "Комментарий" in header
+    assert start == " да"
+
+
+async def test_tariff_header_without_answer() -> None:
+    chunks = _stream(["Категория: Тарифы\n", "Адрес: г. Пермь, ул. Ленина, д. 5\n"])
+
+    header, start = await _read_combined_header(chunks)
+
+    assert start is None
+    assert parse_classification_result(header) == (
+        "Тарифы",
+        "г. Пермь, ул. Ленина, д. 5",
+    )
+
+
+async def test_leading_whitespace_chunks_are_skipped() -> None:
+    answer = await _collect(_answer_chunks("\n", _stream(["  ", "\n Да", " ", "нет"])))
+
+    assert answer == ["Да", " ", "нет"]
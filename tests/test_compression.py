@@ -0,0 +1,91 @@
+"""Тесты сжатия тел запросов"""
+
+import gzip
+from typing import List, Optional
+
+import pytest
+from aiohttp import web
+from conftest import Serve
+
+from bot.api import base
+from bot.api.compression import RequestCompressor
+from bot.config import HttpClientConfig
+
+_BODY = b'{"logs": "' + b"x" * 4096 + b'"}'
+
+
+def _compressor(
+    encoding: str = "gzip", offload_size: int = 1 << 20
+) -> RequestCompressor:
+    return RequestCompressor(
+        HttpClientConfig(
+            request_compression=encoding,
+            compression_min_size=1024,
+            compression_offload_size=offload_size,
+        )
+    )
+
+
+async def test_small_bodies_are_sent_as_is() -> None:
+    compressor = _compressor()
+
+    assert await compressor.compress("http://core", b"{}") == (b"{}", None)
+    assert await compressor.compress("http://core", None) == (None, None)
+
+
+@pytest.mark.parametrize("offload_size", [1 << 20, 1024])
+async def test_large_bodies_are_gzipped(offload_size: int) -> None:
+    compressor = _compressor(offload_size=offload_size)
+
+    body, encoding = await compressor.compress("http://core", _BODY)
+
+    assert encoding == "gzip"
+    assert body is not None and gzip.decompress(body) == _BODY
+    assert compressor.stats.ratio < 0.1
+    assert compressor.stats.offloaded == (1 if offload_size <= len(_BODY) else 0)
+
+
+def test_unavailable_encoding_falls_back_to_gzip() -> None:
+    assert _compressor("brotli").default_encoding == "gzip"
+    assert _compressor("none").default_encoding is None
+
+
+def test_rejected_encoding_is_switched_per_server() -> None:
+    compressor = _compressor()
+
+    compressor.reject("http://core", "identity")
+    assert compressor.encoding_for("http://core") is None
+    assert compressor.encoding_for("http://utils") == "gzip"
+
+    compressor.reject("http://utils", "zstd, gzip;q=0.5")
+    expected = "zstd" if "zstd" in compressor._codecs else None
+    assert compressor.encoding_for("http://utils") == expected
+
+
+async def test_client_resends_uncompressed_after_415(
+    serve: Serve, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    encodings: List[Optional[str]] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        encoding = request.headers.get("Content-Encoding")
+        encodings.append(encoding)
+        if encoding:
+            return web.json_response(
+                {"error": "unsupported"},
+                status=415,
+                headers={"Accept-Encoding": "identity"},
+            )
+        await request.json()
+        return web.json_response({"status": "ok"})
+
+    app = web.Application()
+    app.router.add_post("/v1/log/bulk", handler)
+    monkeypatch.setattr(base, "request_compressor", _compressor())
+    client = base.BaseAPIClient(await serve(app))
+
+    response = await client.post("v1/log/bulk", json_data={"logs": "x" * 4096})
+    await client.post("v1/log/bulk", json_data={"logs": "x" * 4096})
+
+    assert response.success
+    assert encodings == ["gzip", None, None]
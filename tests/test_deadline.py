@@ -0,0 +1,113 @@
+"""Тесты дедлайна обработки запроса"""
+
+import asyncio
+from typing import Any, Dict, cast
+
+import aiohttp
+import pytest
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from bot.api import deadline
+from bot.config import DEFAULT_ENDPOINT_TIMEOUTS, TimeoutConfig, get_timeout_config
+from bot.utils.middlewares import DeadlineMiddleware
+
+
+def test_no_deadline_by_default() -> None:
+    assert deadline.remaining() is None
+    assert not deadline.expired()
+
+
+def test_nested_scope_cannot_extend_deadline() -> None:
+    with deadline.deadline_scope(1.0):
+        with deadline.deadline_scope(100.0):
+            left = deadline.remaining()
+            assert left is not None and left <= 1.0
+        with deadline.deadline_scope(0.5):
+            left = deadline.remaining()
+            assert left is not None and left <= 0.5
+    assert deadline.remaining() is None
+
+
+def test_empty_budget_keeps_current_deadline() -> None:
+    with deadline.deadline_scope(None):
+        assert deadline.remaining() is None
+    with deadline.deadline_scope(0):
+        assert deadline.remaining() is None
+
+
+def test_expired_after_budget() -> None:
+    with deadline.deadline_scope(1e-9):
+        assert deadline.expired()
+
+
+async def test_deadline_is_inherited_by_tasks() -> None:
+    async def read() -> object:
+        return deadline.remaining()
+
+    with deadline.deadline_scope(5.0):
+        inherited = await asyncio.create_task(read())
+        detached = await asyncio.create_task(
+            read(), context=deadline.detached_context()
+        )
+        # Отвязанная задача не меняет дедлайн текущего контекста
+        assert deadline.remaining() is not None
+
+    assert inherited is not None
+    assert detached is None
+
+
+def test_bounded_timeout_clips_to_remaining_time() -> None:
+    timeout = aiohttp.ClientTimeout(total=30, connect=5, sock_read=None)
+
+    assert deadline.bounded_timeout(timeout) is timeout
+    with deadline.deadline_scope(2.0):
+        bounded = deadline.bounded_timeout(timeout)
+
+    assert bounded.total is not None and bounded.total <= 2.0
+    assert bounded.connect is not None and bounded.connect <= 2.0
+    assert bounded.sock_read is None
+
+
+def test_bounded_timeout_is_never_negative() -> None:
+    with deadline.deadline_scope(1e-9):
+        bounded = deadline.bounded_timeout(aiohttp.ClientTimeout(total=30))
+
+    assert bounded.total == pytest.approx(0.0)
+
+
+async def _remaining_in_handler(middleware: DeadlineMiddleware, flags: dict) -> Any:
+    async def handler(event: Any, data: Dict[str, Any]) -> Any:
+        return deadline.remaining()
+
+    data = {"handler": HandlerObject(callback=handler, flags=flags)}
+    return await middleware(handler, cast(TelegramObject, None), data)
+
+
+async def test_middleware_uses_handler_deadline_flag() -> None:
+    middleware = DeadlineMiddleware(240.0)
+
+    assert 239 < await _remaining_in_handler(middleware, {}) <= 240
+    assert 599 < await _remaining_in_handler(middleware, {"deadline": 600}) <= 600
+    assert await _remaining_in_handler(middleware, {"deadline": 0}) is None
+
+
+def test_deadline_covers_endpoint_budgets() -> None:
+    config = TimeoutConfig(
+        request_deadline=240.0,
+        endpoint_timeouts={"v1/ai": (5, 180, 180), "v1/upload": (5, 600, 600)},
+    )
+
+    assert config.deadline_for("v1/ai") == 240.0
+    assert config.deadline_for("v1/ai", "v1/upload") == 780.0
+    assert TimeoutConfig(request_deadline=0).deadline_for("v1/ai") == 0.0
+
+
+def test_request_deadline_is_not_below_endpoint_budget(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("REQUEST_DEADLINE", "30")
+
+    config = get_timeout_config()
+
+    assert config.request_deadline == DEFAULT_ENDPOINT_TIMEOUTS["v1/ai"][2]
@@ -0,0 +1,88 @@
+"""Тесты дублирующих запросов и статистики задержек"""
+
+import asyncio
+from typing import List
+
+from aiohttp import web
+from conftest import Serve
+
+from bot.api.base import BaseAPIClient
+from bot.api.hedging import HedgePolicy
+from bot.api.latency import LatencyTracker, LatencyWindow, latency_tracker
+from bot.config import HedgingConfig
+
+
+def test_window_percentiles_use_recent_samples() -> None:
+    window = LatencyWindow(size=100)
+    assert window.percentile(0.5) is None
+
+    for ms in range(1, 201):
+        window.record(ms / 1000)
+
+    assert len(window) == 100
+    assert window.percentile(0.0) == 0.101
+    assert window.percentile(0.95) == 0.196
+    assert window.percentile(1.0) == 0.2
+
+
+def test_delay_follows_percentile_within_bounds() -> None:
+    tracker = LatencyTracker()
+    config = HedgingConfig(min_samples=10, min_delay=0.05, max_delay=1.0)
+    policy = HedgePolicy(config, tracker)
+    name = tracker.key("http://core/", "/v1/tariffs")
+
+    assert policy.delay(name) == config.default_delay
+
+    for _ in range(10):
+        tracker.record(name, 0.2)
+    assert policy.delay(name) == 0.2
+
+    fast = tracker.key("http://core/", "/v1/admins")
+    for _ in range(10):
+        tracker.record(fast, 0.001)
+    assert policy.delay(fast) == config.min_delay
+
+
+async def test_slow_request_is_hedged(serve: Serve) -> None:
+    calls: List[int] = []
+    released = asyncio.Event()
+
+    async def handler(request: web.Request) -> web.Response:
+        calls.append(len(calls))
+        call = len(calls)
+        if call == 1:
+            # Первый запрос "завис"
+            await released.wait()
+        return web.json_response({"call": call})
+
+    app = web.Application()
+    app.router.add_get("/slow", handler)
+    client = BaseAPIClient(await serve(app))
+    client.hedge_policy = HedgePolicy(
+        HedgingConfig(default_delay=0.05), LatencyTracker()
+    )
+
+    response = await asyncio.wait_for(client.get("slow", hedge=True), 2)
+    released.set()
+
+    assert response.data == {"call": 2}
+    assert client.hedge_policy.stats.hedged == 1
+    assert client.hedge_policy.stats.hedge_wins == 1
+
+    # Отмененная первая попытка учтена как нижняя граница задержки
+    window = latency_tracker.window(latency_tracker.key(client.base_url, "slow"))
+    assert len(window) == 2
+    assert (window.percentile(1.0) or 0.0) >= 0.05
+
+
+async def test_fast_request_is_not_hedged(serve: Serve) -> None:
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get("/fast", handler)
+    client = BaseAPIClient(await serve(app))
+    client.hedge_policy = HedgePolicy(HedgingConfig(default_delay=1), LatencyTracker())
+
+    assert (await client.get("fast", hedge=True)).success
+    assert client.hedge_policy.stats.hedged == 0
@@ -0,0 +1,43 @@
+"""Тесты общего пула HTTP соединений"""
+
+import pytest
+from aiohttp import web
+from conftest import Serve
+
+from bot.api.http import HttpClientRegistry
+from bot.config import HttpClientConfig
+
+
+async def test_requests_reuse_keepalive_connections(serve: Serve) -> None:
+    async def ping(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    app = web.Application()
+    app.router.add_get("/ping", ping)
+    server_url = await serve(app)
+
+    registry = HttpClientRegistry(HttpClientConfig())
+    session = await registry.get_session()
+    for _ in range(5):
+        async with session.get(f"{server_url}/ping") as response:
+            await response.json()
+    await registry.close()
+
+    stats = registry.stats
+    assert stats.requests == 5
+    assert stats.connections_created == 1
+    assert stats.connections_reused == 4
+    assert stats.reuse_rate == pytest.approx(0.8)
+
+
+async def test_session_is_shared_and_recreated_after_close() -> None:
+    registry = HttpClientRegistry(HttpClientConfig())
+    session = await registry.get_session()
+
+    assert await registry.get_session() is session
+
+    await registry.close()
+    assert session.closed
+    new_session = await registry.get_session()
+    assert new_session is not session
+    await registry.close()
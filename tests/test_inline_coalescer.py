@@ -0,0 +1,79 @@
+"""Тесты объединения inline запросов"""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from bot.utils.coalescer import InlineQueryCoalescer
+
+
+async def test_only_last_query_within_pause_is_executed() -> None:
+    coalescer = InlineQueryCoalescer(debounce=0.02)
+    executed: List[str] = []
+
+    async def handle(text: str) -> str:
+        executed.append(text)
+        return text
+
+    async def query(text: str, delay: float) -> object:
+        await asyncio.sleep(delay)
+        return await coalescer.run(1, lambda: handle(text))
+
+    results = await asyncio.gather(
+        query("п", 0), query("пе", 0.005), query("пер", 0.01)
+    )
+
+    assert results == [None, None, "пер"]
+    assert executed == ["пер"]
+    assert coalescer.stats.debounced == 2
+    assert coalescer.stats.saved_calls == 2
+
+
+async def test_new_query_cancels_started_handler() -> None:
+    coalescer = InlineQueryCoalescer(debounce=0)
+    started = asyncio.Event()
+    finished: List[str] = []
+
+    async def slow() -> str:
+        started.set()
+        await asyncio.sleep(1)
+        finished.append("slow")
+        return "slow"
+
+    async def fast() -> str:
+        return "fast"
+
+    first = asyncio.create_task(coalescer.run(1, slow))
+    await started.wait()
+    second = await coalescer.run(1, fast)
+
+    assert await first is None
+    assert second == "fast"
+    assert finished == []
+    assert coalescer.stats.cancelled == 1
+
+
+async def test_users_do_not_supersede_each_other() -> None:
+    coalescer = InlineQueryCoalescer(debounce=0.01)
+
+    async def handle(user_id: int) -> int:
+        return user_id
+
+    results = await asyncio.gather(
+        *(coalescer.run(user_id, lambda u=user_id: handle(u)) for user_id in (1, 2))
+    )
+
+    assert results == [1, 2]
+    assert coalescer.stats.superseded_rate == 0
+
+
+async def test_handler_errors_are_propagated() -> None:
+    coalescer = InlineQueryCoalescer(debounce=0)
+
+    async def fail() -> None:
+        raise RuntimeError("Core API недоступен")
+
+    with pytest.raises(RuntimeError):
+        await coalescer.run(1, fail)
+    assert coalescer._pending == {}
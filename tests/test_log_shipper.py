@@ -0,0 +1,155 @@
+"""Тесты фоновой пакетной отправки логов"""
+
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from bot.api import log as log_module
+from bot.api.base import APIResponse
+from bot.api.log_shipper import BatchResult, LogRecord, LogShipper
+
+
+def _record(i: int) -> LogRecord:
+    return LogRecord(user_id=i, query=f"вопрос {i}", ai_response="ответ", status=1)
+
+
+class _Sender:
+    """Отправка пакетов с запоминанием и управляемым результатом"""
+
+    def __init__(self, ok: bool = True):
+        self.ok = ok
+        self.batches: List[List[LogRecord]] = []
+
+    async def __call__(self, batch: List[LogRecord]) -> BatchResult:
+        self.batches.append(batch)
+        return BatchResult() if self.ok else BatchResult(retry=batch)
+
+
+async def test_records_are_sent_in_batches() -> None:
+    sender = _Sender()
+    shipper = LogShipper(sender, batch_size=3, flush_interval=0.01)
+    shipper.start()
+    for i in range(7):
+        assert await shipper.submit(_record(i))
+    await shipper.stop()
+
+    assert [len(batch) for batch in sender.batches] == [3, 3, 1]
+    assert [r.user_id for batch in sender.batches for r in batch] == list(range(7))
+    assert shipper.stats.sent == 7
+
+
+async def test_failed_batch_without_spool_is_counted() -> None:
+    shipper = LogShipper(_Sender(ok=False), batch_size=2, flush_interval=0.01)
+    shipper.start()
+    await shipper.submit(_record(1))
+    await shipper.stop()
+
+    assert shipper.stats.failed == 1
+    assert shipper.stats.sent == 0
+
+
+async def test_drop_newest_rejects_records_when_full() -> None:
+    shipper = LogShipper(_Sender(), max_queue=2, overflow_policy="drop_newest")
+    assert await shipper.submit(_record(1))
+    assert await shipper.submit(_record(2))
+    assert not await shipper.submit(_record(3))
+
+    assert [r.user_id for r in shipper._queue] == [1, 2]
+    assert shipper.stats.dropped == 1
+
+
+async def test_drop_oldest_keeps_latest_records() -> None:
+    shipper = LogShipper(_Sender(), max_queue=2, overflow_policy="drop_oldest")
+    for i in range(1, 4):
+        assert await shipper.submit(_record(i))
+
+    assert [r.user_id for r in shipper._queue] == [2, 3]
+    assert shipper.stats.dropped == 1
+
+
+async def test_block_gives_up_after_timeout() -> None:
+    shipper = LogShipper(
+        _Sender(), max_queue=1, overflow_policy="block", block_timeout=0.05
+    )
+    await shipper.submit(_record(1))
+
+    assert not await shipper.submit(_record(2))
+    assert shipper.stats.dropped == 1
+
+
+async def test_block_waiters_do_not_overfill_queue() -> None:
+    shipper = LogShipper(
+        _Sender(), max_queue=1, overflow_policy="block", block_timeout=0.2
+    )
+    await shipper.submit(_record(0))
+    waiters = [asyncio.create_task(shipper.submit(_record(i))) for i in (1, 2)]
+    await asyncio.sleep(0.01)
+
+    # Освобождается одно место: его получает только один из ожидающих
+    shipper._take_batch()
+    await asyncio.sleep(0.01)
+    assert len(shipper._queue) == 1
+
+    results = await asyncio.gather(*waiters)
+    assert sorted(results) == [False, True]
+
+
+def test_restore_batch_skips_corrupt_payloads() -> None:
+    shipper = LogShipper(_Sender())
+    payloads: List[Any] = [
+        _record(1).to_payload(),
+        {"unexpected": 1},
+        "строка",
+        None,
+        _record(2).to_payload(),
+    ]
+
+    batch = shipper._restore_batch(payloads)
+
+    assert [r.user_id for r in batch] == [1, 2]
+    assert shipper.stats.failed == 3
+
+
+async def test_batch_failures_are_split_into_retry_and_rejected(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    statuses = {0: 200, 1: 503, 2: 422, 3: 429}
+
+    async def bulk(records: List[Any]) -> APIResponse:
+        return APIResponse(success=False, status_code=400, error="bad record")
+
+    async def single(**payload: Any) -> APIResponse:
+        status = statuses[payload["user_id"]]
+        return APIResponse(success=status == 200, status_code=status)
+
+    monkeypatch.setattr(log_module.core_client, "log_messages_bulk", bulk)
+    monkeypatch.setattr(log_module.core_client, "log_message", single)
+
+    result = await log_module.send_log_batch([_record(i) for i in statuses])
+
+    assert [r.user_id for r in result.retry] == [1, 3]
+    assert result.rejected == 1
+    assert log_module._bulk_supported
+
+
+async def test_failed_bulk_request_is_retried_whole(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def bulk(records: List[Any]) -> APIResponse:
+        return APIResponse(success=False, status_code=503)
+
+    monkeypatch.setattr(log_module.core_client, "log_messages_bulk", bulk)
+
+    batch = [_record(i) for i in range(3)]
+    result = await log_module.send_log_batch(batch)
+
+    assert result.retry == batch
+    assert result.rejected == 0
+
+
+def test_invalid_settings_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        LogShipper(_Sender(), batch_size=0)
+    with pytest.raises(ValueError):
+        LogShipper(_Sender(), overflow_policy="drop_all")  # type: ignore[arg-type]
@@ -0,0 +1,235 @@
+"""Тесты дисковой очереди логов"""
+
+import asyncio
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from bot.api.log_shipper import BatchResult, LogRecord, LogShipper
+from bot.api.log_spool import LogSpool
+
+
+def _payloads(start: int, count: int) -> List[dict]:
+    return [{"n": i} for i in range(start, start + count)]
+
+
+async def test_records_are_read_in_order_and_committed(tmp_path: Path) -> None:
+    spool = LogSpool(str(tmp_path), segment_size=64, fsync=False)
+    await spool.append(_payloads(0, 5))
+    await spool.append(_payloads(5, 5))
+
+    received: List[dict] = []
+    while spool.has_pending:
+        records, position = await spool.read(3)
+        received.extend(records)
+        await spool.commit(position, len(records))
+    await spool.close()
+
+    assert received == _payloads(0, 10)
+    assert spool.stats.replayed == 10
+    assert not list(tmp_path.glob("*.seg"))
+
+
+async def test_reopen_restores_read_position(tmp_path: Path) -> None:
+    spool = LogSpool(str(tmp_path), fsync=False)
+    await spool.append(_payloads(0, 4))
+    records, position = await spool.read(2)
+    await spool.commit(position, len(records))
+    await spool.close()
+
+    reopened = LogSpool(str(tmp_path), fsync=False)
+    await reopened.open()
+    records, _ = await reopened.read(10)
+    await reopened.close()
+
+    assert reopened._pending == 2
+    assert records == _payloads(2, 2)
+
+
+async def test_spool_can_be_reopened_after_close(tmp_path: Path) -> None:
+    spool = LogSpool(str(tmp_path), fsync=False)
+    await spool.append(_payloads(0, 1))
+    await spool.close()
+
+    await spool.append(_payloads(1, 1))
+    records, _ = await spool.read(10)
+    await spool.close()
+
+    assert records == _payloads(0, 2)
+
+
+async def test_truncated_record_is_not_counted(tmp_path: Path) -> None:
+    spool = LogSpool(str(tmp_path), fsync=False)
+    await spool.append(_payloads(0, 3))
+    await spool.close()
+    # Запись оборвана при аварийном завершении
+    segment = next(tmp_path.glob("*.seg"))
+    segment.write_bytes(segment.read_bytes()[:-2])
+
+    reopened = LogSpool(str(tmp_path), fsync=False)
+    await reopened.open()
+    await reopened.close()
+
+    assert reopened._pending == 2
+    # Новые записи дописываются после последней целой
+    await reopened.append(_payloads(3, 1))
+    records, _ = await reopened.read(10)
+    await reopened.close()
+    assert records == [{"n": 0}, {"n": 1}, {"n": 3}]
+
+
+async def test_corrupt_record_is_skipped(tmp_path: Path) -> None:
+    spool = LogSpool(str(tmp_path), fsync=False)
+    await spool.append(_payloads(0, 1))
+    await spool.append([{"n": "x" * 10}])
+    await spool.append(_payloads(2, 1))
+    await spool.close()
+    segment = next(tmp_path.glob("*.seg"))
+    segment.write_bytes(segment.read_bytes().replace(b"x" * 10, b"\xff" * 10))
+
+    received: List[dict] = []
+    while spool.has_pending:
+        records, position = await spool.read(10)
+        received.extend(records)
+        await spool.commit(position, len(records))
+    await spool.close()
+
+    assert received == [{"n": 0}, {"n": 2}]
+    assert spool.stats.dropped == 1
+
+
+async def test_overflow_during_replay_keeps_reading(tmp_path: Path) -> None:
+    spool = LogSpool(str(tmp_path), segment_size=40, max_bytes=100, fsync=False)
+    await spool.append(_payloads(0, 2))
+    records, position = await spool.read(10)
+
+    # Пока пакет отправляется, сегмент удаляется при переполнении
+    for i in range(2, 8):
+        await spool.append(_payloads(i, 1))
+    await spool.commit(position, len(records))
+
+    received: List[dict] = []
+    while spool.has_pending:
+        records, position = await spool.read(10)
+        received.extend(records)
+        await spool.commit(position, len(records))
+    await spool.close()
+
+    assert received
+    assert received == _payloads(8 - len(received), len(received))
+    assert spool.stats.appended == spool.stats.dropped + len(received) + 2
+
+
+async def test_oldest_segments_are_dropped_over_limit(tmp_path: Path) -> None:
+    spool = LogSpool(str(tmp_path), segment_size=40, max_bytes=100, fsync=False)
+    for i in range(10):
+        await spool.append(_payloads(i, 1))
+
+    assert spool.stats.dropped > 0
+    assert spool.stats.bytes_on_disk <= 100
+
+    received: List[dict] = []
+    while spool.has_pending:
+        records, position = await spool.read(100)
+        received.extend(records)
+        await spool.commit(position, len(records))
+    await spool.close()
+
+    assert received == _payloads(spool.stats.dropped, 10 - spool.stats.dropped)
+
+
+async def test_shipper_replays_spooled_batches(tmp_path: Path) -> None:
+    sent: List[int] = []
+    online = False
+
+    async def send(batch: List[LogRecord]) -> BatchResult:
+        if not online:
+            return BatchResult(retry=batch)
+        sent.extend(record.user_id for record in batch)
+        return BatchResult()
+
+    spool = LogSpool(str(tmp_path), fsync=False)
+    shipper = LogShipper(
+        send, batch_size=2, flush_interval=0.01, spool=spool, replay_interval=0.01
+    )
+    shipper.start()
+    for i in range(3):
+        await shipper.submit(
+            LogRecord(user_id=i, query="вопрос", ai_response="ответ", status=1)
+        )
+    await asyncio.sleep(0.05)
+    assert shipper.stats.spooled == 3
+
+    online = True
+    for _ in range(100):
+        if len(sent) == 3:
+            break
+        await asyncio.sleep(0.01)
+    await shipper.stop()
+
+    assert sent == [0, 1, 2]
+    assert shipper.stats.replayed == 3
+
+
+async def test_replay_survives_spool_errors(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sent: List[int] = []
+
+    async def send(batch: List[LogRecord]) -> BatchResult:
+        sent.extend(record.user_id for record in batch)
+        return BatchResult()
+
+    spool = LogSpool(str(tmp_path), fsync=False)
+    await spool.append([LogRecord(1, "вопрос", "ответ", 1).to_payload()])
+    read = spool.read
+    failures = [OSError("диск недоступен")]
+
+    async def flaky_read(max_records: int) -> Any:
+        if failures:
+            raise failures.pop()
+        return await read(max_records)
+
+    monkeypatch.setattr(spool, "read", flaky_read)
+    shipper = LogShipper(send, spool=spool, replay_interval=0.01)
+    shipper.start()
+    for _ in range(100):
+        if sent:
+            break
+        await asyncio.sleep(0.01)
+    await shipper.stop()
+
+    assert sent == [1]
+
+
+async def test_replay_resends_only_failed_records(tmp_path: Path) -> None:
+    sent: List[int] = []
+    attempts: List[List[int]] = []
+
+    async def send(batch: List[LogRecord]) -> BatchResult:
+        attempts.append([record.user_id for record in batch])
+        # Запись 1 принимается только со второй попытки, запись 2 отклонена
+        retry = [r for r in batch if r.user_id == 1 and len(attempts) == 1]
+        rejected = sum(1 for r in batch if r.user_id == 2)
+        sent.extend(r.user_id for r in batch if r not in retry and r.user_id != 2)
+        return BatchResult(retry=retry, rejected=rejected)
+
+    spool = LogSpool(str(tmp_path), fsync=False)
+    await spool.append(
+        [LogRecord(i, "вопрос", "ответ", 1).to_payload() for i in range(3)]
+        + [{"user_id": 4}]
+    )
+    shipper = LogShipper(send, spool=spool, replay_interval=0.01)
+    shipper.start()
+    for _ in range(100):
+        if not spool.has_pending:
+            break
+        await asyncio.sleep(0.01)
+    await shipper.stop()
+
+    assert attempts == [[0, 1, 2], [1]]
+    assert sent == [0, 1]
+    assert shipper.stats.replayed == 2
+    assert shipper.stats.rejected == 1
+    assert shipper.stats.failed == 1
@@ -0,0 +1,86 @@
+"""Тесты кэша результатов поиска в Milvus"""
+
+from typing import Any, Dict
+
+from conftest import FakeClock
+
+from bot.api.milvus import MilvusResultCache
+
+_RESULT = {
+    "combined_context": "Контекст",
+    "chat_history": "Пользователь: привет\nАссистент: здравствуйте",
+    "hashs": ["a", "b"],
+}
+
+
+def _cache(enabled: bool = True, **overrides: Any) -> MilvusResultCache:
+    settings: Dict[str, Any] = dict(ttl=60, maxsize=10, history_turns=5)
+    settings.update(overrides)
+    return MilvusResultCache(enabled=enabled, **settings)
+
+
+def test_result_is_cached_per_user_and_normalized_text() -> None:
+    cache = _cache()
+    cache.put(1, "Как подключить роутер?", _RESULT)
+
+    assert cache.get(1, "как подключить роутер") == _RESULT
+    assert cache.get(2, "как подключить роутер") is None
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_cached_result_includes_later_messages() -> None:
+    cache = _cache()
+    cache.put(1, "как подключить роутер", _RESULT)
+    cache.record_exchange(1, "как подключить роутер", "Подключите кабель")
+    cache.put(1, "другой вопрос", {**_RESULT, "chat_history": "новая история"})
+    cache.record_exchange(1, "другой вопрос", "Ответ")
+
+    result = cache.get(1, "как подключить роутер")
+
+    assert result is not None
+    assert result["combined_context"] == "Контекст"
+    assert result["chat_history"] == (
+        "новая история\nПользователь: другой вопрос\nАссистент: Ответ"
+    )
+
+
+def test_history_keeps_last_turns() -> None:
+    cache = _cache(history_turns=2)
+    cache.put(1, "вопрос", _RESULT)
+    cache.record_exchange(1, "первый", "ответ 1")
+    cache.record_exchange(1, "второй", "ответ 2")
+
+    result = cache.get(1, "вопрос")
+
+    assert result is not None
+    assert result["chat_history"] == (
+        "Пользователь: первый\nАссистент: ответ 1\n"
+        "Пользователь: второй\nАссистент: ответ 2"
+    )
+
+
+def test_exchange_does_not_extend_history_ttl() -> None:
+    clock = FakeClock()
+    cache = _cache(clock=clock)
+    cache.put(1, "вопрос", _RESULT)
+
+    clock.advance(50)
+    cache.record_exchange(1, "вопрос", "ответ")
+    clock.advance(10)
+
+    assert cache.get(1, "вопрос") is None
+
+
+def test_exchange_without_history_is_ignored() -> None:
+    cache = _cache()
+    cache.record_exchange(1, "вопрос", "ответ")
+
+    assert cache.get(1, "вопрос") is None
+
+
+def test_disabled_cache_stores_nothing() -> None:
+    cache = _cache(enabled=False)
+    cache.put(1, "вопрос", _RESULT)
+
+    assert cache.get(1, "вопрос") is None
+    assert cache.stats.size == 0
@@ -0,0 +1,154 @@
+"""Тесты индикаторов обработки запроса"""
+
+import asyncio
+from typing import Any, List
+
+from bot.utils.progress import STYLE_STICKER, STYLE_TYPING, ProgressTracker
+
+
+class _Bot:
+    """Бот, запоминающий отправленные статусы"""
+
+    def __init__(self) -> None:
+        self.actions: List[Any] = []
+
+    async def send_chat_action(self, chat_id: Any, action: str) -> bool:
+        self.actions.append(chat_id)
+        return True
+
+
+class _Chat:
+    def __init__(self, chat_id: int):
+        self.id = chat_id
+
+
+class _Message:
+    """Сообщение пользователя со стикером загрузки"""
+
+    def __init__(self, bot: _Bot, chat_id: int = 1):
+        self.bot = bot
+        self.chat = _Chat(chat_id)
+        self.calls: List[str] = []
+
+    async def answer_sticker(self, sticker: str) -> "_Message":
+        self.calls.append("sticker")
+        return self
+
+    async def delete(self) -> bool:
+        self.calls.append("delete")
+        return True
+
+
+def _tracker(style: str = STYLE_TYPING, delay: float = 0.0) -> ProgressTracker:
+    return ProgressTracker(style, refresh=0.01, delay=delay)
+
+
+async def test_chat_has_one_typing_task_for_all_indicators() -> None:
+    bot = _Bot()
+    tracker = _tracker()
+    first = tracker.start(_Message(bot))  # type: ignore[arg-type]
+    second = tracker.start(_Message(bot))  # type: ignore[arg-type]
+    await asyncio.sleep(0.025)
+
+    await first.stop()
+    assert tracker._typing[1].task is not None
+    await second.stop()
+
+    assert 1 not in tracker._typing
+    # Два индикатора, но статус обновляется одной задачей
+    assert 2 <= len(bot.actions) <= 4
+    assert tracker.stats.indicators == 2
+
+
+async def test_typing_stops_when_all_answers_are_shown() -> None:
+    bot = _Bot()
+    tracker = _tracker()
+    answered = [asyncio.Event(), asyncio.Event()]
+    release = asyncio.Event()
+
+    async def request(number: int) -> None:
+        progress = tracker.start(_Message(bot))  # type: ignore[arg-type]
+        await asyncio.sleep(0.01 * (number + 1))
+        # Первый фрагмент ответа показан
+        tracker.answer_shown(1)
+        answered[number].set()
+        await release.wait()
+        await progress.stop()
+
+    requests = [asyncio.create_task(request(number)) for number in range(2)]
+    await answered[0].wait()
+    # Другой запрос чата еще без ответа: статус продолжает обновляться
+    assert tracker._typing[1].task is not None
+
+    await answered[1].wait()
+    assert tracker._typing[1].task is None
+    sent = len(bot.actions)
+    await asyncio.sleep(0.03)
+    assert len(bot.actions) == sent
+
+    release.set()
+    await asyncio.gather(*requests)
+    assert tracker._typing == {}
+
+
+async def test_new_request_restarts_stopped_typing() -> None:
+    bot = _Bot()
+    tracker = _tracker()
+    first = tracker.start(_Message(bot))  # type: ignore[arg-type]
+    tracker.answer_shown(1)
+    second = tracker.start(_Message(bot))  # type: ignore[arg-type]
+
+    assert tracker._typing[1].task is not None
+    await first.stop()
+    await second.stop()
+
+
+async def test_fast_answer_sends_no_status() -> None:
+    bot = _Bot()
+    tracker = _tracker(delay=0.05)
+
+    async with tracker.keep_typing(bot, 1):  # type: ignore[arg-type]
+        await asyncio.sleep(0.01)
+
+    assert bot.actions == []
+    assert tracker.stats.calls == 0
+
+
+async def test_sticker_is_sent_and_deleted_in_background() -> None:
+    message = _Message(_Bot())
+    tracker = _tracker(style=STYLE_STICKER)
+
+    progress = tracker.start(message)  # type: ignore[arg-type]
+    assert message.calls == []
+    await progress.stop()
+    await progress.stop()
+
+    assert message.calls == ["sticker", "delete"]
+    assert tracker.stats.calls_per_indicator == 2
+
+
+async def test_only_indicator_typing_is_counted() -> None:
+    bot = _Bot()
+    tracker = _tracker()
+
+    async with tracker.keep_typing(bot, 1):  # type: ignore[arg-type]
+        await asyncio.sleep(0.025)
+    assert bot.actions
+    assert tracker.stats.chat_actions == 0
+
+    progress = tracker.start(_Message(bot))  # type: ignore[arg-type]
+    await asyncio.sleep(0.005)
+    await progress.stop()
+
+    assert tracker.stats.chat_actions == 1
+    # Стикер, его удаление и статус обработчика против одного статуса
+    assert tracker.stats.saved_calls == 2
+
+
+async def test_sticker_saves_only_the_handler_status() -> None:
+    tracker = _tracker(style=STYLE_STICKER)
+
+    progress = tracker.start(_Message(_Bot()))  # type: ignore[arg-type]
+    await progress.stop()
+
+    assert tracker.stats.saved_calls == 1
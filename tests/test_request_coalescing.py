@@ -0,0 +1,122 @@
+"""Тесты объединения одинаковых запросов к API"""
+
+import asyncio
+import copy
+from typing import Dict, List
+
+import pytest
+from aiohttp import web
+from conftest import Serve
+
+from bot.api import deadline
+from bot.api.base import BaseAPIClient
+from bot.api.coalescing import RequestCoalescer, request_key
+
+
+def test_request_key_ignores_parameter_order() -> None:
+    assert request_key("GET", "u", {"a": 1, "b": "2"}, None) == request_key(
+        "GET", "u", {"b": 2, "a": "1"}, {}
+    )
+    assert request_key("GET", "u", {"a": 1}, None) != request_key(
+        "GET", "u", {"a": 2}, None
+    )
+
+
+async def test_concurrent_requests_share_one_call_with_copies() -> None:
+    coalescer: RequestCoalescer[Dict[str, List[int]]] = RequestCoalescer(
+        copy_result=copy.deepcopy
+    )
+    calls: List[int] = []
+
+    async def request() -> Dict[str, List[int]]:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"items": [1]}
+
+    first, second = await asyncio.gather(
+        coalescer.run("key", request), coalescer.run("key", request)
+    )
+    first["items"].append(2)
+
+    assert calls == [1]
+    assert second == {"items": [1]}
+    assert coalescer.stats.coalesced == 1
+    assert coalescer.stats.saved_rate == 0.5
+
+
+async def test_request_is_cancelled_when_last_waiter_leaves() -> None:
+    coalescer: RequestCoalescer[str] = RequestCoalescer()
+    cancelled = asyncio.Event()
+
+    async def request() -> str:
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "ответ"
+
+    waiters = [asyncio.create_task(coalescer.run("key", request)) for _ in range(2)]
+    await asyncio.sleep(0)
+    waiters[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    waiters[1].cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert coalescer.stats.cancelled == 1
+
+
+async def test_waiter_deadline_does_not_limit_others() -> None:
+    coalescer: RequestCoalescer[str] = RequestCoalescer()
+
+    async def request() -> str:
+        await asyncio.sleep(0.05)
+        return "ответ"
+
+    async def impatient() -> str:
+        with deadline.deadline_scope(0.01):
+            return await coalescer.run("key", request)
+
+    results = await asyncio.gather(
+        impatient(), coalescer.run("key", request), return_exceptions=True
+    )
+
+    assert isinstance(results[0], asyncio.TimeoutError)
+    assert results[1] == "ответ"
+
+
+async def test_failed_request_is_not_reused() -> None:
+    coalescer: RequestCoalescer[str] = RequestCoalescer()
+
+    async def fail() -> str:
+        raise RuntimeError("ошибка")
+
+    async def succeed() -> str:
+        return "ответ"
+
+    with pytest.raises(RuntimeError):
+        await coalescer.run("key", fail)
+    assert await coalescer.run("key", succeed) == "ответ"
+
+
+async def test_client_sends_one_request_for_identical_gets(serve: Serve) -> None:
+    hits: List[str] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        hits.append(request.query_string)
+        await asyncio.sleep(0.02)
+        return web.json_response({"tariffs": [1]})
+
+    app = web.Application()
+    app.router.add_get("/redis_tariffs", handler)
+    client = BaseAPIClient(await serve(app))
+
+    responses = await asyncio.gather(
+        *(client.get("redis_tariffs", params={"territory_id": "59"}) for _ in range(3))
+    )
+
+    assert len(hits) == 1
+    assert all(response.data == {"tariffs": [1]} for response in responses)
+    assert responses[0].data is not responses[1].data
@@ -0,0 +1,104 @@
+"""Тесты повторов запросов и бюджета повторов"""
+
+from typing import List
+
+from aiohttp import web
+from conftest import Serve
+
+from bot.api.base import BaseAPIClient
+from bot.api.retry import RetryBudget, RetryPolicy
+from bot.config import RetryConfig
+
+
+def _policy(**overrides: float) -> RetryPolicy:
+    return RetryPolicy(RetryConfig(**overrides), random_func=lambda low, high: high)
+
+
+def test_budget_limits_retries_to_ratio_of_traffic() -> None:
+    budget = RetryBudget(ratio=0.5, min_retries=2)
+    assert budget.try_withdraw()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    budget.deposit()
+    assert not budget.try_withdraw()
+    budget.deposit()
+    assert budget.try_withdraw()
+
+
+def test_budget_balance_is_capped() -> None:
+    budget = RetryBudget(ratio=1.0, min_retries=3)
+    for _ in range(10):
+        budget.deposit()
+
+    assert budget.balance == 3
+
+
+def test_only_safe_requests_are_retried() -> None:
+    policy = _policy(max_attempts=3)
+
+    assert policy.max_attempts("GET", idempotent=False) == 3
+    assert policy.max_attempts("POST", idempotent=False) == 1
+    assert policy.max_attempts("POST", idempotent=True) == 3
+    assert _policy(enabled=False).max_attempts("GET", idempotent=False) == 1
+
+
+def test_backoff_grows_exponentially_up_to_max_delay() -> None:
+    policy = _policy(base_delay=0.1, max_delay=0.5)
+
+    assert [round(policy.backoff(attempt), 3) for attempt in range(4)] == [
+        0.1,
+        0.2,
+        0.4,
+        0.5,
+    ]
+
+
+def _flaky_app(statuses: List[int]) -> web.Application:
+    """Сервер, отвечающий статусами из списка, затем 200"""
+
+    async def handler(request: web.Request) -> web.Response:
+        status = statuses.pop(0) if statuses else 200
+        return web.json_response({"status": status}, status=status)
+
+    app = web.Application()
+    app.router.add_route("*", "/flaky", handler)
+    return app
+
+
+class _Client(BaseAPIClient):
+    def __init__(self, base_url: str, **retry: float):
+        super().__init__(base_url)
+        self.retry_policy = RetryPolicy(
+            RetryConfig(base_delay=0.001, **retry), random_func=lambda low, high: 0
+        )
+
+
+async def test_transient_error_is_retried(serve: Serve) -> None:
+    client = _Client(await serve(_flaky_app([503, 502])))
+
+    response = await client.get("flaky")
+
+    assert response.success
+    assert client.retry_policy.stats.retries == 2
+    assert client.retry_policy.stats.recovered == 1
+
+
+async def test_client_errors_and_unsafe_posts_are_not_retried(serve: Serve) -> None:
+    client = _Client(await serve(_flaky_app([404, 503])))
+
+    assert (await client.get("flaky")).status_code == 404
+    assert (await client.post("flaky", json_data={})).status_code == 503
+    assert client.retry_policy.stats.retries == 0
+
+
+async def test_exhausted_budget_stops_retries(serve: Serve) -> None:
+    client = _Client(
+        await serve(_flaky_app([503] * 3)), budget_min_retries=1, budget_ratio=0
+    )
+
+    response = await client.get("flaky")
+
+    assert response.status_code == 503
+    assert client.retry_policy.stats.retries == 1
+    assert client.retry_policy.stats.budget_exhausted == 1
@@ -0,0 +1,37 @@
+"""Тесты выбора JSON бэкенда"""
+
+import json
+
+import pytest
+
+from bot.api.serialization import get_codec
+
+_DOC = {"query": "тарифы г. Пермь", "url": "http://core/v1", "items": [1, 2.5, None]}
+
+
+def _available(name: str) -> str:
+    try:
+        __import__(name)
+    except ImportError:
+        pytest.skip(f"{name} не установлен")
+    return name
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson", "ujson"])
+def test_codec_round_trip(backend: str) -> None:
+    codec = get_codec(_available(backend))
+
+    assert codec.name == backend
+    assert codec.loads(codec.dumps_bytes(_DOC)) == _DOC
+    assert codec.loads(codec.dumps(_DOC)) == _DOC
+    # Кириллица и слеши без экранирования, как у стандартного json
+    assert json.loads(codec.dumps_bytes(_DOC).decode("utf-8")) == _DOC
+    assert "тарифы" in codec.dumps(_DOC)
+
+
+def test_auto_selects_installed_backend() -> None:
+    assert get_codec("auto").name in ("orjson", "ujson", "json")
+
+
+def test_unknown_backend_falls_back_to_json() -> None:
+    assert get_codec("simdjson").name == "json"
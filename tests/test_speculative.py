@@ -0,0 +1,48 @@
+"""Тесты спекулятивного поиска в Milvus"""
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from bot.utils import speculative
+from bot.utils.speculative import SpeculativeSearch
+
+
+@pytest.fixture
+def searches(monkeypatch: pytest.MonkeyPatch) -> List[int]:
+    """Подмена поиска в Milvus: запоминает пользователей запросов"""
+    calls: List[int] = []
+
+    async def search_milvus(user_id: int, message: Any) -> Dict[str, Any]:
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return {"context": f"контекст {len(calls)}"}
+
+    monkeypatch.setattr(speculative, "search_milvus", search_milvus)
+    return calls
+
+
+async def test_result_reuses_started_search(searches: List[int]) -> None:
+    search = SpeculativeSearch(1, message=None)  # type: ignore[arg-type]
+
+    assert await search.result() == {"context": "контекст 1"}
+    assert await search.result() == {"context": "контекст 1"}
+    assert searches == [1]
+
+
+async def test_result_after_discard_searches_again(searches: List[int]) -> None:
+    search = SpeculativeSearch(1, message=None)  # type: ignore[arg-type]
+    await asyncio.sleep(0)
+    search.discard()
+
+    assert await search.result() == {"context": "контекст 2"}
+    assert searches == [1, 1]
+
+
+async def test_discard_after_result_is_ignored(searches: List[int]) -> None:
+    search = SpeculativeSearch(1, message=None)  # type: ignore[arg-type]
+    await search.result()
+    search.discard()
+
+    assert await search.result() == {"context": "контекст 1"}
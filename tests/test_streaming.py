@@ -0,0 +1,292 @@
+"""Тесты потоковых ответов: разбор API и показ в Telegram"""
+
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendMessage
+from aiohttp import web
+from conftest import Serve
+
+from bot.api import ai
+from bot.api.base import BaseAPIClient
+from bot.api.streaming import StreamError
+from bot.utils.streaming import (
+    MESSAGE_LIMIT,
+    StreamingMessage,
+    _balance_tags,
+    _plain_text,
+    _split_point,
+    stream_answer,
+)
+
+
+@pytest.mark.parametrize(
+    "partial, balanced",
+    [
+        ("<b>Тариф", "<b>Тариф</b>"),
+        ("<b>Тариф <i>Домашний", "<b>Тариф <i>Домашний</i></b>"),
+        ("<b>Тариф</b> <a href=", "<b>Тариф</b> "),
+        ("Цена &am", "Цена "),
+        ("<b><i>Тариф</b>", "<b><i>Тариф</i></b>"),
+        ("Тариф</i> Домашний", "Тариф Домашний"),
+    ],
+)
+def test_balance_tags(partial: str, balanced: str) -> None:
+    assert _balance_tags(partial) == balanced
+
+
+def test_plain_text_drops_markup() -> None:
+    assert _plain_text("<b>Цена</b> &lt;500&gt; <i") == "Цена <500> "
+
+
+def test_split_point_prefers_paragraphs() -> None:
+    text = "а" * 3000 + "\n\n" + "б" * 2000
+    assert _split_point(text) == 3000
+    assert _split_point("а" * 5000) == MESSAGE_LIMIT
+
+
+# Потоковые ответы API
+
+
+async def _stream_from(serve: Serve, response: web.StreamResponse) -> List[str]:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/ai/stream", handler)
+    client = BaseAPIClient(await serve(app))
+    return [chunk async for chunk in client.stream("v1/ai/stream", json_data={})]
+
+
+async def test_sse_events_are_parsed(serve: Serve) -> None:
+    body = (
+        ": keep-alive\n\n"
+        'data: {"delta": "При"}\n\n'
+        'event: message\ndata: {"content": "вет"}\n\n'
+        "data: строка\ndata: вторая\n\n"
+        "data: [DONE]\n\n"
+        'data: {"delta": "после конца"}\n\n'
+    )
+    response = web.Response(text=body, content_type="text/event-stream")
+
+    assert await _stream_from(serve, response) == ["При", "вет", "строка\nвторая"]
+
+
+async def test_sse_error_event_raises(serve: Serve) -> None:
+    body = 'data: {"delta": "Начало"}\n\ndata: {"error": "model overloaded"}\n\n'
+    response = web.Response(text=body, content_type="text/event-stream")
+
+    with pytest.raises(StreamError, match="model overloaded"):
+        await _stream_from(serve, response)
+
+
+async def test_json_response_is_single_chunk(serve: Serve) -> None:
+    response = web.json_response({"ai_response": "Ответ целиком"})
+
+    assert await _stream_from(serve, response) == ["Ответ целиком"]
+
+
+async def test_json_response_prefers_ai_response(serve: Serve) -> None:
+    response = web.json_response({"text": "Вопрос", "ai_response": "Ответ"})
+
+    assert await _stream_from(serve, response) == ["Ответ"]
+
+
+async def test_unexpected_content_type_is_unsupported(serve: Serve) -> None:
+    response = web.Response(body=b"\x00", content_type="application/octet-stream")
+
+    with pytest.raises(StreamError) as error:
+        await _stream_from(serve, response)
+
+    assert error.value.unsupported
+
+
+async def test_chunked_text_keeps_split_characters(serve: Serve) -> None:
+    encoded = "Привет".encode("utf-8")
+
+    async def handler(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/plain"})
+        await response.prepare(request)
+        # Граница части проходит внутри символа "и"
+        for part in (encoded[:5], encoded[5:]):
+            await response.write(part)
+            await response.drain()
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/ai/stream", handler)
+    client = BaseAPIClient(await serve(app))
+
+    chunks = [chunk async for chunk in client.stream("v1/ai/stream")]
+
+    assert "".join(chunks) == "Привет"
+    assert "\ufffd" not in "".join(chunks)
+
+
+async def test_http_error_raises_with_status(serve: Serve) -> None:
+    with pytest.raises(StreamError) as error:
+        await _stream_from(serve, web.Response(status=503, text="unavailable"))
+
+    assert error.value.status_code == 503
+
+
+# Запасной запрос ответа целиком
+
+
+def _failing_stream(status_code: int) -> Any:
+    def call_ai_stream(**kwargs: Any) -> AsyncIterator[str]:
+        async def chunks() -> AsyncIterator[str]:
+            raise StreamError(f"API error {status_code}", status_code)
+            yield ""
+
+        return chunks()
+
+    return call_ai_stream
+
+
+async def _call_ai(*args: Any) -> str:
+    return "Ответ целиком"
+
+
+async def test_unsupported_stream_falls_back_to_full_answer(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ai.core_client, "call_ai_stream", _failing_stream(404))
+    monkeypatch.setattr(ai, "call_ai", _call_ai)
+
+    chunks = [chunk async for chunk in ai.call_ai_stream("Вопрос", "")]
+
+    assert chunks == ["Ответ целиком"]
+
+
+async def test_backend_failure_is_not_retried_without_stream(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ai.core_client, "call_ai_stream", _failing_stream(503))
+    monkeypatch.setattr(ai, "call_ai", _call_ai)
+
+    with pytest.raises(StreamError):
+        [chunk async for chunk in ai.call_ai_stream("Вопрос", "")]
+
+
+# Показ ответа в Telegram
+
+
+class _Chat:
+    id = 1
+
+
+class _Sent:
+    """Отправленное сообщение бота"""
+
+    def __init__(self, log: List[Tuple[str, str, Optional[str]]], reject_html: bool):
+        self.log = log
+        self.reject_html = reject_html
+
+    async def edit_text(self, text: str, parse_mode: Optional[str] = None) -> None:
+        if self.reject_html and parse_mode:
+            raise TelegramBadRequest(
+                SendMessage(chat_id=1, text=text), "can't parse entities"
+            )
+        self.log.append(("edit", text, parse_mode))
+
+
+class _Message:
+    """Сообщение пользователя, на которое отвечает бот"""
+
+    chat = _Chat()
+
+    def __init__(self, reject_html: bool = False):
+        self.log: List[Tuple[str, str, Optional[str]]] = []
+        self.reject_html = reject_html
+
+    async def answer(self, text: str, parse_mode: Optional[str] = None) -> _Sent:
+        self.log.append(("answer", text, parse_mode))
+        return _Sent(self.log, self.reject_html)
+
+
+async def _chunks(*parts: str) -> AsyncIterator[str]:
+    for part in parts:
+        yield part
+
+
+async def test_answer_is_edited_in_place_and_finished_with_markup() -> None:
+    message = _Message()
+
+    text = await stream_answer(
+        message, _chunks("<b>Та", "риф</b>", " Домашний")  # type: ignore[arg-type]
+    )
+
+    assert text == "<b>Тариф</b> Домашний"
+    assert message.log[0] == ("answer", "<b>Та</b>", "HTML")
+    assert message.log[-1] == ("edit", "<b>Тариф</b> Домашний", "HTML")
+
+
+async def test_empty_answer_sends_nothing() -> None:
+    message = _Message()
+
+    assert await stream_answer(message, _chunks(" ", "\n")) is None  # type: ignore[arg-type]
+    assert message.log == []
+
+
+async def test_unparsed_partial_html_falls_back_to_plain_text() -> None:
+    message = _Message(reject_html=True)
+    streaming = StreamingMessage(message, interval=0)  # type: ignore[arg-type]
+
+    await streaming.append("<b>Тариф")
+    await streaming.append("</b> Домашний")
+
+    assert message.log == [
+        ("answer", "<b>Тариф</b>", "HTML"),
+        ("edit", "Тариф Домашний", None),
+    ]
+
+
+async def test_long_answer_continues_in_next_message() -> None:
+    message = _Message()
+    streaming = StreamingMessage(message, interval=0)  # type: ignore[arg-type]
+
+    await streaming.append("а" * 3000 + "\n\n")
+    await streaming.append("б" * 2000)
+    await streaming.finish()
+
+    answers = [text for kind, text, _ in message.log if kind == "answer"]
+    assert answers == ["а" * 3000 + "\n\n", "б" * 2000]
+    # Первое сообщение закреплено без хвоста разбиения
+    assert ("edit", "а" * 3000, "HTML") in message.log
+
+
+async def test_stream_error_keeps_shown_part() -> None:
+    message = _Message()
+
+    async def failing() -> AsyncIterator[str]:
+        yield "Начало ответа"
+        raise StreamError("Timeout")
+
+    with pytest.raises(StreamError):
+        await stream_answer(message, failing())  # type: ignore[arg-type]
+    assert message.log[-1][1] == "Начало ответа"
+
+
+async def test_skipped_partial_edit_does_not_hide_final_text() -> None:
+    message = _Message()
+    streaming = StreamingMessage(message, interval=0)  # type: ignore[arg-type]
+    await streaming.append("Тариф")
+    assert streaming._current is not None
+
+    sent = streaming._current
+    edit_text = sent.edit_text
+
+    async def skipped(text: str, parse_mode: Optional[str] = None) -> bool:
+        # Планировщик пропустил промежуточную правку после дедлайна
+        return False
+
+    sent.edit_text = skipped  # type: ignore[method-assign]
+    await streaming.append(" Домашний")
+    sent.edit_text = edit_text  # type: ignore[method-assign]
+    await streaming.finish()
+
+    assert message.log[-1] == ("edit", "Тариф Домашний", "HTML")
+    assert streaming.edits == 1
@@ -0,0 +1,108 @@
+"""Тесты кэша тарифов"""
+
+import asyncio
+from typing import List, Optional
+
+from bot.api.base import APIResponse
+from bot.api.tariffs import TariffCache
+
+
+class _Client:
+    """Core API с управляемым ответом на запрос тарифов"""
+
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+        self.response = APIResponse(success=True, data={"tariffs": [1]})
+        self.release: Optional[asyncio.Event] = None
+
+    async def get_tariffs_from_redis(self, territory_id: str) -> APIResponse:
+        self.calls.append(territory_id)
+        if self.release is not None:
+            await self.release.wait()
+        return self.response
+
+
+def _cache(client: _Client) -> TariffCache:
+    return TariffCache(client, ttl=60, maxsize=10)  # type: ignore[arg-type]
+
+
+async def test_successful_response_is_cached() -> None:
+    client = _Client()
+    cache = _cache(client)
+
+    await cache.get("42")
+    response = await cache.get("42")
+
+    assert response.data == {"tariffs": [1]}
+    assert client.calls == ["42"]
+    assert cache.stats.hit_rate == 0.5
+
+
+async def test_errors_and_empty_data_are_not_cached() -> None:
+    client = _Client()
+    cache = _cache(client)
+    client.response = APIResponse(success=False, error="HTTP 503")
+    await cache.get("42")
+    client.response = APIResponse(success=True, data={})
+    await cache.get("42")
+
+    assert client.calls == ["42", "42"]
+    assert cache.stats.errors == 2
+    assert cache.stats.size == 0
+
+
+async def test_invalidate_drops_cached_territory() -> None:
+    client = _Client()
+    cache = _cache(client)
+    await cache.get("42")
+    await cache.get("7")
+
+    cache.invalidate("42")
+    await cache.get("42")
+    await cache.get("7")
+    assert client.calls == ["42", "7", "42"]
+
+    cache.invalidate()
+    assert cache.stats.size == 0
+
+
+async def test_load_started_before_invalidate_is_not_cached() -> None:
+    client = _Client()
+    client.release = asyncio.Event()
+    cache = _cache(client)
+
+    loading = asyncio.create_task(cache.get("42"))
+    await asyncio.sleep(0)
+    cache.invalidate("42")
+    client.release.set()
+    await loading
+
+    assert cache.stats.size == 0
+
+
+async def test_concurrent_misses_load_territory_once() -> None:
+    client = _Client()
+    client.release = asyncio.Event()
+    cache = _cache(client)
+
+    loads = [asyncio.create_task(cache.get("42")) for _ in range(3)]
+    await asyncio.sleep(0)
+    client.release.set()
+    responses = await asyncio.gather(*loads)
+
+    assert client.calls == ["42"]
+    assert all(response.data == {"tariffs": [1]} for response in responses)
+    # Каждый получил свою копию данных
+    assert len({id(response.data) for response in responses}) == 3
+
+
+async def test_cached_response_is_copied() -> None:
+    client = _Client()
+    cache = _cache(client)
+
+    first = await cache.get("42")
+    assert first.data is not None
+    first.data["tariffs"].append(2)
+    second = await cache.get("42")
+
+    assert second.data == {"tariffs": [1]}
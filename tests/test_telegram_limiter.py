@@ -0,0 +1,171 @@
+"""Тесты планировщика запросов к Telegram Bot API"""
+
+import asyncio
+from typing import Any, List
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText, SendChatAction, SendMessage, TelegramMethod
+
+from bot.api import deadline
+from bot.config import TelegramRateLimitConfig
+from bot.utils.telegram_limiter import (
+    PRIORITY_ANSWER,
+    PRIORITY_COSMETIC,
+    RateLimitMiddleware,
+    TelegramScheduler,
+    TokenBucket,
+    intermediate_edits,
+)
+
+
+def test_token_bucket_refills_at_rate() -> None:
+    bucket = TokenBucket(rate=2, burst=2)
+    now = bucket._updated
+
+    bucket.consume(now)
+    bucket.consume(now)
+    assert bucket.ready_at(now) == pytest.approx(now + 0.5)
+    assert bucket.ready_at(now + 0.5) == now + 0.5
+    assert not bucket.idle(now + 0.5)
+    assert bucket.idle(now + 10)
+
+
+def test_token_bucket_ignores_earlier_time() -> None:
+    bucket = TokenBucket(rate=1, burst=1)
+
+    # Момент, вычисленный до создания корзины, не уменьшает запас маркеров
+    assert bucket.ready_at(bucket._updated - 5) == bucket._updated - 5
+
+
+def _scheduler(**overrides: Any) -> TelegramScheduler:
+    settings = dict(chat_rate=20.0, chat_burst=1, chat_action_max_wait=0.01)
+    settings.update(overrides)
+    return TelegramScheduler(TelegramRateLimitConfig(**settings))
+
+
+async def test_answers_get_quota_before_cosmetic_requests() -> None:
+    scheduler = _scheduler()
+    order: List[str] = []
+
+    async def request(name: str, priority: int) -> None:
+        await scheduler.acquire(1, priority)
+        order.append(name)
+
+    await scheduler.acquire(1, PRIORITY_ANSWER)
+    await asyncio.gather(
+        request("typing", PRIORITY_COSMETIC), request("answer", PRIORITY_ANSWER)
+    )
+
+    assert order == ["answer", "typing"]
+    assert scheduler.stats.throttled == 2
+
+
+async def test_chats_have_separate_quotas() -> None:
+    scheduler = _scheduler(chat_rate=0.1)
+
+    await scheduler.acquire(1, PRIORITY_ANSWER)
+    assert await asyncio.wait_for(scheduler.acquire(2, PRIORITY_ANSWER), 0.1)
+    assert scheduler.stats.throttled == 0
+
+
+async def test_request_is_dropped_after_max_wait() -> None:
+    scheduler = _scheduler(chat_rate=0.1)
+    await scheduler.acquire(1, PRIORITY_ANSWER)
+
+    assert not await scheduler.acquire(1, PRIORITY_COSMETIC, max_wait=0.01)
+    assert scheduler.stats.dropped == 1
+    assert scheduler.stats.queue_depth == 0
+
+
+async def test_blocked_chat_waits_for_retry_after() -> None:
+    scheduler = _scheduler(chat_burst=5)
+    scheduler.block(1, 0.05)
+
+    assert not await scheduler.acquire(1, PRIORITY_ANSWER, max_wait=0.01)
+    assert await scheduler.acquire(1, PRIORITY_ANSWER, max_wait=0.2)
+
+
+class _Api:
+    """Telegram API, отвечающий RetryAfter заданное число раз"""
+
+    def __init__(self, retry_after: int, failures: int = 1):
+        self.retry_after = retry_after
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self, bot: Any, method: TelegramMethod[Any]) -> bool:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise TelegramRetryAfter(method, "Too Many Requests", self.retry_after)
+        return True
+
+
+def _middleware(**overrides: Any) -> RateLimitMiddleware:
+    return RateLimitMiddleware(_scheduler(**{"chat_burst": 5, **overrides}))
+
+
+async def test_answer_is_retried_after_pause() -> None:
+    api = _Api(retry_after=0)
+
+    assert await _middleware()(api, None, SendMessage(chat_id=1, text="Ответ"))
+    assert api.calls == 2
+
+
+async def test_final_edit_is_retried_after_pause() -> None:
+    api = _Api(retry_after=0)
+    edit = EditMessageText(chat_id=1, message_id=1, text="Ответ")
+
+    assert await _middleware()(api, None, edit)
+    assert api.calls == 2
+
+
+async def test_intermediate_edit_is_not_retried() -> None:
+    api = _Api(retry_after=0)
+    edit = EditMessageText(chat_id=1, message_id=1, text="Отв")
+
+    with intermediate_edits():
+        with pytest.raises(TelegramRetryAfter):
+            await _middleware()(api, None, edit)
+    assert api.calls == 1
+
+
+async def test_pause_longer_than_limit_is_not_waited() -> None:
+    api = _Api(retry_after=5)
+
+    with pytest.raises(TelegramRetryAfter):
+        await _middleware(max_retry_after=1.0)(
+            api, None, SendMessage(chat_id=1, text="Ответ")
+        )
+    assert api.calls == 1
+
+
+async def test_stale_chat_action_is_skipped() -> None:
+    middleware = _middleware(chat_burst=1, chat_rate=0.1)
+    api = _Api(retry_after=0, failures=0)
+    action = SendChatAction(chat_id=1, action="typing")
+
+    assert await middleware(api, None, action)
+    assert await middleware(api, None, action) is False
+    assert api.calls == 1
+
+
+async def test_answer_after_deadline_is_still_sent() -> None:
+    middleware = _middleware(chat_burst=1, chat_rate=20.0)
+    api = _Api(retry_after=0, failures=0)
+    await middleware(api, None, SendMessage(chat_id=1, text="Первый"))
+
+    with deadline.deadline_scope(0.001):
+        assert await middleware(api, None, SendMessage(chat_id=1, text="Второй"))
+    assert api.calls == 2
+
+
+async def test_intermediate_edit_after_deadline_is_skipped() -> None:
+    middleware = _middleware(chat_burst=1, chat_rate=20.0)
+    api = _Api(retry_after=0, failures=0)
+    await middleware(api, None, SendMessage(chat_id=1, text="Первый"))
+    edit = EditMessageText(chat_id=1, message_id=1, text="Отв")
+
+    with deadline.deadline_scope(0.001), intermediate_edits():
+        assert await middleware(api, None, edit) is False
+    assert api.calls == 1
@@ -0,0 +1,81 @@
+"""Тесты декоратора send_typing_action"""
+
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from bot.utils.decorators import send_typing_action
+from bot.utils.progress import progress_tracker
+
+
+class _Bot:
+    def __init__(self) -> None:
+        self.actions: List[Any] = []
+
+    async def send_chat_action(self, chat_id: Any, action: str) -> bool:
+        # Медленный Telegram не задерживает обработчик
+        await asyncio.sleep(0.05)
+        self.actions.append(chat_id)
+        return True
+
+
+class _Chat:
+    id = 1
+
+
+class _Message:
+    chat = _Chat()
+
+    def __init__(self) -> None:
+        self.bot = _Bot()
+
+
+@pytest.fixture(autouse=True)
+def fast_refresh(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(progress_tracker, "delay", 0.0)
+    monkeypatch.setattr(progress_tracker, "refresh", 0.01)
+
+
+async def test_handler_starts_without_waiting_for_telegram() -> None:
+    message = _Message()
+    started: List[int] = []
+
+    @send_typing_action
+    async def handler(event: _Message) -> str:
+        started.append(len(event.bot.actions))
+        await asyncio.sleep(0.08)
+        return "ok"
+
+    assert await handler(message) == "ok"
+    assert started == [0]
+    assert message.bot.actions == [1]
+
+
+async def test_status_refresh_stops_after_handler_error() -> None:
+    message = _Message()
+
+    @send_typing_action
+    async def handler(event: _Message) -> None:
+        await asyncio.sleep(0.07)
+        raise RuntimeError("ошибка обработчика")
+
+    with pytest.raises(RuntimeError):
+        await handler(message)
+    sent = len(message.bot.actions)
+    await asyncio.sleep(0.1)
+
+    assert len(message.bot.actions) == sent
+    assert 1 not in progress_tracker._typing
+
+
+async def test_inline_queries_are_passed_through() -> None:
+    class _InlineQuery:
+        query = "ленина"
+
+    @send_typing_action
+    async def handler(event: _InlineQuery) -> str:
+        return event.query
+
+    assert await handler(_InlineQuery()) == "ленина"
+    assert progress_tracker._typing == {}